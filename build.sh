@@ -1,5 +1,6 @@
 #!/bin/bash
-# build.sh: Compila el código Ensamblador y C para crear la biblioteca compartida 32-bit.
+# build.sh: Compila el código Ensamblador y C para crear las bibliotecas compartidas
+#           32-bit (para Server32) y 64-bit (para el backend en proceso vía ctypes).
 
 # --- Funciones de color ---
 red() { echo -e "\033[31m$1\033[0m"; }
@@ -10,7 +11,7 @@ bold() { echo -e "\033[1m$1\033[0m"; }
 # --- Salir si cualquier comando falla ---
 set -e
 
-green "--- Iniciando Compilación C/ASM (32-bit) ---"
+green "--- Iniciando Compilación C/ASM (32-bit y 64-bit) ---"
 
 # --- Definición de Archivos y Directorios ---
 SRC_DIR="src"
@@ -24,6 +25,17 @@ C_SOURCE="${C_BRIDGE_DIR}/gini_processor.c"
 TARGET_LIB_NAME="libginiprocessor.so"
 TARGET_LIB_PATH="${LIB_DIR}/${TARGET_LIB_NAME}"
 
+# Versión 64-bit (misma API C, ASM x86-64)
+ASM64_SOURCE="${C_BRIDGE_DIR}/float_rounder64.asm"
+ASM64_OBJECT="${C_BRIDGE_DIR}/float_rounder64.o"
+TARGET_LIB64_NAME="libginiprocessor64.so"
+TARGET_LIB64_PATH="${LIB_DIR}/${TARGET_LIB64_NAME}"
+
+# Núcleo del calculador de GINI sobre microdatos (gini_calculator.py), solo C 64-bit
+KERNEL_SOURCE="${C_BRIDGE_DIR}/gini_kernel.c"
+TARGET_KERNEL_NAME="libginikernel64.so"
+TARGET_KERNEL_PATH="${LIB_DIR}/${TARGET_KERNEL_NAME}"
+
 # Compiladores y Flags
 ASM_COMPILER="nasm"
 # -f elf: Formato ELF 32-bit para Linux
@@ -37,7 +49,20 @@ C_COMPILER="gcc"
 # -o <path>: Especificar archivo de salida
 # -g: Información de depuración
 # -Wall: Habilitar todas las advertencias comunes
-C_FLAGS="-m32 -shared -fPIC -o ${TARGET_LIB_PATH} -g -Wall"
+# -DGINI_VERBOSE: Trazas printf del puente C (solo con GINI_VERBOSE=1 ./build.sh)
+C_DEFINES=""
+if [ "${GINI_VERBOSE:-0}" = "1" ]; then
+    C_DEFINES="-DGINI_VERBOSE"
+fi
+C_FLAGS="-m32 -shared -fPIC -o ${TARGET_LIB_PATH} -g -Wall ${C_DEFINES}"
+
+# -f elf64: Formato ELF 64-bit para Linux
+ASM64_FLAGS="-f elf64 -g -F dwarf"
+# -m64: Compilar para x86-64 (mismo Python 64-bit de la aplicación)
+C64_FLAGS="-m64 -shared -fPIC -o ${TARGET_LIB64_PATH} -g -Wall ${C_DEFINES}"
+# -O3: los bucles del radix sort y de la acumulación son el camino caliente
+# -fno-strict-aliasing: el radix sort reinterpreta el buffer de doubles como enteros de 64 bits
+KERNEL_FLAGS="-m64 -shared -fPIC -o ${TARGET_KERNEL_PATH} -O3 -fno-strict-aliasing -g -Wall"
 
 # --- 1. Verificar Archivos Fuente ---
 bold "Paso 1: Verificando archivos fuente..."
@@ -49,6 +74,14 @@ if [ ! -f "$C_SOURCE" ]; then
     red "Error: No se encontró el archivo fuente C '$C_SOURCE'."
     exit 1
 fi
+if [ ! -f "$ASM64_SOURCE" ]; then
+    red "Error: No se encontró el archivo fuente ASM 64-bit '$ASM64_SOURCE'."
+    exit 1
+fi
+if [ ! -f "$KERNEL_SOURCE" ]; then
+    red "Error: No se encontró el archivo fuente C '$KERNEL_SOURCE'."
+    exit 1
+fi
 green "Archivos fuente encontrados."
 echo
 
@@ -96,10 +129,55 @@ else
 fi
 echo
 
-# --- 6. Limpieza (Opcional: eliminar objeto intermedio) ---
-bold "Paso 6: Limpiando archivo objeto intermedio..."
-rm -f "$ASM_OBJECT"
-green "Archivo '${ASM_OBJECT}' eliminado."
+# --- 6. Compilar Ensamblador 64-bit (ASM -> .o) ---
+bold "Paso 6: Compilando Ensamblador 64-bit (${ASM64_SOURCE} -> ${ASM64_OBJECT})..."
+echo "Comando: ${ASM_COMPILER} ${ASM64_FLAGS} ${ASM64_SOURCE} -o ${ASM64_OBJECT}"
+if ${ASM_COMPILER} ${ASM64_FLAGS} ${ASM64_SOURCE} -o ${ASM64_OBJECT}; then
+    green "Compilación ASM 64-bit exitosa."
+else
+    red "Error durante la compilación ASM 64-bit."
+    exit 1
+fi
+echo
+
+# --- 7. Compilar C 64-bit y Enlazar (C + .o -> .so) ---
+bold "Paso 7: Compilando C y enlazando biblioteca 64-bit (${TARGET_LIB64_PATH})..."
+echo "Comando: ${C_COMPILER} ${C64_FLAGS} ${C_SOURCE} ${ASM64_OBJECT}"
+if ${C_COMPILER} ${C64_FLAGS} ${C_SOURCE} ${ASM64_OBJECT}; then
+    green "Compilación C y enlace 64-bit exitosos."
+    green "Biblioteca creada en: ${TARGET_LIB64_PATH}"
+else
+    red "Error durante la compilación/enlace C 64-bit."
+    exit 1
+fi
+echo
+
+# --- 8. Verificar Arquitectura de la Biblioteca 64-bit ---
+bold "Paso 8: Verificando arquitectura de la biblioteca 64-bit..."
+echo "Comando: file ${TARGET_LIB64_PATH}"
+if file "${TARGET_LIB64_PATH}" | grep -q "ELF 64-bit LSB shared object"; then
+    green "Verificación OK: La biblioteca es ELF 64-bit."
+else
+    yellow "Advertencia: No se pudo confirmar automáticamente que la biblioteca sea 64-bit ELF."
+    yellow "Salida de 'file': $(file ${TARGET_LIB64_PATH})"
+fi
+echo
+
+# --- 9. Compilar el Núcleo del Calculador (C -> .so) ---
+bold "Paso 9: Compilando núcleo del calculador (${TARGET_KERNEL_PATH})..."
+echo "Comando: ${C_COMPILER} ${KERNEL_FLAGS} ${KERNEL_SOURCE}"
+if ${C_COMPILER} ${KERNEL_FLAGS} ${KERNEL_SOURCE}; then
+    green "Núcleo creado en: ${TARGET_KERNEL_PATH}"
+else
+    red "Error durante la compilación del núcleo del calculador."
+    exit 1
+fi
+echo
+
+# --- 10. Limpieza (Opcional: eliminar objetos intermedios) ---
+bold "Paso 10: Limpiando archivos objeto intermedios..."
+rm -f "$ASM_OBJECT" "$ASM64_OBJECT"
+green "Archivos '${ASM_OBJECT}' y '${ASM64_OBJECT}' eliminados."
 echo
 
 # --- Finalización ---
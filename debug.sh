@@ -48,7 +48,7 @@ echo
 # --- 3. Compilar Componentes C/ASM para Debug 32-bit ---
 bold "Paso 3: Compilando componentes C/ASM para debug (32-bit)..."
 echo "Compilando C: ${C_SRC} -> ${C_OBJ}"
-gcc -m32 -g -Wall -Wextra -c "${C_SRC}" -o "${C_OBJ}" || { red "Error al compilar ${C_SRC}"; exit 1; }
+gcc -m32 -g -Wall -Wextra -DGINI_VERBOSE -c "${C_SRC}" -o "${C_OBJ}" || { red "Error al compilar ${C_SRC}"; exit 1; }
 green "  -> Compilación C OK."
 
 echo "Ensamblando ASM: ${ASM_SRC} -> ${ASM_OBJ}"
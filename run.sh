@@ -25,26 +25,29 @@ else
 fi
 echo
 
-# --- 2. Verificar Existencia de la Biblioteca Compilada ---
+# --- 2. Verificar Existencia de las Bibliotecas Compiladas ---
 LIB_PATH="lib/libginiprocessor.so"
-bold "Paso 2: Verificando biblioteca C/ASM compilada..."
-if [ ! -f "$LIB_PATH" ]; then
-    red "Error: Biblioteca C/ASM '${LIB_PATH}' no encontrada."
-    yellow "Asegúrate de haber ejecutado './build.sh' después de './setup.sh'."
-    deactivate # Desactivar venv antes de salir
-    exit 1
-else
-    green "Biblioteca '${LIB_PATH}' encontrada."
+LIB64_PATH="lib/libginiprocessor64.so"
+bold "Paso 2: Verificando bibliotecas C/ASM compiladas..."
+if [ -f "$LIB64_PATH" ]; then
+    green "Biblioteca '${LIB64_PATH}' encontrada (backend en proceso)."
+fi
+if [ -f "$LIB_PATH" ]; then
+    green "Biblioteca '${LIB_PATH}' encontrada (backend Server32)."
+fi
+if [ ! -f "$LIB64_PATH" ] && [ ! -f "$LIB_PATH" ]; then
+    yellow "Advertencia: No se encontró ninguna biblioteca C/ASM en 'lib/'."
+    yellow "Se usará el backend de referencia en Python. Ejecuta './build.sh' para compilarlas."
 fi
 echo
 
 # --- 3. Ejecutar la Aplicación Python ---
 PYTHON_ENTRY_POINT="src/main.py"
 bold "Paso 3: Lanzando aplicación Python (${PYTHON_ENTRY_POINT})..."
-echo "Comando: python ${PYTHON_ENTRY_POINT}"
+echo "Comando: python ${PYTHON_ENTRY_POINT} $*"
 echo "--------------------------------------------------"
 # Ejecuta python. Salir con el código de estado de python.
-python "${PYTHON_ENTRY_POINT}"
+python "${PYTHON_ENTRY_POINT}" "$@"
 exit_status=$?
 echo "--------------------------------------------------"
 
@@ -5,7 +5,8 @@
 ; Method: Uses FPU instructions for rounding (default FPU mode is round-to-nearest).
 
 section .text
-    global asm_round  ; Export symbol for C linker
+    global asm_round        ; Export symbol for C linker
+    global asm_round_batch  ; Versión por lotes (SSE2)
 
 asm_round:
     ; --- Prologue ---
@@ -62,3 +63,59 @@ asm_round:
                         ;     transferring control back to the C caller.
                         ;     According to cdecl, the C caller will clean up the
                         ;     arguments ([ebp+8] and [ebp+12]) from the stack.
+
+
+; ---------------------------------------------------------------------------
+; asm_round_batch(const float* input, int* output, int count)
+; Input: float pointer [ebp+8], int pointer [ebp+12], count [ebp+16]
+; Output: output[i] = round(input[i]) for i in [0, count).
+; Method: SSE2 CVTPS2DQ converts 4 floats per iteration using the MXCSR
+;         rounding mode (default round-to-nearest-even, same as the FPU
+;         default used by asm_round). The remaining 0-3 values go through
+;         the same FLD/FISTP path as asm_round.
+;         Out-of-range values and NaN yield 0x80000000 on both paths
+;         ("integer indefinite"), so SIMD and scalar results agree.
+; ---------------------------------------------------------------------------
+asm_round_batch:
+    ; --- Prologue ---
+    push    ebp
+    mov     ebp, esp
+    push    esi             ; ESI/EDI are callee-saved in cdecl.
+    push    edi
+
+    mov     esi, [ebp+8]    ; ESI = input pointer
+    mov     edi, [ebp+12]   ; EDI = output pointer
+    mov     ecx, [ebp+16]   ; ECX = count
+    test    ecx, ecx
+    jle     .done           ; Nothing to do for count <= 0.
+
+    ; --- SIMD body: 4 floats per iteration ---
+.simd_loop:
+    cmp     ecx, 4
+    jl      .tail
+    movups  xmm0, [esi]     ; Unaligned load: Python buffers have no alignment guarantee.
+    cvtps2dq xmm0, xmm0     ; 4 x float32 -> 4 x int32 (MXCSR rounding).
+    movdqu  [edi], xmm0     ; Unaligned store of the 4 results.
+    add     esi, 16
+    add     edi, 16
+    sub     ecx, 4
+    jmp     .simd_loop
+
+    ; --- Scalar tail: remaining 0-3 values ---
+.tail:
+    test    ecx, ecx
+    jz      .done
+.tail_loop:
+    fld     dword [esi]     ; Same conversion as asm_round.
+    fistp   dword [edi]
+    add     esi, 4
+    add     edi, 4
+    dec     ecx
+    jnz     .tail_loop
+
+    ; --- Epilogue ---
+.done:
+    pop     edi
+    pop     esi
+    pop     ebp
+    ret
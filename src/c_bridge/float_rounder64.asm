@@ -0,0 +1,54 @@
+; float_rounder64.asm
+; NASM Assembly code (64-bit Linux, System V AMD64 ABI) equivalent to float_rounder.asm.
+; Used by the in-process backend (ctypes from 64-bit Python, no Server32 needed).
+; Same symbols and semantics as the 32-bit version:
+;   asm_round(float input, int* output)                        -> *output = round(input)
+;   asm_round_batch(const float* input, int* output, int count) -> output[i] = round(input[i])
+; Rounding uses the MXCSR mode (default round-to-nearest-even, same as the FPU default
+; used by the 32-bit FISTP). NaN and out-of-range values give 0x80000000, like FISTP.
+;
+; System V arguments: first float in xmm0; integer/pointer args in rdi, rsi, rdx.
+; No stack frame is needed: every register used here is caller-saved.
+
+section .text
+    global asm_round
+    global asm_round_batch
+
+asm_round:
+    cvtss2si eax, xmm0      ; 1. Convert the float in xmm0 to int32 (MXCSR rounding).
+    mov     [rdi], eax      ; 2. Store the result through the pointer argument.
+    ret
+
+asm_round_batch:
+    test    edx, edx
+    jle     .done           ; Nothing to do for count <= 0.
+    mov     ecx, edx        ; ECX = remaining values
+
+    ; --- SIMD body: 4 floats per iteration ---
+.simd_loop:
+    cmp     ecx, 4
+    jl      .tail
+    movups  xmm0, [rdi]     ; Unaligned load (Python buffers have no alignment guarantee).
+    cvtps2dq xmm0, xmm0     ; 4 x float32 -> 4 x int32.
+    movdqu  [rsi], xmm0
+    add     rdi, 16
+    add     rsi, 16
+    sub     ecx, 4
+    jmp     .simd_loop
+
+    ; --- Scalar tail: remaining 0-3 values ---
+.tail:
+    test    ecx, ecx
+    jz      .done
+.tail_loop:
+    cvtss2si eax, [rdi]
+    mov     [rsi], eax
+    add     rdi, 4
+    add     rsi, 4
+    dec     ecx
+    jnz     .tail_loop
+
+.done:
+    ret
+
+section .note.GNU-stack noalloc noexec nowrite progbits
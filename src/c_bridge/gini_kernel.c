@@ -0,0 +1,208 @@
+// gini_kernel.c
+// Núcleo del calculador de coeficientes GINI (gini_calculator.py) para la biblioteca 64-bit
+// libginikernel64.so, cargada con ctypes en el mismo proceso (no pasa por el Server32).
+//
+//   gini_radix_sort       : ordena ingresos (y arrastra los pesos) con radix sort LSD de 11 bits
+//                           sobre la representación IEEE-754, O(n) y estable.
+//   gini_accumulate_sorted: recorre los valores ordenados acumulando W = Σw, T = Σw·x y
+//                           A = Σ x·w·(2·C + w), con C el peso acumulado anterior. GINI = A/(W·T) - 1.
+//                           Acumula en long double y se puede llamar por tramos consecutivos.
+//   gini_parse_csv        : extrae la columna de ingreso (y la de peso) de un bloque de líneas CSV.
+//
+// A no depende del orden entre valores iguales (x·w·(2C + w) = x·(C'² - C²)), así que tramos
+// ordenados por rangos de valor se combinan sumando 2·(peso anterior)·T de cada tramo.
+
+#include <stddef.h>
+#include <stdint.h>
+#include <stdlib.h>
+#include <string.h>
+
+typedef struct {
+    double weight; // W: suma de pesos (cantidad de filas sin ponderar)
+    double total;  // T: suma de ingreso ponderado
+    double area;   // A: Σ x·w·(2·C + w)
+} gini_accum;
+
+#define RADIX_BITS 11
+#define RADIX_SIZE (1u << RADIX_BITS)
+#define RADIX_PASSES 6 // 6 × 11 = 66 >= 64 bits
+
+// Clave entera con el mismo orden que el double: positivos con el bit de signo encendido,
+// negativos invertidos completos.
+static inline uint64_t double_to_key(uint64_t bits) {
+    return (bits & 0x8000000000000000ULL) ? ~bits : (bits | 0x8000000000000000ULL);
+}
+
+static inline uint64_t key_to_double(uint64_t key) {
+    return (key & 0x8000000000000000ULL) ? (key & 0x7FFFFFFFFFFFFFFFULL) : ~key;
+}
+
+// Ordena 'values' (y 'weights' en el mismo orden, si no es NULL) de menor a mayor.
+// Los NaN deben filtrarse antes. Devuelve 0, o -1 si no hay memoria para los buffers auxiliares.
+int gini_radix_sort(double* values, double* weights, size_t n) {
+    if (n < 2) {
+        return 0;
+    }
+    uint64_t* keys = (uint64_t*)values; // Mismo buffer, vista entera (compilado con -fno-strict-aliasing)
+    uint64_t* tmp_keys = (uint64_t*)malloc(n * sizeof(uint64_t));
+    double* tmp_weights = weights ? (double*)malloc(n * sizeof(double)) : NULL;
+    size_t* counts = (size_t*)calloc((size_t)RADIX_PASSES * RADIX_SIZE, sizeof(size_t));
+    if (tmp_keys == NULL || counts == NULL || (weights != NULL && tmp_weights == NULL)) {
+        free(tmp_keys);
+        free(tmp_weights);
+        free(counts);
+        return -1;
+    }
+
+    // Una sola pasada para transformar las claves y armar los seis histogramas
+    for (size_t i = 0; i < n; i++) {
+        uint64_t key = double_to_key(keys[i]);
+        keys[i] = key;
+        for (int pass = 0; pass < RADIX_PASSES; pass++) {
+            counts[(size_t)pass * RADIX_SIZE + ((key >> (pass * RADIX_BITS)) & (RADIX_SIZE - 1))]++;
+        }
+    }
+
+    uint64_t* src_keys = keys;
+    uint64_t* dst_keys = tmp_keys;
+    double* src_weights = weights;
+    double* dst_weights = tmp_weights;
+    for (int pass = 0; pass < RADIX_PASSES; pass++) {
+        size_t* count = counts + (size_t)pass * RADIX_SIZE;
+        int shift = pass * RADIX_BITS;
+        // Si todas las claves comparten este dígito (p. ej. el exponente) la pasada no cambia nada
+        if (count[(src_keys[0] >> shift) & (RADIX_SIZE - 1)] == n) {
+            continue;
+        }
+        size_t offset = 0;
+        for (size_t digit = 0; digit < RADIX_SIZE; digit++) {
+            size_t c = count[digit];
+            count[digit] = offset;
+            offset += c;
+        }
+        if (src_weights != NULL) {
+            for (size_t i = 0; i < n; i++) {
+                size_t pos = count[(src_keys[i] >> shift) & (RADIX_SIZE - 1)]++;
+                dst_keys[pos] = src_keys[i];
+                dst_weights[pos] = src_weights[i];
+            }
+            double* swap_weights = src_weights; src_weights = dst_weights; dst_weights = swap_weights;
+        } else {
+            for (size_t i = 0; i < n; i++) {
+                dst_keys[count[(src_keys[i] >> shift) & (RADIX_SIZE - 1)]++] = src_keys[i];
+            }
+        }
+        uint64_t* swap_keys = src_keys; src_keys = dst_keys; dst_keys = swap_keys;
+    }
+
+    if (src_keys != keys) { // Cantidad impar de pasadas efectivas: el resultado quedó en el auxiliar
+        memcpy(keys, src_keys, n * sizeof(uint64_t));
+        if (weights != NULL) {
+            memcpy(weights, src_weights, n * sizeof(double));
+        }
+    }
+    for (size_t i = 0; i < n; i++) {
+        keys[i] = key_to_double(keys[i]);
+    }
+    free(tmp_keys);
+    free(tmp_weights);
+    free(counts);
+    return 0;
+}
+
+// Acumula W, T y A sobre 'values' ya ordenados (pesos 1 si 'weights' es NULL), continuando
+// desde lo que ya tenga 'acc' (tramos consecutivos de una misma secuencia ordenada).
+// Devuelve 0, o -1 si los argumentos no son válidos.
+int gini_accumulate_sorted(const double* values, const double* weights, size_t n, gini_accum* acc) {
+    if (acc == NULL || (values == NULL && n > 0)) {
+        return -1;
+    }
+    long double cumulative = acc->weight;
+    long double total = acc->total;
+    long double area = acc->area;
+    if (weights == NULL) {
+        for (size_t i = 0; i < n; i++) {
+            long double x = values[i];
+            area += x * (2.0L * cumulative + 1.0L);
+            total += x;
+            cumulative += 1.0L;
+        }
+    } else {
+        for (size_t i = 0; i < n; i++) {
+            long double x = values[i];
+            long double w = weights[i];
+            area += x * w * (2.0L * cumulative + w);
+            total += x * w;
+            cumulative += w;
+        }
+    }
+    acc->weight = (double)cumulative;
+    acc->total = (double)total;
+    acc->area = (double)area;
+    return 0;
+}
+
+// Parsea un número de [start, end): admite espacios y comillas alrededor. 1 si es válido.
+static int parse_field(const char* start, const char* end, double* out) {
+    while (start < end && (*start == ' ' || *start == '"')) start++;
+    while (end > start && (end[-1] == ' ' || end[-1] == '"' || end[-1] == '\r')) end--;
+    if (start == end || end - start > 63) {
+        return 0;
+    }
+    char number[64];
+    memcpy(number, start, (size_t)(end - start));
+    number[end - start] = '\0';
+    char* parsed_end;
+    *out = strtod(number, &parsed_end);
+    return parsed_end == number + (end - start);
+}
+
+// Recorre las líneas completas de 'buf' (debe terminar en '\n' o ser el final del archivo) y
+// guarda la columna 'col' en 'values' y la columna 'weight_col' (si es >= 0) en 'weights'.
+// Las líneas vacías se ignoran; las que no tienen un número válido se cuentan en '*bad'.
+// Devuelve la cantidad de filas escritas (como mucho 'cap').
+size_t gini_parse_csv(const char* buf, size_t len, char delim, int col, int weight_col,
+                      double* values, double* weights, size_t cap, size_t* bad) {
+    size_t rows = 0;
+    size_t bad_rows = 0;
+    const char* p = buf;
+    const char* end = buf + len;
+    while (p < end && rows < cap) {
+        const char* line_end = memchr(p, '\n', (size_t)(end - p));
+        if (line_end == NULL) line_end = end;
+        if (line_end == p || (line_end - p == 1 && *p == '\r')) { // Línea vacía
+            p = line_end + 1;
+            continue;
+        }
+        const char* field = p;
+        int index = 0;
+        int found = 0;
+        int needed = weight_col >= 0 ? 2 : 1;
+        double value = 0.0, weight = 1.0;
+        int ok = 1;
+        while (field <= line_end && found < needed) {
+            const char* field_end = memchr(field, delim, (size_t)(line_end - field));
+            if (field_end == NULL) field_end = line_end;
+            if (index == col) {
+                ok &= parse_field(field, field_end, &value);
+                found++;
+            }
+            if (index == weight_col) {
+                ok &= parse_field(field, field_end, &weight);
+                found++;
+            }
+            index++;
+            field = field_end + 1;
+        }
+        if (ok && found == needed) {
+            values[rows] = value;
+            if (weights != NULL) weights[rows] = weight;
+            rows++;
+        } else {
+            bad_rows++;
+        }
+        p = line_end + 1;
+    }
+    if (bad != NULL) *bad = bad_rows;
+    return rows;
+}
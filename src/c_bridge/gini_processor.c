@@ -1,22 +1,48 @@
 // gini_adder.c (SOLO SE MODIFICA main)
 
 #include <stdio.h>
+#include <stddef.h> // Para NULL
 #include <math.h> // <--- Añadir esta línea
 
 // External declaration of the Assembly function
 extern void asm_round(float input_float, int* output_int_ptr); // Asegúrate que el nombre coincida con el global en ASM
+// Versión vectorizada (SSE2 cvtps2dq, 4 floats por iteración + cola escalar con FPU)
+extern void asm_round_batch(const float* input_floats, int* output_ints, int count);
+
+// Trazas del puente C: solo se compilan con -DGINI_VERBOSE (GINI_VERBOSE=1 ./build.sh, o debug.sh).
+// En la compilación normal desaparecen, así una llamada no paga tres printf.
+#ifdef GINI_VERBOSE
+#define GINI_LOG(...) printf(__VA_ARGS__)
+#else
+#define GINI_LOG(...) ((void)0)
+#endif
 
 // The C bridge function
-int process_gini_pure_c(float gini_value) { // Cambiar nombre si se quiere, pero Python lo llama así
+// Se exporta como 'process_gini_float', que es el nombre que usan server32_bridge.py y los tests en C.
+int process_gini_float(float gini_value) {
     int result_from_asm;
-    printf("[C Bridge] Calling ASM function 'asm_round' with float: %f\n", gini_value);
-    printf("[C Bridge] Address for ASM result output: %p\n", &result_from_asm);
+    GINI_LOG("[C Bridge] Calling ASM function 'asm_round' with float: %f\n", gini_value);
+    GINI_LOG("[C Bridge] Address for ASM result output: %p\n", (void*)&result_from_asm);
     asm_round(gini_value, &result_from_asm); // Llama a la función ASM correcta
-    printf("[C Bridge] Value received from ASM (via pointer): %d\n", result_from_asm);
+    GINI_LOG("[C Bridge] Value received from ASM (via pointer): %d\n", result_from_asm);
     return result_from_asm;
 }
 
+// Puente C por lotes: redondea 'count' floats de 'gini_values' en 'results' con una sola llamada.
+// Sin printf por valor: el objetivo es que todo un historial cueste una sola ida y vuelta.
+// Devuelve la cantidad de valores procesados, o -1 si los argumentos no son válidos.
+int process_gini_batch(const float* gini_values, int* results, int count) {
+    if (gini_values == NULL || results == NULL || count < 0) {
+        return -1;
+    }
+    asm_round_batch(gini_values, results, count);
+    return count;
+}
+
 // --- Main para probar C bridge + ASM directamente (32-bit) ---
+// Solo se compila con -DGINI_PROCESSOR_MAIN, para no chocar con el main() de los tests
+// que enlazan este archivo (tests/test_c_bridge.c, src/gdb_test.c).
+#ifdef GINI_PROCESSOR_MAIN
 int main() {
     float test_values[] = {
         42.7f, 42.3f, 42.5f, 42.0f,
@@ -31,7 +57,7 @@ int main() {
     for (int i = 0; i < num_tests; ++i) {
         float input = test_values[i];
         printf("\nTest Case %d: Input = %.2f\n", i, input);
-        int output = process_gini_pure_c(input); // Llama a la función C -> ASM
+        int output = process_gini_float(input); // Llama a la función C -> ASM
 
         // --- CORREGIR CÁLCULO DEL VALOR ESPERADO ---
         // Usar redondeo "half away from zero" para la expectativa
@@ -79,3 +105,4 @@ int main() {
 
     return failures; // Return 0 on success, non-zero on failure
 }
+#endif // GINI_PROCESSOR_MAIN
@@ -1,51 +1,198 @@
 # src/core_logic.py
 # Contiene la lógica central: obtención de datos de la API del Banco Mundial,
 # procesamiento de datos y la comunicación con el servidor 32-bit usando Client64.
+# Las dependencias pesadas (requests y msl-loadlib) se importan recién en el primer uso
+# (ver _import_requests y get_client_class), así importar este módulo no demora el
+# arranque de la GUI ni del modo por lotes.
 
-import requests
-import sys
-import ctypes # Aún necesario para c_float si no se usa __getattr__ o para claridad
+import json
+import math
+import time
+import ctypes # Para el backend en proceso (carga de la biblioteca 64-bit)
 import os
-from typing import Optional, List, Dict, Any
-import platform
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Optional, List, Dict, Any, Sequence, Iterable, Iterator, TYPE_CHECKING
+from array import array
+if TYPE_CHECKING: # 'requests' se importa al primer uso (ver _import_requests); aquí solo para las anotaciones
+    import requests
 
-# --- Importar Client64 de msl-loadlib ---
-try:
-    from msl.loadlib import Client64
-    from msl.loadlib.exceptions import Server32Error # Para capturar errores del server
-except ImportError:
-    print("ERROR: 'msl-loadlib' no está instalado. Ejecuta './setup.sh' o 'pip install msl-loadlib'", file=sys.stderr)
-    sys.exit(1)
+from gini_cache import GiniCache, CacheEntry, DEFAULT_CACHE_PATH, DEFAULT_TTL_SECONDS, DEFAULT_MAX_ENTRIES
+from gini_series import GiniSeries
+from gini_bulk_store import BulkGiniStore, DEFAULT_STORE_PATH
+from shm_ring import ShmRingClient
+from gini_metrics import get_logger, DEBUG_ENABLED, metrics
+from gini_resilience import ResiliencePolicy, CircuitBreaker, CircuitOpenError
+from country_index import get_country_index, set_country_index, countries_from_api
+from indicator_store import IndicatorStore, Pair, split_records
+
+# --- Logging ---
+# Nivel según GINI_LOG_LEVEL (ver gini_metrics). Los mensajes por petición son DEBUG y
+# se arman solo si DEBUG_ENABLED, para no pagar el formateo en el camino caliente.
+log = get_logger("CoreLogic")
+client_log = get_logger("Client64")
+
+# --- msl-loadlib (importación diferida) ---
+# Client64 y Server32Error se cargan en get_client_class(). Mientras tanto, Server32Error es
+# un sustituto que nunca se lanza, para que los 'except Server32Error' funcionen igual.
+class _Server32ErrorPlaceholder(Exception):
+    """Sustituto de msl.loadlib.exceptions.Server32Error antes de cargar msl-loadlib."""
+
+Server32Error: type = _Server32ErrorPlaceholder
+_client_class = None
+_client_class_error: Optional[str] = None # Motivo si msl-loadlib no está disponible
+_client_class_lock = threading.Lock()
+
+# --- requests (importación diferida) ---
+_requests_module = None
+
+def _import_requests():
+    """Importa requests en el primer uso (requests + urllib3 + certifi son la mayor parte del arranque)."""
+    global _requests_module
+    if _requests_module is None:
+        import requests
+        import requests.adapters
+        _requests_module = requests
+    return _requests_module
+
+def _python_arch() -> str:
+    """'64bit' o '32bit' sin importar platform (solo se necesita el tamaño de puntero)."""
+    return f"{ctypes.sizeof(ctypes.c_void_p) * 8}bit"
 
 # --- Constantes API ---
-BASE_URL = "https://api.worldbank.org/v2/en/country"
+# GINI_API_BASE_URL permite apuntar a otro servidor (p. ej. el simulador de tests/benchmarks)
+BASE_URL = os.environ.get("GINI_API_BASE_URL", "https://api.worldbank.org/v2/en/country").rstrip("/")
 INDICATOR = "SI.POV.GINI"
+INDICATOR_SOURCE = "2"  # World Development Indicators: la API exige 'source' al pedir varios indicadores juntos
 DATE_RANGE = "2011:2020" # Rango de años para buscar datos
-PER_PAGE = "100"        # Registros por página (para evitar paginación simple)
+PER_PAGE = "100"        # Registros por página (se recorren todas las páginas)
+STREAM_CHUNK_SIZE = 64 * 1024  # Bytes leídos por vez al decodificar una página
+REQUEST_TIMEOUT = 15    # Tiempo total (s) de una consulta sin datos en caché, reintentos incluidos
+STALE_REQUEST_TIMEOUT = 5  # Tiempo total (s) cuando hay una copia vencida para usar como respaldo
+
+# --- Resiliencia de las Consultas (ver gini_resilience.py) ---
+# Cada consulta usa un timeout adaptativo (p99 reciente), se cubre con una segunda petición si
+# supera el p95, se reintenta con backoff ante errores transitorios y falla al instante mientras
+# el circuito esté abierto (tras HTTP_BREAKER_FAILURES consultas fallidas seguidas, por HTTP_BREAKER_RESET s).
+HTTP_RETRIES = int(os.environ.get("GINI_HTTP_RETRIES", "2"))
+HTTP_HEDGE = os.environ.get("GINI_HTTP_HEDGE", "1") != "0"
+HTTP_BREAKER_FAILURES = int(os.environ.get("GINI_BREAKER_FAILURES", "5"))
+HTTP_BREAKER_RESET = float(os.environ.get("GINI_BREAKER_RESET", "30"))
+
+# --- Validación Local de Códigos (ver country_index.py) ---
+# Un código que no está en el índice de países se rechaza sin ir a la red.
+# GINI_VALIDATE_COUNTRIES=0 lo deshabilita (p. ej. contra un simulador con códigos inventados).
+VALIDATE_COUNTRIES = os.environ.get("GINI_VALIDATE_COUNTRIES", "1") != "0"
+COUNTRY_LIST_PER_PAGE = "400"  # /v2/country entra en una sola página (~300 economías y agregados)
+
+# --- Configuración de Consultas Concurrentes ---
+MAX_CONCURRENT_REQUESTS = 8   # Hilos / conexiones simultáneas hacia la API
+MULTI_COUNTRY_CHUNK = 20      # Países por consulta con la forma 'ARG;BRA;CHL' de la API
+MULTI_INDICATOR_CHUNK = 60    # Indicadores por consulta 'SI.POV.GINI;SI.DST.FRST.20' (límite de la API)
+
+# Sesión HTTP compartida (pool de conexiones keep-alive, se crea una sola vez)
+_http_session = None
+_http_session_lock = threading.Lock()
+_resilience_instance: Optional[ResiliencePolicy] = None
+
+# --- Configuración de la Caché Persistente ---
+# GINI_CACHE_PATH vacío deshabilita la caché en disco.
+CACHE_PATH = os.environ.get("GINI_CACHE_PATH", DEFAULT_CACHE_PATH)
+CACHE_TTL_SECONDS = float(os.environ.get("GINI_CACHE_TTL", DEFAULT_TTL_SECONDS))
+CACHE_MAX_ENTRIES = int(os.environ.get("GINI_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES))
+
+# Variable global para la instancia de la caché (se inicializa una sola vez)
+_gini_cache_instance = None
+
+# --- Actualización Incremental ---
+# Al vencer una entrada se piden solo los años desde el último con valor hasta el final del
+# rango, con If-None-Match / If-Modified-Since: si nada cambió la API responde 304 sin cuerpo.
+# Cada FULL_REFRESH_SECONDS se vuelve a bajar el rango completo, por si se publicaron o
+# corrigieron valores de años anteriores. GINI_INCREMENTAL_REFRESH=0 lo deshabilita.
+INCREMENTAL_REFRESH = os.environ.get("GINI_INCREMENTAL_REFRESH", "1") != "0"
+FULL_REFRESH_SECONDS = float(os.environ.get("GINI_FULL_REFRESH_DAYS", "30")) * 24 * 3600
+
+# --- Configuración de la Base Offline (archivo masivo importado con gini_bulk_store.py) ---
+# Si el archivo existe, los países que contiene se sirven desde él, sin red.
+# GINI_BULK_STORE vacío deshabilita este backend.
+BULK_STORE_PATH = os.environ.get("GINI_BULK_STORE", DEFAULT_STORE_PATH)
+
+# Instancia de la base offline (None = no cargada todavía, False = no disponible)
+_bulk_store_instance = None
+_bulk_store_lock = threading.Lock()
 
 # --- Configuración del Cliente 64-bit ---
 # Nombre del módulo Python que contiene la clase Server32 (sin .py)
 SERVER_MODULE_NAME = 'server32_bridge' # Apunta al nuevo nombre de archivo
+CLIENT_START_TIMEOUT = 60.0      # Espera máxima (s) a que el servidor 32-bit esté listo
+# Espera máxima (s) al probar el backend 'server32' durante la selección (no bloquear el arranque)
+CLIENT_PROBE_TIMEOUT = float(os.environ.get("GINI_SERVER32_PROBE_TIMEOUT", "10"))
+HEALTH_CHECK_INTERVAL = 30.0     # Intervalo (s) entre pings al servidor 32-bit
+RESTART_BACKOFF_INITIAL = 0.5    # Espera (s) antes del primer reintento tras una caída
+RESTART_BACKOFF_MAX = 60.0       # Tope del backoff exponencial
+MAX_START_FAILURES = 5           # Arranques fallidos seguidos tras los que se deja de supervisar
+# Cantidad de procesos Server32 en el pool (cada uno atiende una petición a la vez)
+SERVER32_POOL_SIZE = int(os.environ.get("GINI_SERVER32_POOL_SIZE", "1"))
+# A partir de este tamaño, un lote se reparte entre todos los procesos del pool
+SERVER32_SPLIT_THRESHOLD = 50_000
+# Transporte por memoria compartida para los lotes (GINI_SHM_TRANSPORT=0 usa solo el socket)
+SHM_TRANSPORT = os.environ.get("GINI_SHM_TRANSPORT", "1") != "0"
 
-# Variable global para la instancia del cliente (se inicializa una sola vez)
-_gini_client_instance = None
-
-class GiniClient64(Client64):
-    """Cliente 64-bit para comunicarse con GiniProcessorServer (32-bit)."""
+class GiniClient64:
+    """
+    Cliente 64-bit para comunicarse con GiniProcessorServer (32-bit).
+    La clase que se instancia combina estos métodos con msl.loadlib.Client64; se arma
+    en get_client_class() la primera vez que hace falta un servidor 32-bit.
+    """
     def __init__(self):
-        print(f"[Client64] Inicializando GiniClient64...", file=sys.stderr)
-        print(f"[Client64] Arquitectura Python: {platform.architecture()[0]}", file=sys.stderr) # Debería ser 64bit
+        # La conexión con el servidor no admite peticiones simultáneas: se serializan con este lock
+        self._request_lock = threading.Lock()
+        self._ring: Optional[ShmRingClient] = None
+        client_log.info("Inicializando GiniClient64...")
+        client_log.info("Arquitectura Python: %s", _python_arch()) # Debería ser 64bit
         try:
             # Inicializa Client64, apuntando al módulo del servidor 32-bit
             # msl-loadlib buscará src/server32_bridge.py y lo ejecutará en un Python 32-bit
-            super().__init__(module32=SERVER_MODULE_NAME)
-            print(f"[Client64] Conectado al servidor 32-bit '{SERVER_MODULE_NAME}'.", file=sys.stderr)
+            with metrics.timer("server32.startup"):
+                super().__init__(module32=SERVER_MODULE_NAME)
+            client_log.info("Conectado al servidor 32-bit '%s'.", SERVER_MODULE_NAME)
         except Exception as e:
-            print(f"[Client64] FATAL ERROR durante la inicialización: {type(e).__name__}: {e}", file=sys.stderr)
-            print("[Client64] Posibles causas: Python 32-bit no encontrado, error en server32_bridge.py.", file=sys.stderr)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            client_log.error("FATAL ERROR durante la inicialización: %s: %s", type(e).__name__, e, exc_info=True)
+            client_log.error("Posibles causas: Python 32-bit no encontrado, error en server32_bridge.py.")
             raise # Re-lanza para indicar fallo
+        if SHM_TRANSPORT:
+            self._attach_ring()
+
+    def _attach_ring(self) -> None:
+        """Crea el anillo compartido y se lo pasa al servidor. Si algo falla, se sigue por socket."""
+        ring = None
+        try:
+            ring = ShmRingClient()
+            self._request('attach_shm_ring', *ring.attach_args())
+            self._ring = ring
+            client_log.info("Transporte por memoria compartida activo (%s).", ring.path)
+        except Exception as e:
+            client_log.warning("Memoria compartida no disponible (%s: %s). Se usa el socket.", type(e).__name__, e)
+            if ring is not None:
+                ring.close()
+
+    def shutdown_server32(self, *args, **kwargs):
+        """Desconecta y borra el anillo compartido antes de cerrar el servidor."""
+        ring, self._ring = getattr(self, '_ring', None), None
+        if ring is not None:
+            try:
+                self._request('detach_shm_ring')
+            except Exception:
+                pass # El servidor puede estar ya muerto
+            ring.close()
+        return super().shutdown_server32(*args, **kwargs)
+
+    def _request(self, method_name: str, *args):
+        with self._request_lock:
+            # Ida y vuelta completa por el socket (pickle + despacho en el servidor)
+            with metrics.timer(f"ipc.socket.{method_name}"):
+                return self.request32(method_name, *args)
 
     # --- Método explícito para llamar a la función del servidor ---
     # Es más claro que usar __getattr__ para un solo método.
@@ -53,28 +200,524 @@ class GiniClient64(Client64):
         """
         Envía una petición al método 'process_gini_float' en el GiniProcessorServer.
         """
-        print(f"[Client64] Enviando petición 'process_gini_float' con valor: {gini_value}", file=sys.stderr)
+        if DEBUG_ENABLED:
+            client_log.debug(f"Enviando petición 'process_gini_float' con valor: {gini_value}")
+        if self._ring is not None:
+            # Lote de un valor por memoria compartida: misma conversión FLD/FISTP que asm_round
+            with metrics.timer("ipc.shm.round_batch"):
+                return self._ring.round_batch([gini_value])[0]
         # Llama al método 'process_gini_float' en la instancia del Server32 remoto.
         # Los argumentos se pasan directamente.
-        return self.request32('process_gini_float', gini_value)
+        return self._request('process_gini_float', gini_value)
 
-def _get_client() -> Optional[GiniClient64]:
-    """Obtiene o crea la instancia singleton del cliente GiniClient64."""
-    global _gini_client_instance
-    if _gini_client_instance is None:
-        print("[CoreLogic] Creando instancia de GiniClient64...", file=sys.stderr)
+    def process_gini_batch_on_server(self, gini_values: Sequence[float]) -> List[int]:
+        """
+        Envía todos los valores en una sola petición 'process_gini_batch'.
+        Los floats viajan empaquetados como float32 y vuelven como int32,
+        así un historial completo cuesta una sola ida y vuelta al servidor.
+        Con el anillo compartido activo, los valores no pasan por el socket.
+        """
+        if DEBUG_ENABLED:
+            client_log.debug(f"Enviando petición 'process_gini_batch' con {len(gini_values)} valores")
+        if self._ring is not None:
+            with metrics.timer("ipc.shm.round_batch"):
+                return self._ring.round_batch(gini_values)
+        packed = array('f', gini_values).tobytes()
+        raw_results = self._request('process_gini_batch', packed)
+        results = array('i')
+        results.frombytes(raw_results)
+        return results.tolist()
+
+    def ping_server(self) -> bool:
+        """Petición mínima para comprobar que el servidor 32-bit sigue respondiendo."""
+        return self._request('ping') is True
+
+    def server_metrics(self) -> Dict[str, Any]:
+        """Snapshot de las métricas del proceso Server32 (despacho y llamadas nativas)."""
+        return self._request('get_metrics')
+
+def get_client_class() -> type:
+    """
+    Importa msl-loadlib y arma la clase GiniClient64 real (una sola vez).
+
+    Raises:
+        ImportError: si msl-loadlib no está instalado (solo falla el backend Server32).
+    """
+    global _client_class, _client_class_error, Server32Error
+    with _client_class_lock:
+        if _client_class is None:
+            if _client_class_error is not None:
+                raise ImportError(_client_class_error)
+            try:
+                from msl.loadlib import Client64
+                from msl.loadlib.exceptions import Server32Error as _Server32Error
+            except ImportError as e:
+                _client_class_error = f"'msl-loadlib' no está instalado ({e}). Ejecuta './setup.sh' o 'pip install msl-loadlib'"
+                log.warning(_client_class_error)
+                raise ImportError(_client_class_error) from e
+            Server32Error = _Server32Error
+            _client_class = type("GiniClient64", (GiniClient64, Client64), {"__module__": __name__})
+        return _client_class
+
+def server32_supported() -> bool:
+    """True si msl-loadlib se puede importar (sin lanzar ningún servidor)."""
+    try:
+        get_client_class()
+        return True
+    except ImportError:
+        return False
+
+class GiniClientSupervisor:
+    """
+    Mantiene vivo el GiniClient64: lo crea en un hilo de fondo (con un Future que indica
+    cuándo está listo), le hace pings periódicos y, si el servidor muere o deja de
+    responder, lo descarta y lo vuelve a lanzar con backoff exponencial.
+    Tras max_failures arranques fallidos seguidos (p. ej. no hay Python 32-bit) deja de
+    intentarlo: no tiene sentido lanzar un proceso condenado cada minuto toda la sesión.
+    """
+    def __init__(self, health_interval: float = HEALTH_CHECK_INTERVAL,
+                 backoff_initial: float = RESTART_BACKOFF_INITIAL, backoff_max: float = RESTART_BACKOFF_MAX,
+                 max_failures: int = MAX_START_FAILURES):
+        self.health_interval = health_interval
+        self.backoff_initial = backoff_initial
+        self.backoff_max = backoff_max
+        self.max_failures = max_failures
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._client: Optional[GiniClient64] = None
+        self._ready: Future = Future()
+        self._spawning = False
+        self._backoff = backoff_initial
+        self._next_attempt = 0.0
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> Future:
+        """Future que se resuelve con el cliente (o con la excepción del último intento)."""
+        return self._ready
+
+    def start(self) -> Future:
+        """Lanza el cliente en segundo plano si no existe (respetando el backoff). No bloquea."""
+        with self._lock:
+            if self._client is not None or self._spawning:
+                return self._ready
+            if self._stop.is_set():
+                if not self._ready.done():
+                    self._ready.set_exception(RuntimeError("El servidor 32-bit ya no se supervisa."))
+                return self._ready
+            if self._ready.done():
+                if time.monotonic() < self._next_attempt:
+                    return self._ready # Último intento falló y el backoff no venció
+                self._ready = Future()
+            self._spawning = True
+            ready = self._ready
+        threading.Thread(target=self._spawn, args=(ready,), name="GiniClient64-spawn", daemon=True).start()
+        return ready
+
+    def _spawn(self, ready: Future) -> None:
+        log.info("Creando instancia de GiniClient64...")
         try:
-            _gini_client_instance = GiniClient64()
+            client = get_client_class()()
         except Exception as e:
             # Fallo al crear el cliente (ya se imprimió el error en __init__)
-            print(f"[CoreLogic] No se pudo crear la instancia de GiniClient64: {e}", file=sys.stderr)
-            _gini_client_instance = None # Asegura que siga siendo None
-    return _gini_client_instance
+            with self._lock:
+                self._spawning = False
+                self._failures += 1
+                self._next_attempt = time.monotonic() + self._backoff
+                give_up = self._failures >= self.max_failures
+                if give_up:
+                    log.error("No se pudo crear GiniClient64 tras %d intentos (%s). No se reintentará.", self._failures, e)
+                else:
+                    log.warning("No se pudo crear GiniClient64: %s. Reintento en %.1fs.", e, self._backoff)
+                self._backoff = min(self._backoff * 2, self.backoff_max)
+            if give_up:
+                metrics.incr("server32.gave_up")
+                self._stop.set()
+            else:
+                self._ensure_health_thread()
+            ready.set_exception(e)
+            return
+        with self._lock:
+            stopped = self._stop.is_set()
+            if not stopped:
+                self._client = client
+                self._failures = 0
+            self._spawning = False
+            self._backoff = self.backoff_initial
+        if stopped: # Se dejó de supervisar mientras arrancaba: no dejar el proceso huérfano
+            try:
+                client.shutdown_server32()
+            except Exception:
+                pass
+            ready.set_exception(RuntimeError("El servidor 32-bit ya no se supervisa."))
+            return
+        self._ensure_health_thread()
+        ready.set_result(client)
+
+    def current_client(self) -> Optional[GiniClient64]:
+        """El cliente actual si está listo (sin lanzarlo ni esperar)."""
+        return self._client
+
+    def get_client(self, timeout: Optional[float] = CLIENT_START_TIMEOUT) -> Optional[GiniClient64]:
+        """Devuelve el cliente, esperando (como mucho 'timeout') a que esté listo. None si falla."""
+        ready = self.start()
+        try:
+            return ready.result(timeout=timeout)
+        except Exception as e:
+            log.warning("GiniClient64 no disponible: %s: %s", type(e).__name__, e)
+            return None
+
+    def report_failure(self, client: GiniClient64, error: BaseException) -> None:
+        """
+        Llamado cuando una petición falla. Un Server32Error puede ser solo un error de la
+        función C: se confirma con un ping antes de relanzar. Cualquier otro error
+        (conexión, socket cerrado) descarta el cliente directamente.
+        """
+        if isinstance(error, Server32Error) and self._ping(client):
+            return
+        self._discard(client, f"{type(error).__name__}: {error}")
+        self.start()
+
+    def _ping(self, client: GiniClient64) -> bool:
+        try:
+            return client.ping_server()
+        except Exception:
+            return False
+
+    def _discard(self, client: GiniClient64, reason: str) -> None:
+        with self._lock:
+            if self._client is not client:
+                return # Ya fue reemplazado por otro hilo
+            self._client = None
+            self._ready = Future()
+        metrics.incr("server32.restarts")
+        log.warning("Servidor 32-bit caído (%s). Se relanzará.", reason)
+        try:
+            client.shutdown_server32()
+        except Exception:
+            pass # El proceso puede estar ya muerto
+
+    def _ensure_health_thread(self) -> None:
+        with self._lock:
+            if self._health_thread is None and not self._stop.is_set():
+                self._health_thread = threading.Thread(target=self._health_loop, name="GiniClient64-health", daemon=True)
+                self._health_thread.start()
+
+    def _health_loop(self) -> None:
+        """Ping periódico al servidor; si no hay cliente, reintenta al vencer el backoff."""
+        while True:
+            with self._lock:
+                client = self._client
+                wait = self.health_interval if client is not None else max(0.1, self._next_attempt - time.monotonic())
+            if self._stop.wait(wait):
+                return
+            with self._lock:
+                client = self._client
+            if client is None:
+                self.start()
+            elif not self._ping(client):
+                self._discard(client, "sin respuesta al ping")
+                self.start()
+
+    def shutdown(self) -> None:
+        """Detiene los pings y cierra el servidor 32-bit."""
+        self._stop.set()
+        with self._lock:
+            client, self._client = self._client, None
+        if client is not None:
+            try:
+                client.shutdown_server32()
+            except Exception:
+                pass
+
+class Server32Pool:
+    """
+    Pool de N procesos Server32, cada uno con su supervisor. Las peticiones van al
+    proceso listo con menos peticiones en curso (a igualdad, en round-robin), así N
+    llamadas concurrentes corren en N procesos en paralelo. Si un proceso muere en
+    medio de una llamada, su supervisor lo relanza y la llamada se reintenta una vez
+    en otro proceso. Es seguro usarlo desde varios hilos.
+    """
+    def __init__(self, size: int = SERVER32_POOL_SIZE):
+        self.workers = [GiniClientSupervisor() for _ in range(max(1, size))]
+        self._outstanding = [0] * len(self.workers)
+        self._next = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def __len__(self) -> int:
+        return len(self.workers)
+
+    def start(self) -> List[Future]:
+        """Lanza en segundo plano todos los procesos que no estén corriendo."""
+        return [worker.start() for worker in self.workers]
+
+    def get_any_client(self, timeout: Optional[float] = CLIENT_START_TIMEOUT) -> Optional[GiniClient64]:
+        """Lanza el pool y devuelve el primer cliente que quede listo (None si ninguno arranca)."""
+        pending = set(self.start())
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+        log.error("Ningún proceso del pool Server32 pudo iniciarse.")
+        return None
+
+    def _acquire(self) -> tuple[int, Optional[GiniClient64]]:
+        """Elige un proceso (menos peticiones en curso) y lo marca como ocupado."""
+        count = len(self.workers)
+        with self._lock:
+            ready = [i for i, worker in enumerate(self.workers) if worker.current_client() is not None]
+            candidates = ready or list(range(count))
+            index = min(candidates, key=lambda i: (self._outstanding[i], (i - self._next) % count))
+            self._next = (index + 1) % count
+            self._outstanding[index] += 1
+            client = self.workers[index].current_client()
+        return index, client
+
+    def _release(self, index: int) -> None:
+        with self._lock:
+            self._outstanding[index] -= 1
+
+    def call(self, method_name: str, *args):
+        """Ejecuta un método de GiniClient64 en el proceso menos ocupado."""
+        for attempt in range(2):
+            index, client = self._acquire()
+            try:
+                if client is None:
+                    client = self.workers[index].get_client() # Ninguno listo: espera a éste
+                    if client is None:
+                        raise RuntimeError("El cliente 64-bit no está disponible.")
+                try:
+                    return getattr(client, method_name)(*args)
+                except Exception as e:
+                    self.workers[index].report_failure(client, e)
+                    # Un Server32Error es un error de la propia llamada: reintentar no sirve
+                    if isinstance(e, Server32Error) or attempt == 1:
+                        raise
+                    metrics.incr("server32.retries")
+                    log.warning("Reintentando '%s' en otro proceso del pool.", method_name)
+            finally:
+                self._release(index)
+
+    def map_batch(self, gini_values: Sequence[float]) -> List[int]:
+        """Redondea un lote; si es grande lo reparte entre todos los procesos en paralelo."""
+        count = len(self.workers)
+        if count == 1 or len(gini_values) < SERVER32_SPLIT_THRESHOLD:
+            return self.call('process_gini_batch_on_server', gini_values)
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=count, thread_name_prefix="Server32Pool")
+        step = -(-len(gini_values) // count)
+        chunks = [gini_values[i:i + step] for i in range(0, len(gini_values), step)]
+        results: List[int] = []
+        for chunk_result in self._executor.map(lambda chunk: self.call('process_gini_batch_on_server', chunk), chunks):
+            results.extend(chunk_result)
+        return results
+
+    def server_metrics(self) -> List[Optional[Dict[str, Any]]]:
+        """Métricas de cada proceso del pool (None si no está corriendo). No lanza procesos."""
+        snapshots: List[Optional[Dict[str, Any]]] = []
+        for worker in self.workers:
+            client = worker.current_client()
+            try:
+                snapshots.append(client.server_metrics() if client is not None else None)
+            except Exception as e:
+                log.warning("No se pudieron leer las métricas del Server32: %s: %s", type(e).__name__, e)
+                snapshots.append(None)
+        return snapshots
+
+    def shutdown(self) -> None:
+        for worker in self.workers:
+            worker.shutdown()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+# Pool global de procesos Server32 (los procesos se crean bajo demanda o con prewarm)
+_server32_pool = Server32Pool(SERVER32_POOL_SIZE)
+
+def shutdown_server32_pool() -> None:
+    """Cierra los procesos Server32 que estén corriendo (para procesos por lotes que terminan)."""
+    _server32_pool.shutdown()
+
+def _get_client() -> Optional[GiniClient64]:
+    """Obtiene un cliente GiniClient64 listo del pool (lanza el pool si hace falta)."""
+    return _server32_pool.get_any_client()
+
+# --- Backends de Procesamiento Nativo ---
+# Tres formas de hacer el mismo redondeo, en orden de preferencia:
+#   1. 'inprocess': libginiprocessor64.so cargada con ctypes en este mismo proceso (microsegundos).
+#   2. 'server32' : la biblioteca 32-bit a través de Client64 -> Server32 (milisegundos, subproceso).
+#   3. 'python'   : implementación de referencia en Python puro (siempre disponible).
+# GINI_NATIVE_BACKEND fuerza uno en particular; vacío = el más rápido que funcione.
+LIB64_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib', 'libginiprocessor64.so'))
+NATIVE_BACKEND = os.environ.get("GINI_NATIVE_BACKEND", "")
+INT32_INDEFINITE = -2**31  # Lo que devuelven FISTP/CVTPS2DQ para NaN o fuera de rango
+
+class NativeBackend(ABC):
+    """Interfaz común de los backends de redondeo (un backend incompleto falla al crearse)."""
+    key = ""
+    name = ""
+
+    @abstractmethod
+    def is_available(self) -> bool: ...
+
+    @abstractmethod
+    def round_value(self, gini_value: float) -> int: ...
+
+    @abstractmethod
+    def round_batch(self, gini_values: Sequence[float]) -> List[int]: ...
+
+class InProcessBackend(NativeBackend):
+    """C/ASM 64-bit cargado con ctypes: sin subproceso, sin sockets, sin pickle."""
+    key = "inprocess"
+    name = "C/ASM en proceso (ctypes, 64-bit)"
+
+    def __init__(self, library_path: str = LIB64_PATH):
+        self.library_path = library_path
+        self._lib = None
+        self._checked = False
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        with self._lock:
+            if not self._checked:
+                self._checked = True
+                if _python_arch() != '64bit':
+                    log.info("Backend '%s': no disponible (Python no es 64-bit).", self.key)
+                elif not os.path.exists(self.library_path):
+                    log.info("Backend '%s': no disponible ('%s' no existe, ejecuta './build.sh').", self.key, self.library_path)
+                else:
+                    try:
+                        lib = ctypes.CDLL(self.library_path)
+                        lib.process_gini_float.argtypes = [ctypes.c_float]
+                        lib.process_gini_float.restype = ctypes.c_int
+                        lib.process_gini_batch.argtypes = [ctypes.POINTER(ctypes.c_float), ctypes.POINTER(ctypes.c_int), ctypes.c_int]
+                        lib.process_gini_batch.restype = ctypes.c_int
+                        self._lib = lib
+                        log.info("Backend '%s': disponible (%s).", self.key, self.library_path)
+                    except (OSError, AttributeError) as e:
+                        log.warning("Backend '%s': no disponible (%s: %s).", self.key, type(e).__name__, e)
+        return self._lib is not None
+
+    def round_value(self, gini_value: float) -> int:
+        return self._lib.process_gini_float(gini_value)
+
+    def round_batch(self, gini_values: Sequence[float]) -> List[int]:
+        inputs = array('f', gini_values)
+        count = len(inputs)
+        if count == 0:
+            return []
+        outputs = array('i', bytes(inputs.itemsize * count))
+        # Los arrays de Python se pasan a C sin copiar (from_buffer comparte la memoria)
+        processed = self._lib.process_gini_batch((ctypes.c_float * count).from_buffer(inputs),
+                                                 (ctypes.c_int * count).from_buffer(outputs), count)
+        if processed != count:
+            raise RuntimeError(f"process_gini_batch procesó {processed} de {count} valores.")
+        return outputs.tolist()
+
+class Server32Backend(NativeBackend):
+    """La biblioteca 32-bit original, a través del pool GiniClient64 -> GiniProcessorServer."""
+    key = "server32"
+    name = "C/ASM vía Server32 (msl-loadlib, 32-bit)"
+
+    def is_available(self) -> bool:
+        # Prueba con un timeout corto: la selección del backend no debe quedar bloqueada un minuto
+        available = server32_supported() and _server32_pool.get_any_client(timeout=CLIENT_PROBE_TIMEOUT) is not None
+        log.info("Backend '%s': %s.", self.key, 'disponible' if available else 'no disponible')
+        if not available and server32_supported():
+            # Descartado: se deja de supervisar (si no, el hilo de salud relanzaría el proceso para siempre)
+            _server32_pool.shutdown()
+        return available
+
+    def round_value(self, gini_value: float) -> int:
+        return _server32_pool.call('process_gini_float_on_server', gini_value)
+
+    def round_batch(self, gini_values: Sequence[float]) -> List[int]:
+        return _server32_pool.map_batch(gini_values)
+
+class PythonBackend(NativeBackend):
+    """
+    Referencia en Python puro con la misma semántica que el ASM: el valor se pasa
+    primero a float32, se redondea al par más cercano y NaN/Inf/fuera de rango da INT32_INDEFINITE.
+    """
+    key = "python"
+    name = "Python puro (referencia)"
+
+    def is_available(self) -> bool:
+        return True
+
+    @staticmethod
+    def _round_float32(value: float) -> int:
+        if math.isnan(value) or math.isinf(value):
+            return INT32_INDEFINITE
+        rounded = round(value) # round() de Python redondea .5 al par, como la FPU/SSE
+        if rounded < -2**31 or rounded > 2**31 - 1:
+            return INT32_INDEFINITE
+        return rounded
+
+    def round_value(self, gini_value: float) -> int:
+        return self._round_float32(array('f', [gini_value])[0])
+
+    def round_batch(self, gini_values: Sequence[float]) -> List[int]:
+        return [self._round_float32(value) for value in array('f', gini_values)]
+
+_NATIVE_BACKENDS: List[NativeBackend] = [InProcessBackend(), Server32Backend(), PythonBackend()]
+_native_backend_instance: Optional[NativeBackend] = None
+_native_backend_lock = threading.Lock()
+_prewarm_future: Optional[Future] = None
+_prewarm_lock = threading.Lock()
+
+def get_native_backend() -> NativeBackend:
+    """
+    Devuelve el backend a usar, elegido una sola vez: el forzado por GINI_NATIVE_BACKEND
+    si está disponible, o si no el primero disponible en orden de preferencia.
+    Los backends se prueban en orden, así el Server32 solo se lanza si hace falta.
+    """
+    global _native_backend_instance
+    with _native_backend_lock:
+        if _native_backend_instance is None:
+            candidates = _NATIVE_BACKENDS
+            if NATIVE_BACKEND:
+                forced = [b for b in _NATIVE_BACKENDS if b.key == NATIVE_BACKEND]
+                if not forced:
+                    log.warning("GINI_NATIVE_BACKEND='%s' desconocido. Usando selección automática.", NATIVE_BACKEND)
+                candidates = forced + [b for b in _NATIVE_BACKENDS if b not in forced]
+            _native_backend_instance = next(b for b in candidates if b.is_available())
+            log.info("Backend nativo seleccionado: %s", _native_backend_instance.name)
+        return _native_backend_instance
+
+def prewarm_native_backend() -> Future:
+    """
+    Elige el backend nativo en un hilo de fondo (lanzando el Server32 si es el elegido),
+    para que la primera llamada no pague el arranque. Devuelve un Future con el backend.
+    """
+    global _prewarm_future
+    with _prewarm_lock:
+        if _prewarm_future is None:
+            future: Future = Future()
+            def run():
+                try:
+                    future.set_result(get_native_backend())
+                except Exception as e:
+                    future.set_exception(e)
+            threading.Thread(target=run, name="NativeBackend-prewarm", daemon=True).start()
+            _prewarm_future = future
+        return _prewarm_future
+
+def probe_native_backends() -> Dict[str, bool]:
+    """Informa la disponibilidad de todos los backends (ojo: lanza el Server32 para probarlo)."""
+    return {backend.key: backend.is_available() for backend in _NATIVE_BACKENDS}
 
 # --- Función Principal de Procesamiento con C/ASM ---
 def process_gini_with_c_asm(gini_value: float) -> Optional[int]:
     """
-    Orquesta la llamada a la función C/ASM a través del puente msl-loadlib.
+    Redondea el valor con el backend nativo seleccionado (ver get_native_backend).
 
     Args:
         gini_value: El valor GINI float a procesar.
@@ -82,159 +725,929 @@ def process_gini_with_c_asm(gini_value: float) -> Optional[int]:
     Returns:
         El resultado entero del procesamiento C/ASM, o None si ocurre un error.
     """
-    client = _get_client()
-    if client is None:
-        print("[CoreLogic] No se puede procesar con C/ASM: El cliente 64-bit no está disponible.", file=sys.stderr)
-        return None
-
+    backend = get_native_backend()
     try:
-        # Llama al método definido en GiniClient64
-        result = client.process_gini_float_on_server(gini_value)
-        print(f"[CoreLogic] Resultado recibido del servidor 32-bit: {result}", file=sys.stderr)
+        with metrics.timer(f"native.{backend.key}.round_value"):
+            result = backend.round_value(gini_value)
+        if DEBUG_ENABLED:
+            log.debug(f"Resultado de '{backend.key}': {result}")
         return result
     except Server32Error as e:
         # Error específico del proceso del servidor 32-bit
-        print(f"[CoreLogic] Error recibido del servidor 32-bit: {e}", file=sys.stderr)
+        metrics.incr("native.errors")
+        log.error("Error recibido del servidor 32-bit: %s", e)
+        return None
+    except Exception as e:
+        # Otros errores (conexión, biblioteca, etc.)
+        metrics.incr("native.errors")
+        log.error("Error en el backend '%s': %s: %s", backend.key, type(e).__name__, e)
+        return None
+
+def process_gini_batch_with_c_asm(gini_values: Sequence[float]) -> Optional[List[int]]:
+    """
+    Versión por lotes de process_gini_with_c_asm: redondea todos los valores
+    con una sola llamada al backend (una sola llamada C/ASM SIMD).
+
+    Args:
+        gini_values: Secuencia de valores GINI float a procesar.
+
+    Returns:
+        Lista de enteros (mismo orden que la entrada), o None si ocurre un error.
+    """
+    if not gini_values:
+        return []
+
+    backend = get_native_backend()
+    try:
+        with metrics.timer(f"native.{backend.key}.round_batch"):
+            results = backend.round_batch(gini_values)
+        if DEBUG_ENABLED:
+            log.debug(f"Lote de {len(results)} resultados de '{backend.key}'.")
+        return results
+    except Server32Error as e:
+        metrics.incr("native.errors")
+        log.error("Error recibido del servidor 32-bit: %s", e)
         return None
     except Exception as e:
-        # Otros errores (conexión, etc.)
-        print(f"[CoreLogic] Error durante la comunicación con el servidor 32-bit: {type(e).__name__}: {e}", file=sys.stderr)
+        metrics.incr("native.errors")
+        log.error("Error en el backend '%s': %s: %s", backend.key, type(e).__name__, e)
         return None
 
-# --- Obtención de Datos de la API (sin cambios respecto al original) ---
-def get_gini_data(country_code: str) -> tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+# --- Caché Persistente ---
+def _get_cache() -> Optional[GiniCache]:
+    """Obtiene o crea la instancia singleton de la caché (None si está deshabilitada)."""
+    global _gini_cache_instance
+    if _gini_cache_instance is None and CACHE_PATH:
+        _gini_cache_instance = GiniCache(CACHE_PATH, ttl_seconds=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES)
+    return _gini_cache_instance
+
+# --- Base Offline (mmap) ---
+def _get_bulk_store() -> Optional[BulkGiniStore]:
+    """Abre la base offline una sola vez. Devuelve None si no hay archivo o no es válido."""
+    global _bulk_store_instance
+    if _bulk_store_instance is None:
+        # Bajo el lock: otro hilo que llegue mientras se abre espera la base, no sigue sin ella
+        with _bulk_store_lock:
+            if _bulk_store_instance is None:
+                store = False
+                if BULK_STORE_PATH and os.path.exists(BULK_STORE_PATH):
+                    try:
+                        store = BulkGiniStore(BULK_STORE_PATH, indicator=INDICATOR)
+                        log.info("Base offline cargada: %s (%d países).", BULK_STORE_PATH, len(store.countries))
+                    except (OSError, ValueError) as e:
+                        log.warning("No se pudo abrir la base offline '%s': %s", BULK_STORE_PATH, e)
+                _bulk_store_instance = store
+    return _bulk_store_instance or None
+
+def get_gini_data(country_code: str, use_cache: bool = True,
+                  force_refresh: bool = False) -> tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
     """
-    Obtiene datos del índice GINI desde la API del Banco Mundial.
+    Obtiene datos del índice GINI: primero de la base offline (si fue importada y contiene
+    el país), luego de la caché persistente y si no desde la API.
     Devuelve (lista_de_registros, None) en éxito, o (None, mensaje_de_error) en fallo.
     Una lista vacía [] significa que no hay datos para el país/periodo.
+    Una entrada vencida (o cualquiera, con force_refresh) se actualiza de forma incremental
+    (ver refresh_cached_entry). Si la API falla (o tarda demasiado) se devuelve la copia vencida.
+    Un código que no figura en el índice de países se rechaza sin consultar la API.
     """
-    url = f"{BASE_URL}/{country_code}/indicator/{INDICATOR}"
-    params = {"format": "json", "date": DATE_RANGE, "per_page": PER_PAGE}
-    print(f"[CoreLogic] Solicitando URL: {url} con params: {params}", file=sys.stderr)
-    error_message = None
+    error_message = validate_country_code(country_code)
+    if error_message is not None:
+        return None, error_message
+    bulk_store = _get_bulk_store()
+    if bulk_store is not None and country_code in bulk_store:
+        metrics.incr("bulk.hits")
+        return bulk_store.get_gini_data(country_code, DATE_RANGE)
+
+    cache = _get_cache() if use_cache else None
+    entry = cache.get_entry(country_code, INDICATOR, DATE_RANGE) if cache is not None else None
+    if entry is not None and not force_refresh and cache.is_fresh(entry):
+        metrics.incr("cache.hits")
+        if DEBUG_ENABLED:
+            log.debug(f"Datos de {country_code} servidos desde caché.")
+        return entry.records, None
+    if cache is not None:
+        metrics.incr("cache.misses")
+
+    # Con una copia vencida como respaldo no vale la pena esperar el timeout completo
+    timeout = STALE_REQUEST_TIMEOUT if entry is not None else REQUEST_TIMEOUT
+
+    with metrics.timer("fetch.total"):
+        if entry is not None:
+            records, error_message = refresh_cached_entry(country_code, entry, cache, timeout)
+        else:
+            info: Dict[str, Any] = {}
+            records, error_message = _fetch_gini_data_from_api(country_code, timeout=timeout, response_info=info)
+            if cache is not None and error_message is None and records is not None:
+                cache.put(country_code, INDICATOR, DATE_RANGE, records, newest_year=newest_valid_year(records),
+                          etag=info.get("etag"), last_modified=info.get("last_modified"), validated_range=DATE_RANGE)
+    if error_message is not None and entry is not None:
+        metrics.incr("cache.stale_served")
+        log.warning("API no disponible (%r). Usando copia vencida de %s.", error_message, country_code)
+        return entry.records, None
+    return records, error_message
+
+def validate_country_code(country_code: str) -> Optional[str]:
+    """Mensaje de error si el código no está en el índice local de países; None si es válido (o no se valida)."""
+    index = get_country_index() if VALIDATE_COUNTRIES else None
+    if index is None or country_code in index:
+        return None
+    metrics.incr("country_index.rejected")
+    return index.unknown_message([country_code.strip()])
+
+def refresh_country_index(timeout: float = REQUEST_TIMEOUT) -> tuple[Optional[int], Optional[str]]:
+    """
+    Descarga la lista de economías y agregados (/v2/country) y reemplaza el índice local
+    (queda guardado para los próximos arranques, ver country_index.INDEX_PATH).
+    Devuelve (cantidad_de_países, None) en éxito, o (None, mensaje_de_error) en fallo.
+    """
+    def attempt(attempt_timeout: float):
+        records, page = [], 1
+        while True:
+            params = {"format": "json", "per_page": COUNTRY_LIST_PER_PAGE, "page": str(page)}
+            page_info: Dict[str, Any] = {}
+            records.extend(_iter_page_records(BASE_URL, params, "(lista de países)", attempt_timeout, page_info))
+            try:
+                total_pages = int(page_info.get("pages") or 1)
+            except (TypeError, ValueError):
+                total_pages = 1
+            if page >= total_pages:
+                return records
+            page += 1
+
     try:
-        response = requests.get(url, params=params, timeout=15) # Timeout de 15s
-        print(f"[CoreLogic] Código de estado HTTP: {response.status_code}", file=sys.stderr)
-
-        # Verifica si la respuesta es JSON antes de decodificar
-        content_type = response.headers.get('Content-Type', '')
-        if 'application/json' not in content_type:
-            error_detail = f"La API no devolvió JSON. Content-Type: {content_type}. Respuesta: {response.text[:200]}..."
-            print(f"Error: {error_detail}", file=sys.stderr)
-            # Intenta dar un mensaje más útil basado en errores comunes de la API
-            if response.text and 'Invalid format' in response.text: error_message = "Error API Banco Mundial: Formato inválido o recurso no encontrado."
-            elif response.text and 'Invalid value' in response.text: error_message = f"Error API Banco Mundial: ¿Código de país inválido '{country_code}'?"
-            else: error_message = "Respuesta no JSON recibida del servidor."
-            return None, error_message
-
-        response.raise_for_status() # Lanza HTTPError para códigos 4xx/5xx
-
-        data = response.json()
-
-        # --- Análisis de la respuesta JSON ---
-        # Formato esperado: [[{paginación}], [{datos}]] o a veces [{mensaje de error}]
-        if not isinstance(data, list) or len(data) < 1:
-            error_message = "Formato de respuesta inesperado (no es lista o está vacía)."
-            print(f"Error: {error_message} Respuesta: {data}", file=sys.stderr)
-            return None, error_message
-
-        # Chequeo de mensaje de error explícito de la API
-        if isinstance(data[0], dict) and "message" in data[0]:
-            error_messages = [msg.get("value", "Error desconocido") for msg in data[0]["message"]]
-            error_text = "\n".join(error_messages)
-            print(f"Error de la API del Banco Mundial: {error_text}", file=sys.stderr)
-            # Si el error es "sin datos", devolvemos lista vacía (no es un error fatal)
-            if any("No data available" in msg for msg in error_messages) or \
-               any("No matches" in msg for msg in error_messages):
-                return [], None # No hay datos, pero la consulta fue válida
+        records = _get_resilience().call(attempt, budget=timeout)
+    except CircuitOpenError as e:
+        return None, f"La API del Banco Mundial no está respondiendo.\nNuevo intento en {e.retry_in:.0f} s."
+    except GiniAPIError as e:
+        return None, str(e)
+    countries = countries_from_api(records)
+    if not countries:
+        return None, "La API no devolvió ninguna economía: se conserva el índice actual."
+    try:
+        set_country_index(countries)
+    except OSError as e: # El índice en memoria se reemplazó igual: solo no quedó guardado
+        log.warning("No se pudo guardar el índice de países: %s", e)
+    log.info("Índice de países actualizado desde la API (%d códigos).", len(countries))
+    return len(countries), None
+
+def cached_gini_data(country_code: str, memory_only: bool = False) -> Optional[List[Dict[str, Any]]]:
+    """
+    Registros vigentes del país sin consultar la API: de la base offline o de la caché (solo la
+    de memoria si memory_only, así la llamada nunca toca el disco). None si habría que pedirlos.
+    """
+    country_code = country_code.upper()
+    bulk_store = _get_bulk_store()
+    if bulk_store is not None and country_code in bulk_store:
+        records, _ = bulk_store.get_gini_data(country_code, DATE_RANGE)
+        return records
+    cache = _get_cache()
+    if cache is None:
+        return None
+    if memory_only:
+        return cache.peek(country_code, INDICATOR, DATE_RANGE)
+    return cache.get(country_code, INDICATOR, DATE_RANGE)
+
+def cached_country_codes() -> List[str]:
+    """Países con entrada en la caché para el indicador y DATE_RANGE actuales (p. ej. para revalidarlos)."""
+    cache = _get_cache()
+    return cache.cached_countries(INDICATOR, DATE_RANGE) if cache is not None else []
+
+def newest_valid_year(records: Iterable[Dict[str, Any]]) -> Optional[int]:
+    """Año más reciente con valor en los registros (None si no hay ninguno)."""
+    newest = None
+    for record in records:
+        if not isinstance(record, dict) or record.get('value') is None:
+            continue
+        try:
+            year = int(record.get('date'))
+        except (TypeError, ValueError):
+            continue
+        if newest is None or year > newest:
+            newest = year
+    return newest
+
+def _refresh_date_range(entry: CacheEntry) -> str:
+    """
+    Rango a pedir para actualizar la entrada: desde su último año con valor (inclusive, por si
+    se corrigió) hasta el final de DATE_RANGE; el rango completo si toca descarga completa.
+    """
+    if not INCREMENTAL_REFRESH or entry.newest_year is None or \
+       time.time() - entry.full_fetched_at >= FULL_REFRESH_SECONDS:
+        return DATE_RANGE
+    try:
+        start, end = (int(part) for part in DATE_RANGE.split(":"))
+    except ValueError:
+        return DATE_RANGE
+    return f"{min(max(start, entry.newest_year), end)}:{end}"
+
+def merge_gini_records(records: List[Dict[str, Any]], delta: List[Dict[str, Any]],
+                       delta_range: str) -> List[Dict[str, Any]]:
+    """
+    Reemplaza en 'records' los años de 'delta_range' por los de 'delta' (la API devuelve todos los
+    años del rango, con o sin valor) y deja el resultado ordenado como la API: año descendente.
+    """
+    start, end = (int(part) for part in delta_range.split(":"))
+    def year_of(record: Dict[str, Any]) -> int:
+        try:
+            return int(record.get('date'))
+        except (TypeError, ValueError):
+            return -1
+    kept = [record for record in records if not start <= year_of(record) <= end]
+    return sorted(kept + list(delta), key=year_of, reverse=True)
+
+def refresh_cached_entry(country_code: str, entry: CacheEntry, cache: GiniCache,
+                         timeout: float = REQUEST_TIMEOUT) -> tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """
+    Actualiza una entrada de la caché pidiendo solo el rango que puede haber cambiado (ver
+    _refresh_date_range), con los validadores HTTP si corresponden a ese mismo rango:
+      - 304 / sin cambios: se renueva el TTL y se devuelven los registros guardados.
+      - datos nuevos: se mezclan con los guardados (merge_gini_records) y se guardan.
+    Devuelve (registros, None) o (None, mensaje_de_error) como get_gini_data.
+    """
+    fetch_range = _refresh_date_range(entry)
+    full = fetch_range == DATE_RANGE
+    headers: Dict[str, str] = {}
+    if entry.validated_range == fetch_range: # Un ETag solo vale para la misma URL
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+
+    info: Dict[str, Any] = {}
+    delta, error_message = _fetch_gini_data_from_api(country_code, timeout=timeout, date_range=fetch_range,
+                                                     headers=headers or None, response_info=info)
+    if error_message is not None or delta is None:
+        return None, error_message
+    if info.get("not_modified") or (not full and not delta):
+        # Sin cambios (o "No data available" para el tramo nuevo: se conserva lo guardado)
+        metrics.incr("refresh.not_modified")
+        if DEBUG_ENABLED:
+            log.debug(f"{country_code}: sin cambios en {fetch_range}.")
+        cache.touch(country_code, INDICATOR, DATE_RANGE)
+        return entry.records, None
+
+    metrics.incr("refresh.full" if full else "refresh.incremental")
+    records = delta if full else merge_gini_records(entry.records, delta, fetch_range)
+    cache.put(country_code, INDICATOR, DATE_RANGE, records, newest_year=newest_valid_year(records),
+              etag=info.get("etag"), last_modified=info.get("last_modified"), validated_range=fetch_range,
+              full_fetched_at=None if full else entry.full_fetched_at)
+    return records, None
+
+def get_gini_data_many(country_codes: Iterable[str], max_workers: int = MAX_CONCURRENT_REQUESTS,
+                       use_cache: bool = True, force_refresh: bool = False) -> Dict[str, tuple[Optional[List[Dict[str, Any]]], Optional[str]]]:
+    """
+    Obtiene datos GINI de muchos países a la vez.
+    Los países que no están en caché se agrupan en consultas 'ARG;BRA;...' de hasta
+    MULTI_COUNTRY_CHUNK códigos, que se ejecutan en paralelo (como mucho max_workers)
+    sobre la sesión HTTP compartida. Si una consulta agrupada falla (por ejemplo, por un
+    código inválido) sus países se consultan de a uno para aislar el error. Los que tienen
+    una entrada vencida se actualizan de a uno, de forma incremental (ver get_gini_data).
+
+    Returns:
+        Diccionario código -> (registros, error), con el mismo contrato que get_gini_data
+        y en el mismo orden en que se pidieron los códigos (sin duplicados).
+    """
+    codes = list(dict.fromkeys(code.strip().upper() for code in country_codes if code and code.strip()))
+    results = {code: (records, error_message)
+               for code, records, error_message in iter_gini_data_many(codes, max_workers, use_cache, force_refresh)}
+    return {code: results[code] for code in codes}
+
+def iter_gini_data_many(country_codes: Iterable[str], max_workers: int = MAX_CONCURRENT_REQUESTS,
+                        use_cache: bool = True, force_refresh: bool = False) -> Iterator[tuple[str, Optional[List[Dict[str, Any]]], Optional[str]]]:
+    """
+    Versión en streaming de get_gini_data_many: consume los códigos a medida que los necesita
+    (sirve para listas enormes o stdin) y entrega (código, registros, error) apenas se resuelve
+    cada uno, en orden de finalización. Los aciertos de caché salen enseguida; el resto se agrupa
+    de a MULTI_COUNTRY_CHUNK y nunca hay más de max_workers grupos en vuelo.
+    """
+    cache = _get_cache() if use_cache else None
+    seen = set()
+    chunk: List[str] = []
+    in_flight = set()
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="GiniFetch")
+
+    def finished(block: bool):
+        """Entrega los resultados de los grupos terminados (esperando al menos uno si 'block')."""
+        nonlocal in_flight
+        done, in_flight = wait(in_flight, timeout=None if block else 0, return_when=FIRST_COMPLETED)
+        for future in done:
+            for code, (records, error_message) in future.result().items():
+                yield code, records, error_message
+
+    try:
+        for code in country_codes:
+            code = code.strip().upper() if code else ""
+            if not code or code in seen:
+                continue
+            seen.add(code)
+            error_message = validate_country_code(code) # Un código inválido arruinaría la consulta agrupada
+            if error_message is not None:
+                yield code, None, error_message
+                continue
+            cached_records = cache.get(code, INDICATOR, DATE_RANGE) if cache is not None and not force_refresh else None
+            if cached_records is not None:
+                metrics.incr("cache.hits")
+                yield code, cached_records, None
+                continue
+            chunk.append(code)
+            if len(chunk) >= MULTI_COUNTRY_CHUNK:
+                in_flight.add(executor.submit(_fetch_country_chunk, chunk, use_cache, force_refresh))
+                chunk = []
+                yield from finished(block=len(in_flight) >= max(1, max_workers))
+        if chunk:
+            in_flight.add(executor.submit(_fetch_country_chunk, chunk, use_cache, force_refresh))
+        while in_flight:
+            yield from finished(block=True)
+    finally:
+        # Si el consumidor abandona el generador, los grupos que no empezaron se descartan
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _fetch_country_chunk(codes: List[str], use_cache: bool,
+                         force_refresh: bool = False) -> Dict[str, tuple[Optional[List[Dict[str, Any]]], Optional[str]]]:
+    """
+    Consulta un grupo de países en una sola petición y reparte los registros por país.
+    Los que ya están en caché (vencidos) se actualizan de a uno: una petición condicional
+    de pocos años pesa menos que volver a bajar su rango completo en el grupo.
+    """
+    cache = _get_cache() if use_cache else None
+    if cache is not None:
+        cached = [code for code in codes if cache.get_entry(code, INDICATOR, DATE_RANGE) is not None]
+        if cached:
+            results = {code: get_gini_data(code, use_cache=True, force_refresh=force_refresh) for code in cached}
+            missing = [code for code in codes if code not in results]
+            if missing:
+                results.update(_fetch_country_chunk(missing, use_cache))
+            return results
+    if len(codes) == 1:
+        return {codes[0]: get_gini_data(codes[0], use_cache=use_cache)}
+
+    # Página a la medida del grupo: normalmente una sola página (si no, se pagina igual)
+    per_page = str(len(codes) * _date_range_year_count())
+    records, error_message = _fetch_gini_data_from_api(";".join(codes), per_page=per_page)
+    if error_message is not None or records is None:
+        log.warning("Consulta agrupada falló (%s). Consultando %d países de a uno.", error_message, len(codes))
+        return {code: get_gini_data(code, use_cache=use_cache) for code in codes}
+
+    grouped: Dict[str, List[Dict[str, Any]]] = {code: [] for code in codes}
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        # La API identifica al país por ISO3 ('countryiso3code') y por ISO2 ('country.id')
+        for key in (record.get('countryiso3code'), (record.get('country') or {}).get('id')):
+            if key and key.upper() in grouped:
+                grouped[key.upper()].append(record)
+                break
+
+    # La API devuelve una fila por año aunque no haya valor: un código sin ningún registro no se
+    # reconoció (o la respuesta vino incompleta). No se cachea vacío; se consulta de a uno.
+    unmatched = [code for code, country_records in grouped.items() if not country_records]
+    if unmatched:
+        log.warning("Sin registros para %s en la consulta agrupada. Consultando de a uno.", ", ".join(unmatched))
+    results: Dict[str, tuple[Optional[List[Dict[str, Any]]], Optional[str]]] = {}
+    for code, country_records in grouped.items():
+        if not country_records:
+            results[code] = get_gini_data(code, use_cache=use_cache)
+            continue
+        if cache is not None:
+            cache.put(code, INDICATOR, DATE_RANGE, country_records, newest_year=newest_valid_year(country_records))
+        results[code] = (country_records, None)
+    return results
+
+def _date_range_year_count() -> int:
+    """Cantidad de años cubiertos por DATE_RANGE ('2011:2020' -> 10)."""
+    try:
+        start, end = (int(part) for part in DATE_RANGE.split(":"))
+        return max(1, end - start + 1)
+    except ValueError:
+        return int(PER_PAGE)
+
+# --- Varios Indicadores ---
+def fetch_indicators(country_codes: Iterable[str], indicators: Iterable[str], store: Optional[IndicatorStore] = None,
+                     max_workers: int = MAX_CONCURRENT_REQUESTS, use_cache: bool = True,
+                     force_refresh: bool = False) -> tuple[IndicatorStore, Dict[Pair, str]]:
+    """
+    Obtiene varios indicadores para muchos países y los deja en un IndicatorStore (clave país,
+    indicador, año). Lo que está en caché (o en la base offline, para INDICATOR) no se pide; el
+    resto se agrupa por países que necesitan los mismos indicadores y se consulta en peticiones
+    'ARG;BRA;...' × 'IND1;IND2;...' de hasta MULTI_COUNTRY_CHUNK países y MULTI_INDICATOR_CHUNK
+    indicadores, en paralelo: 5 indicadores × 200 países son 10 peticiones en lugar de 1000.
+    Cada par (país, indicador) se guarda también en la caché, con la misma clave que get_gini_data.
+
+    Returns:
+        (store, errores): el almacén (el recibido o uno nuevo) y un diccionario
+        (país, indicador) -> mensaje de error para los pares que no se pudieron obtener.
+    """
+    store = store if store is not None else IndicatorStore()
+    indicators = list(dict.fromkeys(indicator.strip().upper() for indicator in indicators if indicator and indicator.strip()))
+    errors: Dict[Pair, str] = {}
+    cache = _get_cache() if use_cache else None
+    bulk_store = _get_bulk_store()
+    pending: Dict[tuple, List[str]] = {} # Indicadores que faltan -> países que los necesitan
+    for code in dict.fromkeys(code.strip().upper() for code in country_codes if code and code.strip()):
+        error_message = validate_country_code(code)
+        if error_message is not None:
+            errors.update({(code, indicator): error_message for indicator in indicators})
+            continue
+        missing = []
+        for indicator in indicators:
+            if indicator == INDICATOR and bulk_store is not None and code in bulk_store:
+                metrics.incr("bulk.hits")
+                store.add(code, indicator, bulk_store.get_gini_data(code, DATE_RANGE)[0] or [])
+                continue
+            records = cache.get(code, indicator, DATE_RANGE) if cache is not None and not force_refresh else None
+            if records is not None:
+                metrics.incr("cache.hits")
+                store.add(code, indicator, records)
+                continue
+            missing.append(indicator)
+        if missing:
+            pending.setdefault(tuple(missing), []).append(code)
+
+    jobs = [(codes[i:i + MULTI_COUNTRY_CHUNK], list(group[j:j + MULTI_INDICATOR_CHUNK]))
+            for group, codes in pending.items()
+            for i in range(0, len(codes), MULTI_COUNTRY_CHUNK)
+            for j in range(0, len(group), MULTI_INDICATOR_CHUNK)]
+    if jobs:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs))), thread_name_prefix="IndicatorFetch") as executor:
+            for chunk_errors in executor.map(lambda job: _fetch_indicator_chunk(job[0], job[1], store, cache), jobs):
+                errors.update(chunk_errors)
+    return store, errors
+
+def _fetch_indicator_chunk(codes: List[str], indicators: List[str], store: IndicatorStore,
+                           cache: Optional[GiniCache]) -> Dict[Pair, str]:
+    """
+    Una petición para un grupo de países × indicadores. Si falla (p. ej. un indicador que la API
+    no conoce invalida toda la consulta) se divide: primero de a un país, después de a un indicador,
+    para aislar el error. Un par que falla del todo se sirve desde su copia vencida si la hay.
+    """
+    per_page = str(len(codes) * len(indicators) * _date_range_year_count())
+    with metrics.timer("indicators.request"):
+        records, error_message = _fetch_gini_data_from_api(";".join(codes), per_page=per_page, indicator=";".join(indicators))
+    if error_message is not None or records is None:
+        if len(codes) > 1 or len(indicators) > 1:
+            log.warning("Consulta de %d países × %d indicadores falló (%s). Dividiendo la consulta.",
+                        len(codes), len(indicators), error_message)
+            if len(codes) > 1:
+                parts = [([code], indicators) for code in codes]
             else:
-                error_message = f"Error API Banco Mundial:\n{error_text}"
-                return None, error_message # Otro tipo de error
-
-        # Formato esperado: data[1] contiene la lista de registros
-        if len(data) == 2:
-            if data[1] is None: # A veces devuelve [pagination, null] si no hay datos
-                return [], None # No hay datos
-            if not isinstance(data[1], list):
-                error_message = f"Formato de datos inesperado (data[1] no es lista). Tipo: {type(data[1])}"
-                print(f"Error: {error_message}", file=sys.stderr)
-                return None, "Estructura de datos inesperada del servidor."
-            # Éxito: devuelve la lista de registros
-            return data[1], None
-        # Caso raro: a veces devuelve solo [{paginación}] si total=0
-        elif len(data) == 1 and isinstance(data[0], dict) and "total" in data[0] and data[0]["total"] == 0:
-            return [], None # No hay datos
-        else:
-            # Estructura no reconocida
-            print(f"Advertencia: Estructura de respuesta no manejada (longitud {len(data)}). Asumiendo sin datos.", file=sys.stderr)
-            return [], None
+                parts = [(codes, [indicator]) for indicator in indicators]
+            errors: Dict[Pair, str] = {}
+            for part_codes, part_indicators in parts:
+                errors.update(_fetch_indicator_chunk(part_codes, part_indicators, store, cache))
+            return errors
+        entry = cache.get_entry(codes[0], indicators[0], DATE_RANGE) if cache is not None else None
+        if entry is not None:
+            metrics.incr("cache.stale_served")
+            log.warning("API no disponible (%r). Usando copia vencida de %s / %s.", error_message, codes[0], indicators[0])
+            store.add(codes[0], indicators[0], entry.records)
+            return {}
+        return {(codes[0], indicators[0]): error_message or "Error desconocido"}
+
+    grouped = split_records(records, codes, indicators)
+    # Como en _fetch_country_chunk: un país sin ningún registro en la respuesta agrupada no se
+    # reconoció (o la respuesta vino incompleta). No se guarda vacío; se consulta solo.
+    matched = {code for (code, _), pair_records in grouped.items() if pair_records}
+    unmatched = [] if len(codes) == 1 else [code for code in codes if code.upper() not in matched]
+    if unmatched:
+        log.warning("Sin registros para %s en la consulta agrupada. Consultando de a uno.", ", ".join(unmatched))
+        grouped = {pair: pair_records for pair, pair_records in grouped.items() if pair[0] in matched}
+    store.add_grouped(grouped)
+    if cache is not None:
+        for (code, indicator), pair_records in grouped.items():
+            cache.put(code, indicator, DATE_RANGE, pair_records, newest_year=newest_valid_year(pair_records))
+    errors = {}
+    for code in unmatched:
+        errors.update(_fetch_indicator_chunk([code], indicators, store, cache))
+    return errors
+
+# --- Sesión HTTP Compartida ---
+def _get_session() -> "requests.Session":
+    """Obtiene o crea la sesión HTTP compartida, con un pool de conexiones por host."""
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                requests = _import_requests()
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=MAX_CONCURRENT_REQUESTS)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _http_session = session
+    return _http_session
+
+# --- Obtención de Datos de la API ---
+class GiniAPIError(Exception):
+    """
+    Error al consultar la API. El mensaje ya está redactado para mostrarlo al usuario.
+    'retryable' indica un error transitorio (timeout, conexión, 5xx, 429) que vale la pena reintentar;
+    'timed_out', que el intento se cortó por timeout (la política de resiliencia ajusta el suyo).
+    """
+    def __init__(self, message: str, retryable: bool = False, timed_out: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+        self.timed_out = timed_out
+
+def _get_resilience() -> ResiliencePolicy:
+    """Política de resiliencia compartida por todas las consultas a la API (se crea una sola vez)."""
+    global _resilience_instance
+    if _resilience_instance is None:
+        with _http_session_lock:
+            if _resilience_instance is None:
+                _resilience_instance = ResiliencePolicy(
+                    "WorldBankAPI", max_retries=HTTP_RETRIES, hedge=HTTP_HEDGE,
+                    breaker=CircuitBreaker("WorldBankAPI", HTTP_BREAKER_FAILURES, HTTP_BREAKER_RESET),
+                    default_timeout=REQUEST_TIMEOUT, max_workers=2 * MAX_CONCURRENT_REQUESTS)
+    return _resilience_instance
+
+def _fetch_gini_data_from_api(country_code: str, timeout: float = REQUEST_TIMEOUT,
+                              per_page: Optional[str] = None, date_range: Optional[str] = None,
+                              headers: Optional[Dict[str, str]] = None,
+                              response_info: Optional[Dict[str, Any]] = None,
+                              indicator: Optional[str] = None) -> tuple[Optional[List[Dict[str, Any]]], Optional[str]]:
+    """
+    Obtiene datos del índice GINI desde la API del Banco Mundial (sin caché), todas las páginas.
+    'country_code' puede ser un código o varios separados por ';' (forma multi-país de la API);
+    'indicator' (por defecto INDICATOR) también, con la forma multi-indicador.
+    Devuelve (lista_de_registros, None) en éxito, o (None, mensaje_de_error) en fallo.
+    Una lista vacía [] significa que no hay datos para el país/periodo (o que la respuesta
+    fue 304: ver 'not_modified' en response_info, ver iter_gini_records).
+    'timeout' es el tiempo total disponible: cada intento usa el timeout adaptativo de la
+    política de resiliencia (ver _get_resilience) y los reintentos no lo exceden.
+    """
+    # DATE_RANGE y PER_PAGE se leen acá (no como valores por defecto) para que coincidan con la clave de caché
+    date_range, per_page = date_range or DATE_RANGE, per_page or PER_PAGE
+
+    def attempt(attempt_timeout: float):
+        # Cada intento (y su posible cobertura) con su propio response_info: gana uno solo
+        info: Dict[str, Any] = {}
+        records = list(iter_gini_records(country_code, date_range=date_range, per_page=per_page,
+                                         timeout=attempt_timeout, headers=headers, response_info=info,
+                                         indicator=indicator))
+        return records, info
+
+    try:
+        records, info = _get_resilience().call(attempt, budget=timeout)
+    except CircuitOpenError as e:
+        log.warning("Consulta de %s omitida: %s", country_code, e)
+        return None, f"La API del Banco Mundial no está respondiendo.\nNuevo intento en {e.retry_in:.0f} s."
+    except GiniAPIError as e:
+        return None, str(e)
+    if response_info is not None:
+        response_info.update(info)
+    return records, None
+
+def iter_gini_records(country_code: str, date_range: str = DATE_RANGE, per_page: str = PER_PAGE,
+                      timeout: float = REQUEST_TIMEOUT, headers: Optional[Dict[str, str]] = None,
+                      response_info: Optional[Dict[str, Any]] = None,
+                      indicator: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Generador que recorre todas las páginas de la consulta (según 'pages' en data[0])
+    y entrega los registros a medida que se decodifican, sin armar la respuesta completa.
+    Sirve para rangos amplios (p. ej. '1960:2024') o consultas de todos los países sin
+    picos de memoria; find_latest_valid_gini puede consumirlo directamente.
+
+    'headers' (p. ej. If-None-Match / If-Modified-Since) se envían solo con la primera página.
+    En 'response_info' quedan 'etag' y 'last_modified' de esa página, y 'not_modified'=True
+    si respondió 304 (en ese caso no se entrega ningún registro).
+    'indicator' (por defecto INDICATOR) puede ser una lista 'A;B;C': se agrega 'source', que la
+    API exige para las consultas multi-indicador, y cada registro trae su 'indicator.id'.
+
+    Raises:
+        GiniAPIError: con un mensaje para el usuario si la consulta falla.
+    """
+    indicator = indicator or INDICATOR
+    url = f"{BASE_URL}/{country_code}/indicator/{indicator}"
+    page = 1
+    while True:
+        params = {"format": "json", "date": date_range, "per_page": per_page, "page": str(page)}
+        if ";" in indicator:
+            params["source"] = INDICATOR_SOURCE
+        page_info = {}
+        yield from _iter_page_records(url, params, country_code, timeout, page_info,
+                                      headers if page == 1 else None)
+        if page == 1 and response_info is not None:
+            for key in ("etag", "last_modified", "not_modified"):
+                if page_info.get(key) is not None:
+                    response_info[key] = page_info[key]
+        if page_info.get("not_modified"):
+            return
+        total_pages = page_info.get("pages") or 1
+        try:
+            total_pages = int(total_pages)
+        except (TypeError, ValueError):
+            total_pages = 1
+        if page >= total_pages:
+            return
+        page += 1
+
+def _iter_page_records(url: str, params: Dict[str, str], country_code: str, timeout: float,
+                       page_info: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Pide una página y entrega sus registros mientras llegan (JSON incremental).
+    Guarda los metadatos de paginación (data[0]) y los validadores HTTP en 'page_info'.
+    Traduce los errores de red/API a GiniAPIError con los mismos mensajes de siempre.
+    """
+    if DEBUG_ENABLED:
+        log.debug(f"Solicitando URL: {url} con params: {params} y encabezados: {headers}")
+    metrics.incr("http.requests")
+    requests = _import_requests()
+    try:
+        with _get_session().get(url, params=params, headers=headers, timeout=timeout, stream=True) as response:
+            # Envío -> encabezados recibidos. requests/urllib3 no exponen DNS y connect por
+            # separado: quedan incluidos acá cuando la conexión del pool es nueva.
+            metrics.observe("http.ttfb", response.elapsed.total_seconds())
+            if DEBUG_ENABLED:
+                log.debug(f"Código de estado HTTP: {response.status_code}")
+            page_info["etag"] = response.headers.get("ETag")
+            page_info["last_modified"] = response.headers.get("Last-Modified")
+            if response.status_code == 304: # Petición condicional: lo guardado sigue vigente
+                metrics.incr("http.not_modified")
+                page_info["not_modified"] = True
+                return
+
+            # Sobrecarga o caída del servidor (suele venir como HTML): error transitorio, antes del chequeo de JSON
+            if response.status_code >= 500 or response.status_code == 429:
+                response.raise_for_status()
+
+            # Verifica si la respuesta es JSON antes de decodificar
+            content_type = response.headers.get('Content-Type', '')
+            if 'application/json' not in content_type:
+                error_detail = f"La API no devolvió JSON. Content-Type: {content_type}. Respuesta: {response.text[:200]}..."
+                log.error(error_detail)
+                # Intenta dar un mensaje más útil basado en errores comunes de la API
+                if response.text and 'Invalid format' in response.text: error_message = "Error API Banco Mundial: Formato inválido o recurso no encontrado."
+                elif response.text and 'Invalid value' in response.text: error_message = f"Error API Banco Mundial: ¿Código de país inválido '{country_code}'?"
+                else: error_message = "Respuesta no JSON recibida del servidor."
+                raise GiniAPIError(error_message)
+
+            response.raise_for_status() # Lanza HTTPError para códigos 4xx/5xx
+
+            # --- Análisis incremental de la respuesta JSON ---
+            # Formato esperado: [{paginación}, [{datos}...]] o a veces [{mensaje de error}]
+            if response.encoding is None:
+                response.encoding = 'utf-8'
+            timings = _StreamTimings()
+            elements = _iter_worldbank_payload(timings.chunks(
+                response.iter_content(chunk_size=STREAM_CHUNK_SIZE, decode_unicode=True)))
+            header = timings.next(elements)
+            if not isinstance(header, dict):
+                error_message = "Formato de respuesta inesperado (no es lista o está vacía)."
+                log.error("%s Cabecera: %r", error_message, header)
+                raise GiniAPIError(error_message)
+
+            # Chequeo de mensaje de error explícito de la API
+            if "message" in header:
+                error_messages = [msg.get("value", "Error desconocido") for msg in header["message"]]
+                error_text = "\n".join(error_messages)
+                # Si el error es "sin datos", no hay registros (no es un error fatal)
+                if any("No data available" in msg for msg in error_messages) or \
+                   any("No matches" in msg for msg in error_messages):
+                    log.info("Sin datos para %s: %s", country_code, error_text)
+                    metrics.incr("http.no_data")
+                    timings.record()
+                    return
+                log.error("Error de la API del Banco Mundial: %s", error_text)
+                raise GiniAPIError(f"Error API Banco Mundial:\n{error_text}")
+
+            page_info.update(header)
+            # data[1] puede ser null o faltar (total=0): en ese caso no se entrega nada
+            while True:
+                record = timings.next(elements, _END_OF_STREAM)
+                if record is _END_OF_STREAM:
+                    break
+                yield record
+            timings.record()
 
     # --- Manejo de Excepciones de `requests` ---
     except requests.exceptions.HTTPError as e:
         error_message = f"Error HTTP: {e.response.status_code} {e.response.reason}"
-        print(f"Error: {error_message} para URL {e.request.url}", file=sys.stderr)
-        return None, error_message
+        metrics.incr("http.errors")
+        log.error("%s para URL %s", error_message, e.request.url)
+        raise GiniAPIError(error_message, retryable=e.response.status_code >= 500 or e.response.status_code == 429) from e
     except requests.exceptions.ConnectionError as e:
         error_message = "Error de conexión con la API del Banco Mundial.\nVerifica tu conexión a internet."
-        print(f"Error: {e}", file=sys.stderr)
-        return None, error_message
-    except requests.exceptions.Timeout:
+        metrics.incr("http.errors")
+        log.error("%s", e)
+        raise GiniAPIError(error_message, retryable=True) from e
+    except requests.exceptions.Timeout as e:
         error_message = "Timeout: La solicitud a la API del Banco Mundial tardó demasiado."
-        print("Error: Timeout", file=sys.stderr)
-        return None, error_message
+        metrics.incr("http.errors")
+        log.error("Timeout")
+        raise GiniAPIError(error_message, retryable=True, timed_out=True) from e
     except requests.exceptions.RequestException as e:
         error_message = f"Error en la solicitud: {e}"
-        print(f"Error: {error_message}", file=sys.stderr)
-        return None, error_message
-    except requests.exceptions.JSONDecodeError:
+        metrics.incr("http.errors")
+        log.error(error_message)
+        # Cuerpo cortado a mitad de la transferencia: transitorio, como un error de conexión
+        raise GiniAPIError(error_message, retryable=isinstance(e, requests.exceptions.ChunkedEncodingError)) from e
+    except ValueError as e: # JSON inválido o truncado (json.JSONDecodeError es ValueError)
         error_message = "Error al decodificar la respuesta del servidor (JSON inválido)."
-        print(f"Error: {error_message}", file=sys.stderr)
-        try: print(f"Texto recibido: {response.text[:500]}...", file=sys.stderr)
-        except NameError: pass # response puede no estar definida si falló antes
-        return None, error_message
+        metrics.incr("http.errors")
+        log.error("%s (%s)", error_message, e)
+        raise GiniAPIError(error_message) from e
+    except GiniAPIError:
+        metrics.incr("http.errors")
+        raise
     except Exception as e: # Captura genérica para errores inesperados
-        error_message = f"Error inesperado en get_gini_data: {type(e).__name__}"
-        print(f"Error: {error_message}: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc(file=sys.stderr)
+        error_message = f"Error inesperado en la consulta a la API: {type(e).__name__}"
+        metrics.incr("http.errors")
+        log.error("%s: %s", error_message, e, exc_info=True)
+        raise GiniAPIError(error_message) from e
+
+# --- Decodificación JSON Incremental ---
+_JSON_DECODER = json.JSONDecoder()
+_JSON_WHITESPACE = " \t\r\n"
+_END_OF_STREAM = object()
+
+class _StreamTimings:
+    """
+    Reparte el tiempo del cuerpo de una respuesta entre la espera de red (lectura de
+    fragmentos) y la decodificación JSON (el resto del tiempo dentro del decodificador).
+    El tiempo que el consumidor pasa con cada registro no se cuenta.
+    """
+    def __init__(self):
+        self.read = 0.0
+        self.total = 0.0
+
+    def chunks(self, chunks: Iterable[str]) -> Iterator[str]:
+        iterator = iter(chunks)
+        while True:
+            start = time.perf_counter()
+            chunk = next(iterator, None)
+            self.read += time.perf_counter() - start
+            if chunk is None:
+                return
+            yield chunk
+
+    def next(self, elements: Iterator[Any], default: Any = None) -> Any:
+        start = time.perf_counter()
+        try:
+            return next(elements, default)
+        finally:
+            self.total += time.perf_counter() - start
+
+    def record(self) -> None:
+        metrics.observe("http.body_read", self.read)
+        metrics.observe("http.json_decode", max(0.0, self.total - self.read))
+
+class _JsonStreamReader:
+    """
+    Lector mínimo sobre un flujo de fragmentos de texto JSON.
+    Decodifica un valor por vez con raw_decode, pidiendo más texto solo cuando hace falta,
+    así en memoria nunca hay más que el fragmento actual y el valor en curso.
+    """
+    def __init__(self, chunks: Iterable[str]):
+        self._chunks = iter(chunks)
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self) -> bool:
+        """Agrega el siguiente fragmento (descartando lo ya consumido). False si no hay más."""
+        for chunk in self._chunks:
+            if chunk:
+                self._buffer = self._buffer[self._pos:] + chunk
+                self._pos = 0
+                return True
+        self._eof = True
+        return False
+
+    def peek(self) -> str:
+        """Devuelve el próximo carácter no blanco sin consumirlo ('' al final del flujo)."""
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _JSON_WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON inesperado: se esperaba {char!r} y llegó {found!r}")
+        self._pos += 1
+
+    def value(self) -> Any:
+        """Decodifica el próximo valor JSON completo."""
+        self.peek()
+        while True:
+            try:
+                obj, end = _JSON_DECODER.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # Un escalar que termina justo al final del buffer puede estar cortado (p. ej. '12' de '123')
+            if end == len(self._buffer) and self._buffer[self._pos] not in '{["' and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return obj
+
+def _iter_worldbank_payload(chunks: Iterable[str]) -> Iterator[Any]:
+    """
+    Recorre una respuesta con forma [cabecera, [registro, ...]] entregando primero la
+    cabecera (paginación o mensaje de error) y luego cada registro por separado.
+    """
+    reader = _JsonStreamReader(chunks)
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+    yield reader.value()
+    if reader.peek() == ']':
+        return
+    reader.expect(',')
+    if reader.peek() != '[':
+        reader.value() # data[1] es null: no hay registros
+        return
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.value()
+        separator = reader.peek()
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ValueError(f"JSON inesperado: separador {separator!r} en la lista de registros")
+        reader.expect(',')
+
+# --- Procesamiento de Datos ---
+def get_gini_series(country_code: str, use_cache: bool = True) -> tuple[Optional[GiniSeries], Optional[str]]:
+    """
+    Igual que get_gini_data, pero devuelve la serie compacta (GiniSeries) en lugar de
+    la lista de diccionarios. Una serie vacía significa que no hay datos.
+    """
+    records, error_message = get_gini_data(country_code, use_cache=use_cache)
+    if error_message is not None or records is None:
         return None, error_message
+    return GiniSeries.from_records(records), None
 
-# --- Procesamiento de Datos (sin cambios respecto al original) ---
-def find_latest_valid_gini(records: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+def find_latest_valid_gini(records: Optional[Iterable[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
     """
     Encuentra el registro con el año más reciente que tenga un valor GINI válido.
+    Acepta una lista o cualquier iterable (p. ej. iter_gini_records) y lo recorre una sola vez,
+    sin ordenar ni armar una GiniSeries. Devuelve una copia del registro con 'country_name'
+    agregado (el original, que puede estar en la caché, no se modifica), o None si no hay ninguno.
+    Con una GiniSeries usa series.latest() (O(1)); como ahí no hay registro original, devuelve
+    uno con la forma de la API: 'country', 'countryiso3code', 'country_name', 'date' y 'value'.
     """
-    latest_valid_record = None
-    latest_year = -1
-
     if not records:
         return None
+    if isinstance(records, GiniSeries):
+        latest = records.latest()
+        if latest is None:
+            return None
+        return {
+            'country': {'id': latest.country_code, 'value': latest.country_name},
+            'countryiso3code': latest.country_code,
+            'country_name': latest.country_name,
+            'date': str(latest.year),
+            'value': latest.value,
+        }
 
+    latest_valid_record = None
+    latest_year = -1
     for record in records:
-        # Asegura que es un diccionario y tiene las claves esperadas
         if not isinstance(record, dict):
             continue
         value = record.get('value')
         date_str = record.get('date')
-
-        # Verifica que 'value' no sea None y 'date' exista
-        if value is not None and date_str:
-            try:
-                # Intenta convertir a float y año a int para validar y comparar
-                _ = float(value) # Verifica si es numérico
-                current_year = int(date_str)
-
-                if current_year > latest_year:
-                    latest_year = current_year
-                    # Añade el nombre del país al registro para facilidad de uso
-                    record['country_name'] = record.get('country', {}).get('value', 'N/A')
-                    latest_valid_record = record
-            except (ValueError, TypeError):
-                # Ignora registros con valor o fecha no válidos
-                # print(f"[CoreLogic] Advertencia: Saltando registro con formato inválido: {record}", file=sys.stderr)
+        if value is None or not date_str:
+            continue
+        try:
+            current_year = int(date_str)
+            if current_year <= latest_year or math.isnan(float(value)):
                 continue
+        except (ValueError, TypeError):
+            continue # Valor o fecha no válidos
+        latest_year = current_year
+        latest_valid_record = record
+    if latest_valid_record is None:
+        return None
+    return dict(latest_valid_record, country_name=(latest_valid_record.get('country') or {}).get('value', 'N/A'))
+
+# --- Métricas ---
+def get_metrics_snapshot(include_server32: bool = True) -> Dict[str, Any]:
+    """
+    Snapshot de la instrumentación: contadores y latencias de este proceso y, si se pide,
+    las de cada proceso Server32 que esté corriendo (no lanza ninguno para consultarlo).
+    """
+    snapshot = {"process": metrics.snapshot(),
+                "native_backend": _native_backend_instance.key if _native_backend_instance else None}
+    if _resilience_instance is not None:
+        snapshot["resilience"] = _resilience_instance.snapshot()
+    if include_server32:
+        snapshot["server32"] = _server32_pool.server_metrics()
+    return snapshot
 
-    return latest_valid_record
+def dump_metrics_json(path: Optional[str] = None, include_server32: bool = True) -> str:
+    """Devuelve el snapshot como JSON y, si se indica 'path', también lo escribe en ese archivo."""
+    text = json.dumps(get_metrics_snapshot(include_server32), indent=2)
+    if path:
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+    return text
 
 # --- Limpieza al salir (opcional pero buena práctica) ---
 # No usamos atexit aquí porque la GUI puede cerrarse de formas que no lo activan bien.
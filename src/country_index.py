@@ -0,0 +1,284 @@
+# src/country_index.py
+# Índice local de códigos de economías del Banco Mundial (ISO3, ISO2 y agregados como WLD o LCN).
+# Permite rechazar un código inválido sin ir a la red (antes costaba una petición completa hasta
+# ver el "Invalid value" de la API) y autocompletar el campo de la GUI por prefijo de código o
+# de nombre.
+# Fuente: la copia actualizada en DEFAULT_INDEX_PATH si existe (ver core_logic.refresh_country_index),
+# si no la instantánea incluida en el repositorio (country_snapshot.tsv).
+# Estructura: listas ordenadas de claves (códigos y nombres normalizados, más cada sufijo del
+# nombre que empieza en una palabra) con el país de cada clave en un array paralelo; una búsqueda
+# por prefijo es un bisect más el recorrido de las coincidencias.
+#
+# Uso: python src/country_index.py arg            (autocompleta)
+#      python src/country_index.py --check ARG XYZ
+#      python src/country_index.py --update       (descarga /v2/country y guarda la copia local)
+
+import argparse
+import os
+import sys
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Optional, List, Dict, Any, Iterable, NamedTuple
+
+from gini_metrics import get_logger, metrics
+
+log = get_logger("CountryIndex")
+
+# --- Configuración por defecto ---
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "country_snapshot.tsv")
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".cache", "tp2_gini", "countries.tsv")
+INDEX_PATH = os.environ.get("GINI_COUNTRY_INDEX", DEFAULT_INDEX_PATH) # "" = solo la instantánea incluida
+DEFAULT_LIMIT = 10              # Sugerencias por consulta
+AGGREGATE_REGION = "Aggregates" # region.value de los agregados en /v2/country
+
+_SNAPSHOT_HEADER = ("# Economías y agregados de la API del Banco Mundial (/v2/country), para country_index.py.\n"
+                    "# Se regenera con: python src/country_index.py --update\n"
+                    "# iso3\tiso2\tagregado\tnombre\n")
+
+
+class Country(NamedTuple):
+    """Una economía (o agregado) de la API."""
+    iso3: str
+    iso2: str
+    name: str
+    aggregate: bool
+
+
+def fold(text: str) -> str:
+    """Minúsculas y sin tildes: 'Côte' -> 'cote' (las claves de nombre se comparan así)."""
+    text = unicodedata.normalize("NFKD", text.strip().lower())
+    return "".join(char for char in text if not unicodedata.combining(char))
+
+
+def _word_starts(folded: str) -> Iterable[int]:
+    """Posiciones donde empieza cada palabra después de la primera ('korea, rep.' -> [7])."""
+    for i in range(1, len(folded)):
+        if folded[i].isalnum() and not folded[i - 1].isalnum():
+            yield i
+
+
+class CountryIndex:
+    """
+    Índice inmutable de países. lookup() y '__contains__' son un acceso a diccionario;
+    complete() ordena las coincidencias por: código exacto, prefijo de código, prefijo del
+    nombre y prefijo de otra palabra del nombre (las economías antes que los agregados).
+    """
+
+    def __init__(self, countries: Iterable[Country], loaded_at: float = 0.0):
+        self.countries: List[Country] = sorted(countries, key=lambda country: country.iso3)
+        self.loaded_at = loaded_at # mtime de la fuente: sirve para decidir si conviene actualizarla
+        self._by_code: Dict[str, int] = {}
+        code_keys, name_keys = [], []
+        self._folded: List[str] = []
+        for i, country in enumerate(self.countries):
+            for code in (country.iso3, country.iso2):
+                if code:
+                    self._by_code.setdefault(code.upper(), i)
+                    code_keys.append((code.lower(), i))
+            folded = fold(country.name)
+            self._folded.append(folded)
+            name_keys.append((folded, i))
+            name_keys.extend((folded[start:], i) for start in _word_starts(folded))
+        code_keys.sort()
+        name_keys.sort()
+        self._code_keys = [key for key, _ in code_keys]
+        self._code_targets = array('H', (i for _, i in code_keys))
+        self._name_keys = [key for key, _ in name_keys]
+        self._name_targets = array('H', (i for _, i in name_keys))
+
+    def __len__(self) -> int:
+        return len(self.countries)
+
+    def __contains__(self, code: str) -> bool:
+        return code.strip().upper() in self._by_code
+
+    def lookup(self, code: str) -> Optional[Country]:
+        """País con ese código ISO3 o ISO2 (sin distinguir mayúsculas), o None."""
+        i = self._by_code.get(code.strip().upper())
+        return self.countries[i] if i is not None else None
+
+    def unknown(self, codes: Iterable[str]) -> List[str]:
+        """Los códigos que no están en el índice, en el orden recibido."""
+        return [code for code in codes if code.strip().upper() not in self._by_code]
+
+    @staticmethod
+    def _prefixed(keys: List[str], targets: array, prefix: str) -> Iterable[int]:
+        start = bisect_left(keys, prefix)
+        for position in range(start, len(keys)):
+            if not keys[position].startswith(prefix):
+                break
+            yield targets[position]
+
+    def complete(self, text: str, limit: int = DEFAULT_LIMIT) -> List[Country]:
+        """Hasta 'limit' países cuyo código o nombre (o una palabra del nombre) empieza con 'text'."""
+        query = fold(text)
+        if not query or limit <= 0:
+            return []
+        ranks: Dict[int, int] = {}
+        exact = self._by_code.get(query.upper())
+        if exact is not None:
+            ranks[exact] = 0
+        for i in self._prefixed(self._code_keys, self._code_targets, query):
+            ranks.setdefault(i, 1)
+        for i in self._prefixed(self._name_keys, self._name_targets, query):
+            ranks.setdefault(i, 2 if self._folded[i].startswith(query) else 3)
+        metrics.incr("country_index.completions")
+        ordered = sorted(ranks, key=lambda i: (ranks[i], self.countries[i].aggregate, self._folded[i]))
+        return [self.countries[i] for i in ordered[:limit]]
+
+    def suggest(self, code: str, limit: int = 3) -> List[Country]:
+        """Países parecidos a un código desconocido (para el mensaje de error)."""
+        matches = self.complete(code, limit)
+        if matches:
+            return matches
+        # Sin coincidencias por prefijo: códigos ISO3 a lo sumo a una letra de las tres primeras ('ARF', 'ARGX' -> ARG)
+        target = code.strip().upper()[:3]
+        if len(target) != 3:
+            return []
+        distances = [(sum(a != b for a, b in zip(country.iso3, target)), i) for i, country in enumerate(self.countries)
+                     if not country.aggregate]
+        return [self.countries[i] for distance, i in sorted(distances) if distance <= 1][:limit]
+
+    def unknown_message(self, codes: List[str]) -> str:
+        """Mensaje para el usuario sobre códigos desconocidos, con sugerencias si las hay."""
+        lines = []
+        for code in codes:
+            hints = ", ".join(f"{country.iso3} ({country.name})" for country in self.suggest(code))
+            lines.append(f"Código de país desconocido '{code}'." + (f" ¿Quisiste decir {hints}?" if hints else ""))
+        return "\n".join(lines)
+
+
+# --- Lectura / Escritura ---
+def load_countries(path: str) -> List[Country]:
+    """Lee un archivo con el formato de country_snapshot.tsv. ValueError si no tiene filas válidas."""
+    countries = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip() or line.startswith("#"):
+                continue
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) != 4 or len(fields[0]) != 3:
+                raise ValueError(f"Línea inválida en '{path}': {line.strip()!r}")
+            iso3, iso2, aggregate, name = fields
+            countries.append(Country(sys.intern(iso3.upper()), sys.intern(iso2.upper()), name, aggregate == "1"))
+    if not countries:
+        raise ValueError(f"'{path}' no contiene países.")
+    return countries
+
+
+def save_countries(path: str, countries: Iterable[Country]) -> None:
+    """Guarda la lista (ordenada por ISO3) de forma atómica: un lector nunca ve el archivo a medias."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temporary = f"{path}.tmp{os.getpid()}"
+    with open(temporary, "w", encoding="utf-8", newline="\n") as handle:
+        handle.write(_SNAPSHOT_HEADER)
+        for country in sorted(countries, key=lambda country: country.iso3):
+            handle.write(f"{country.iso3}\t{country.iso2}\t{int(country.aggregate)}\t{country.name}\n")
+    os.replace(temporary, path)
+
+
+def countries_from_api(records: Iterable[Dict[str, Any]]) -> List[Country]:
+    """Convierte los registros de /v2/country ({'id', 'iso2Code', 'name', 'region', ...}) en Country."""
+    countries = []
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        iso3 = (record.get("id") or "").strip().upper()
+        name = " ".join((record.get("name") or "").split()) # Sin tabuladores ni espacios repetidos
+        if len(iso3) != 3 or not name:
+            continue
+        region = (record.get("region") or {}).get("value") or ""
+        countries.append(Country(iso3, (record.get("iso2Code") or "").strip().upper(), name,
+                                 region.strip() == AGGREGATE_REGION))
+    return countries
+
+
+# --- Índice compartido ---
+_index_instance: Optional[CountryIndex] = None
+_index_failed = False
+_index_lock = threading.Lock()
+
+
+def get_country_index() -> Optional[CountryIndex]:
+    """
+    Índice compartido, cargado en el primer uso: la copia actualizada (INDEX_PATH) o, si no
+    existe o no es válida, la instantánea incluida. None si no se pudo cargar ninguna
+    (en ese caso no se valida nada localmente).
+    """
+    global _index_instance, _index_failed
+    if _index_instance is None and not _index_failed:
+        with _index_lock:
+            if _index_instance is None and not _index_failed:
+                for path in (INDEX_PATH, SNAPSHOT_PATH):
+                    if not path or not os.path.exists(path):
+                        continue
+                    try:
+                        start = time.perf_counter()
+                        _index_instance = CountryIndex(load_countries(path), os.path.getmtime(path))
+                        metrics.observe("country_index.load", time.perf_counter() - start)
+                        log.info("Índice de países cargado: %s (%d códigos).", path, len(_index_instance))
+                        break
+                    except (OSError, ValueError) as e:
+                        log.warning("No se pudo leer el índice de países '%s': %s", path, e)
+                _index_failed = _index_instance is None
+    return _index_instance
+
+
+def set_country_index(countries: List[Country], save: bool = True) -> CountryIndex:
+    """Reemplaza el índice compartido (p. ej. tras descargar /v2/country) y lo guarda en INDEX_PATH."""
+    global _index_instance, _index_failed
+    index = CountryIndex(countries, time.time())
+    with _index_lock:
+        _index_instance, _index_failed = index, False
+    if save and INDEX_PATH: # OSError si no se puede escribir (el índice en memoria ya quedó reemplazado)
+        save_countries(INDEX_PATH, index.countries)
+    return index
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Índice local de códigos de país del Banco Mundial.")
+    parser.add_argument("prefix", nargs="*", help="Texto a autocompletar (código o nombre)")
+    parser.add_argument("--check", action="store_true", help="Valida los códigos indicados en lugar de autocompletar")
+    parser.add_argument("--update", action="store_true", help=f"Descarga /v2/country y guarda la copia en {INDEX_PATH or '(deshabilitado)'}")
+    parser.add_argument("-n", "--limit", type=int, default=DEFAULT_LIMIT, help="Sugerencias a mostrar")
+    args = parser.parse_args(argv)
+
+    if args.update:
+        import core_logic
+        count, error = core_logic.refresh_country_index()
+        if error is not None:
+            print(error, file=sys.stderr)
+            return 1
+        print(f"Índice actualizado: {count} códigos.")
+        if not args.prefix:
+            return 0
+
+    index = get_country_index()
+    if index is None:
+        print("No hay índice de países disponible.", file=sys.stderr)
+        return 1
+    if args.check:
+        unknown = index.unknown(args.prefix)
+        for code in args.prefix:
+            country = index.lookup(code)
+            print(f"{code}: {country.iso3} {country.name}" if country else f"{code}: desconocido")
+        if unknown:
+            print(index.unknown_message(unknown), file=sys.stderr)
+        return 1 if unknown else 0
+    for text in args.prefix:
+        start = time.perf_counter()
+        matches = index.complete(text, args.limit)
+        elapsed_us = (time.perf_counter() - start) * 1e6
+        print(f"{text!r}: {len(matches)} coincidencias en {elapsed_us:.0f} µs")
+        for country in matches:
+            print(f"  {country.iso3}  {country.iso2:<2}  {country.name}{'  (agregado)' if country.aggregate else ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,315 @@
+# src/gini_analytics.py
+# Analítica vectorizada (NumPy) sobre muchos países a la vez: una matriz país × año con
+# NaN donde no hay dato, construida de una sola vez a partir de una GiniSeries, de la base
+# offline (BulkGiniStore) o de registros de la API. Sobre ella:
+#   - ranking y percentiles por año (o sobre el último valor válido de cada país)
+#   - cuantiles por año, medias móviles, variaciones interanuales
+#   - arrastre del último valor válido (carry-forward), con límite de antigüedad opcional
+#   - agregados regionales (media, ponderada o no, mediana, mínimo, máximo, cantidad)
+# Los índices (país -> fila, año -> columna, última columna válida por país) se calculan al
+# construir la matriz, así "ordenar todas las economías por su último GINI" no recorre
+# registros en Python.
+#
+# Uso: python src/gini_analytics.py ARG BRA CHL URY --date-range 2000:2020
+#      python src/gini_analytics.py --top 20      (toda la base offline, si fue importada)
+
+import argparse
+import sys
+import warnings
+from typing import Optional, List, Dict, Any, Iterable, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from gini_series import GiniSeries
+
+Records = List[Dict[str, Any]]
+
+AGGREGATE_STATS = ("mean", "median", "min", "max", "count")
+
+
+class GiniMatrix:
+    """
+    Matriz de valores GINI (float64, país × año) con años consecutivos (los años sin datos
+    de ningún país quedan como columnas de NaN, así las ventanas y los desfasajes se
+    miden en años y no en columnas).
+
+    - codes / names: un país por fila, en el orden de la fuente.
+    - years: int array con el año de cada columna.
+    - values: la matriz; no se modifica (los métodos devuelven matrices nuevas).
+    """
+    __slots__ = ("codes", "names", "years", "values", "valid", "_code_to_row",
+                 "latest_col", "latest_values", "latest_years", "_latest_order")
+
+    def __init__(self, codes: Sequence[str], names: Sequence[str], years: np.ndarray, values: np.ndarray):
+        self.codes = list(codes)
+        self.names = list(names)
+        self.years = np.asarray(years, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.float64)
+        if self.values.shape != (len(self.codes), len(self.years)):
+            raise ValueError(f"Forma {self.values.shape} incompatible con {len(self.codes)} países × {len(self.years)} años.")
+        self.values.setflags(write=False)
+        self.valid = ~np.isnan(self.values)
+        self._code_to_row = {code: row for row, code in enumerate(self.codes)}
+        # Última columna con valor por país (-1 si no tiene ninguno)
+        self.latest_col = np.full(len(self.codes), -1)
+        self.latest_values = np.full(len(self.codes), np.nan)
+        self.latest_years = np.full(len(self.codes), -1)
+        if len(self.years):
+            self.latest_col = np.where(self.valid, np.arange(len(self.years)), -1).max(axis=1)
+            rows = np.flatnonzero(self.latest_col >= 0)
+            self.latest_values[rows] = self.values[rows, self.latest_col[rows]]
+            self.latest_years[rows] = self.years[self.latest_col[rows]]
+        self._latest_order: Optional[np.ndarray] = None
+
+    # --- Construcción ---
+    @classmethod
+    def from_columns(cls, countries: Sequence[Tuple[str, str]], country_idx, years, values) -> "GiniMatrix":
+        """
+        Arma la matriz a partir de columnas paralelas (índice de país, año, valor), como las de
+        GiniSeries o BulkGiniStore. Acepta arrays, memoryviews o listas; no recorre filas en Python.
+        """
+        country_idx = np.asarray(country_idx, dtype=np.intp)
+        row_years = np.asarray(years, dtype=np.int64)
+        row_values = np.asarray(values, dtype=np.float64)
+        codes = [code for code, _ in countries]
+        names = [name for _, name in countries]
+        if row_years.size == 0:
+            return cls(codes, names, np.empty(0, dtype=np.int64), np.empty((len(codes), 0)))
+        first, last = int(row_years.min()), int(row_years.max())
+        matrix = np.full((len(codes), last - first + 1), np.nan)
+        matrix[country_idx, row_years - first] = row_values
+        return cls(codes, names, np.arange(first, last + 1), matrix)
+
+    @classmethod
+    def from_series(cls, series: GiniSeries) -> "GiniMatrix":
+        return cls.from_columns(series.countries, series.country_idx, series.years, series.values)
+
+    @classmethod
+    def from_records(cls, records: Optional[Iterable[Dict[str, Any]]]) -> "GiniMatrix":
+        """Desde registros de la API (uno o varios países mezclados)."""
+        return cls.from_series(GiniSeries.from_records(records))
+
+    @classmethod
+    def from_results(cls, results: Mapping[str, Tuple[Optional[Records], Optional[str]]]) -> "GiniMatrix":
+        """Desde el resultado de core_logic.get_gini_data_many (se omiten los países con error)."""
+        return cls.from_records(record for records, error_message in results.values()
+                                if error_message is None and records for record in records)
+
+    @classmethod
+    def from_bulk_store(cls, store) -> "GiniMatrix":
+        """Desde la base offline: las columnas del mmap se leen sin pasar por registros."""
+        return cls.from_columns(store.countries, store.country_idx, store.years, store.values)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    # --- Acceso ---
+    def row(self, country_code: str) -> int:
+        """Fila del país. Lanza KeyError si no está en la matriz."""
+        try:
+            return self._code_to_row[country_code.upper()]
+        except KeyError:
+            raise KeyError(f"País '{country_code}' no está en la matriz.") from None
+
+    def column(self, year: int) -> int:
+        """Columna del año. Lanza KeyError si está fuera del rango de la matriz."""
+        col = int(year) - int(self.years[0]) if len(self.years) else -1
+        if not 0 <= col < len(self.years):
+            raise KeyError(f"Año {year} fuera del rango de la matriz.")
+        return col
+
+    def country_values(self, country_code: str) -> np.ndarray:
+        return self.values[self.row(country_code)]
+
+    def year_values(self, year: Optional[int] = None) -> np.ndarray:
+        """Valores de un año para todos los países; sin año, el último valor válido de cada uno."""
+        return self.latest_values if year is None else self.values[:, self.column(year)]
+
+    # --- Ranking y percentiles ---
+    def _order(self, year: Optional[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """(valores, filas con valor ordenadas de mayor a menor). El orden del último valor se guarda."""
+        column = self.year_values(year)
+        if year is None and self._latest_order is not None:
+            return column, self._latest_order
+        rows = np.flatnonzero(~np.isnan(column))
+        order = rows[np.argsort(-column[rows], kind="stable")]
+        if year is None:
+            self._latest_order = order
+        return column, order
+
+    def ranks(self, year: Optional[int] = None, ascending: bool = False) -> np.ndarray:
+        """
+        Posición de cada país (1 = mayor GINI, o menor con ascending=True); los empates
+        comparten la mejor posición. NaN para países sin valor.
+        """
+        column, order = self._order(year)
+        sorted_values = column[order]
+        ranks = np.full(len(self.codes), np.nan)
+        if ascending:
+            ranks[order] = np.searchsorted(sorted_values[::-1], sorted_values, side="left") + 1
+        else:
+            ranks[order] = np.searchsorted(-sorted_values, -sorted_values, side="left") + 1
+        return ranks
+
+    def ranking(self, year: Optional[int] = None, ascending: bool = False,
+                top: Optional[int] = None) -> List[Tuple[int, str, str, int, float]]:
+        """Lista (posición, código, nombre, año, valor) ordenada; sin año usa el último valor de cada país."""
+        column, order = self._order(year)
+        if ascending:
+            order = order[::-1]
+        if top is not None:
+            order = order[:top]
+        ranks = self.ranks(year, ascending)
+        row_years = self.latest_years if year is None else np.full(len(self.codes), year)
+        return [(int(ranks[r]), self.codes[r], self.names[r], int(row_years[r]), float(column[r])) for r in order]
+
+    def percentiles(self, year: Optional[int] = None) -> np.ndarray:
+        """
+        Percentil (0-100) de cada país dentro de la distribución del año: porcentaje de países
+        con valor menor, más la mitad de los empatados. NaN para países sin valor.
+        """
+        column, order = self._order(year)
+        ascending_values = column[order][::-1]
+        result = np.full(len(self.codes), np.nan)
+        count = len(ascending_values)
+        if count:
+            below = np.searchsorted(ascending_values, column[order], side="left")
+            equal = np.searchsorted(ascending_values, column[order], side="right") - below
+            result[order] = (below + 0.5 * equal) / count * 100.0
+        return result
+
+    def year_quantiles(self, q: Sequence[float] = (10, 25, 50, 75, 90)) -> np.ndarray:
+        """Cuantiles por año (len(q) × años), ignorando NaN. Años sin datos quedan en NaN."""
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning) # Columnas sin ningún valor
+            return np.nanpercentile(self.values, q, axis=0)
+
+    # --- Series temporales ---
+    def carry_forward(self, limit: Optional[int] = None) -> np.ndarray:
+        """
+        Rellena cada hueco con el último valor válido anterior del mismo país (como
+        find_latest_valid_gini, pero para todos los años). 'limit' acota la antigüedad en años.
+        Antes del primer valor del país queda NaN.
+        """
+        columns = np.arange(len(self.years))
+        last_valid = np.maximum.accumulate(np.where(self.valid, columns, -1), axis=1)
+        filled = self.values[np.arange(len(self.codes))[:, None], np.maximum(last_valid, 0)]
+        keep = last_valid >= 0
+        if limit is not None:
+            keep &= (columns - last_valid) <= limit
+        return np.where(keep, filled, np.nan)
+
+    def rolling_mean(self, window: int, min_periods: int = 1, carry_forward: bool = False) -> np.ndarray:
+        """
+        Media móvil de 'window' años terminando en cada año, ignorando NaN; NaN si la ventana
+        tiene menos de 'min_periods' valores. Se calcula con sumas acumuladas (O(países × años)).
+        """
+        if window < 1:
+            raise ValueError("window debe ser al menos 1")
+        values = self.carry_forward() if carry_forward else self.values
+        valid = ~np.isnan(values)
+        sums = np.cumsum(np.where(valid, values, 0.0), axis=1)
+        counts = np.cumsum(valid, axis=1)
+        sums[:, window:] = sums[:, window:] - sums[:, :-window]
+        counts[:, window:] = counts[:, window:] - counts[:, :-window]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts >= max(1, min_periods), sums / counts, np.nan)
+
+    def yoy_delta(self, periods: int = 1, carry_forward: bool = False, relative: bool = False) -> np.ndarray:
+        """
+        Variación respecto de 'periods' años antes (absoluta, o relativa con relative=True).
+        Con carry_forward=True compara contra el último valor conocido en vez de exigir ambos años.
+        """
+        if periods < 1:
+            raise ValueError("periods debe ser al menos 1")
+        values = self.carry_forward() if carry_forward else self.values
+        delta = np.full(values.shape, np.nan)
+        if periods < values.shape[1]:
+            previous = values[:, :-periods]
+            delta[:, periods:] = values[:, periods:] - previous
+            if relative:
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    delta[:, periods:] /= previous
+        return delta
+
+    # --- Agregados regionales ---
+    def regional_aggregate(self, regions: Mapping[str, str], stat: str = "mean",
+                           weights: Optional[Mapping[str, float]] = None,
+                           carry_forward: bool = False) -> Tuple[List[str], np.ndarray]:
+        """
+        Agrega por región y año. 'regions' asigna código de país -> región (los países sin
+        región se omiten); 'weights' (p. ej. población) pondera la media. Devuelve
+        (regiones ordenadas, matriz regiones × años); NaN donde la región no tiene valores.
+        """
+        if stat not in AGGREGATE_STATS:
+            raise ValueError(f"stat debe ser uno de {AGGREGATE_STATS}")
+        names = sorted({region for code, region in regions.items() if code.upper() in self._code_to_row and region})
+        region_index = {region: i for i, region in enumerate(names)}
+        membership = np.full(len(self.codes), -1)
+        for code, region in regions.items():
+            row = self._code_to_row.get(code.upper())
+            if row is not None and region:
+                membership[row] = region_index[region]
+
+        values = self.carry_forward() if carry_forward else self.values
+        valid = ~np.isnan(values)
+        if stat in ("mean", "count"):
+            # Matriz de pertenencia (regiones × países): las sumas por región son un producto de matrices
+            member = np.zeros((len(names), len(self.codes)))
+            rows = np.flatnonzero(membership >= 0)
+            member[membership[rows], rows] = 1.0
+            if weights is not None:
+                member *= np.array([weights.get(code, np.nan) for code in self.codes], dtype=np.float64)
+                member = np.nan_to_num(member) # Sin peso conocido: no participa
+            counts = member @ valid
+            if stat == "count":
+                return names, (member > 0).astype(np.float64) @ valid
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return names, np.where(counts > 0, (member @ np.where(valid, values, 0.0)) / counts, np.nan)
+
+        reducer = {"median": np.nanmedian, "min": np.nanmin, "max": np.nanmax}[stat]
+        result = np.full((len(names), len(self.years)), np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning) # Años sin ningún valor en la región
+            for i in range(len(names)):
+                subset = values[membership == i]
+                if len(subset):
+                    result[i] = reducer(subset, axis=0)
+        return names, result
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ranking y percentiles GINI de muchos países (NumPy).")
+    parser.add_argument("codes", nargs="*", help="Códigos de país (sin códigos: toda la base offline)")
+    parser.add_argument("--date-range", help="Rango 'AAAA:AAAA' (por defecto el de core_logic)")
+    parser.add_argument("--year", type=int, help="Ranking de un año (por defecto, último valor de cada país)")
+    parser.add_argument("--top", type=int, default=None, help="Cantidad de países a mostrar")
+    parser.add_argument("--ascending", action="store_true", help="Menor desigualdad primero")
+    args = parser.parse_args(argv)
+
+    import core_logic
+    if args.date_range:
+        core_logic.DATE_RANGE = args.date_range
+    if args.codes:
+        matrix = GiniMatrix.from_results(core_logic.get_gini_data_many(args.codes))
+    else:
+        store = core_logic._get_bulk_store()
+        if store is None:
+            print("Sin códigos y sin base offline: indica países o importa el archivo masivo (gini_bulk_store.py).",
+                  file=sys.stderr)
+            return 2
+        matrix = GiniMatrix.from_bulk_store(store)
+
+    try:
+        ranking = matrix.ranking(args.year, ascending=args.ascending, top=args.top)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        return 2
+    percentiles = matrix.percentiles(args.year)
+    for rank, code, name, year, value in ranking:
+        print(f"{rank:>4}  {code:<4} {name[:32]:<32} {year:>5} {value:>6.1f}  p{percentiles[matrix.row(code)]:>5.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+# src/gini_bulk_store.py
+# Importador del archivo masivo del Banco Mundial (CSV o ZIP "API_SI.POV.GINI_DS2_...")
+# a un archivo binario columnar que se abre con mmap, y backend de consulta sobre ese archivo
+# con el mismo contrato que core_logic.get_gini_data: (registros, None) o (None, error).
+#
+# Formato del archivo (little-endian):
+#   cabecera  : struct _HEADER (magic, versión, cantidades y offsets)
+#   países    : JSON UTF-8 [[código, nombre], ...] (tabla chica, se lee al abrir)
+#   índice    : uint32[country_count * 2] -> (fila inicial, cantidad de filas) por país
+#   columnas  : uint16 país[row_count] | int16 año[row_count] | float64 valor[row_count]
+# Las filas están ordenadas por (país, año) y solo incluyen años con valor.
+#
+# Uso: python src/gini_bulk_store.py API_SI.POV.GINI_DS2_en_csv_v2.zip [salida.bin]
+
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Optional, List, Dict, Any, Tuple
+
+from gini_series import GiniSeries
+
+# --- Configuración ---
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "tp2_gini", "gini_bulk.bin")
+BULK_INDICATOR = "SI.POV.GINI"
+
+_MAGIC = b"GINIMM01"
+_VERSION = 1
+# magic, versión, países, filas, offset/largo tabla de países, offsets índice/país/año/valor
+_HEADER = struct.Struct("<8sIIIQQQQQQ")
+_ALIGN = 8
+
+Records = List[Dict[str, Any]]
+
+
+def _align(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+# --- Importación ---
+def _open_bulk_csv(source_path: str) -> io.TextIOBase:
+    """Abre el CSV de datos, ya sea directamente o dentro del ZIP descargado."""
+    import zipfile # Solo se usa al importar: no pesa en el arranque de la consulta
+    if zipfile.is_zipfile(source_path):
+        archive = zipfile.ZipFile(source_path)
+        members = [name for name in archive.namelist()
+                   if name.lower().endswith(".csv") and os.path.basename(name).startswith("API_")]
+        if not members:
+            raise ValueError(f"El ZIP '{source_path}' no contiene un archivo 'API_*.csv'.")
+        return io.TextIOWrapper(archive.open(members[0]), encoding="utf-8-sig", newline="")
+    return open(source_path, encoding="utf-8-sig", newline="")
+
+
+def _read_bulk_rows(source_path: str, indicator: str) -> Tuple[List[Tuple[str, str]], List[Tuple[int, int, float]]]:
+    """
+    Lee el CSV masivo (formato ancho: una fila por país, una columna por año) y devuelve
+    la tabla de países y las filas (índice de país, año, valor) con valor no vacío.
+    """
+    countries: List[Tuple[str, str]] = []
+    rows: List[Tuple[int, int, float]] = []
+    import csv
+    with _open_bulk_csv(source_path) as handle:
+        reader = csv.reader(handle)
+        header = None
+        for line in reader:
+            # Las primeras líneas son metadatos ("Data Source", "Last Updated Date", ...)
+            if line and line[0] == "Country Name":
+                header = line
+                break
+        if header is None:
+            raise ValueError(f"No se encontró la fila de encabezado 'Country Name' en '{source_path}'.")
+        year_columns = [(i, int(name)) for i, name in enumerate(header) if name.strip().isdigit()]
+        indicator_column = header.index("Indicator Code") if "Indicator Code" in header else None
+
+        for line in reader:
+            if len(line) < 2 or not line[1]:
+                continue
+            if indicator_column is not None and line[indicator_column] != indicator:
+                continue
+            country_index = len(countries)
+            countries.append((line[1].strip().upper(), line[0].strip()))
+            for column, year in year_columns:
+                if column < len(line) and line[column].strip():
+                    try:
+                        rows.append((country_index, year, float(line[column])))
+                    except ValueError:
+                        continue
+
+    # Orden por (código de país, año) para búsquedas por rango contiguo
+    order = sorted(range(len(countries)), key=lambda i: countries[i][0])
+    remap = {old: new for new, old in enumerate(order)}
+    countries = [countries[i] for i in order]
+    rows = sorted(((remap[c], y, v) for c, y, v in rows), key=lambda r: (r[0], r[1]))
+    return countries, rows
+
+
+def import_bulk_file(source_path: str, store_path: str = DEFAULT_STORE_PATH,
+                     indicator: str = BULK_INDICATOR) -> Tuple[int, int]:
+    """
+    Convierte el archivo masivo descargado en el archivo binario columnar.
+    Escribe a un temporal y lo renombra, así los lectores nunca ven un archivo a medias.
+
+    Returns:
+        (cantidad de países, cantidad de filas con valor).
+    """
+    countries, rows = _read_bulk_rows(source_path, indicator)
+    countries_blob = json.dumps(countries, ensure_ascii=False).encode("utf-8")
+
+    index = array("I")
+    start = 0
+    for country_index in range(len(countries)):
+        count = 0
+        while start + count < len(rows) and rows[start + count][0] == country_index:
+            count += 1
+        index.extend((start, count))
+        start += count
+
+    countries_offset = _HEADER.size
+    index_offset = _align(countries_offset + len(countries_blob))
+    country_col_offset = _align(index_offset + index.itemsize * len(index))
+    year_col_offset = _align(country_col_offset + 2 * len(rows))
+    value_col_offset = _align(year_col_offset + 2 * len(rows))
+
+    header = _HEADER.pack(_MAGIC, _VERSION, len(countries), len(rows),
+                          countries_offset, len(countries_blob), index_offset,
+                          country_col_offset, year_col_offset, value_col_offset)
+    sections = [
+        (countries_offset, countries_blob),
+        (index_offset, index.tobytes()),
+        (country_col_offset, array("H", (r[0] for r in rows)).tobytes()),
+        (year_col_offset, array("h", (r[1] for r in rows)).tobytes()),
+        (value_col_offset, array("d", (r[2] for r in rows)).tobytes()),
+    ]
+
+    directory = os.path.dirname(store_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{store_path}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(header)
+        for offset, blob in sections:
+            out.write(b"\0" * (offset - out.tell()))
+            out.write(blob)
+    os.replace(tmp_path, store_path)
+    return len(countries), len(rows)
+
+
+# --- Consulta ---
+class BulkGiniStore:
+    """
+    Backend de solo lectura sobre el archivo binario, abierto con mmap.
+    Las columnas son vistas (memoryview) sobre el mapeo: no se copian a memoria del
+    proceso y la caché de páginas del SO se comparte entre procesos.
+    """
+    def __init__(self, store_path: str = DEFAULT_STORE_PATH, indicator: str = BULK_INDICATOR):
+        self.path = store_path
+        self.indicator = indicator
+        with open(store_path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, country_count, row_count, countries_offset, countries_length,
+         index_offset, country_col_offset, year_col_offset, value_col_offset) = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._mmap.close()
+            raise ValueError(f"'{store_path}' no es un archivo GINI válido (magic={magic!r}, versión={version}).")
+
+        view = self._view = memoryview(self._mmap)
+        self.countries: List[Tuple[str, str]] = [
+            (code, name) for code, name in json.loads(bytes(view[countries_offset:countries_offset + countries_length]))]
+        self._code_to_index = {code: i for i, (code, _) in enumerate(self.countries)}
+        self._index = view[index_offset:index_offset + 8 * country_count].cast("I")
+        self.country_idx = view[country_col_offset:country_col_offset + 2 * row_count].cast("H")
+        self.years = view[year_col_offset:year_col_offset + 2 * row_count].cast("h")
+        self.values = view[value_col_offset:value_col_offset + 8 * row_count].cast("d")
+
+    def __contains__(self, country_code: str) -> bool:
+        return country_code.upper() in self._code_to_index
+
+    def _rows_for(self, country_code: str, date_range: Optional[str]) -> Optional[range]:
+        """Rango de filas del país (filtrado por 'AAAA:AAAA'), o None si el país no existe."""
+        country_index = self._code_to_index.get(country_code.upper())
+        if country_index is None:
+            return None
+        start, count = self._index[2 * country_index], self._index[2 * country_index + 1]
+        rows = range(start, start + count)
+        if date_range:
+            first_year, last_year = (int(part) for part in date_range.split(":"))
+            rows = range(
+                next((r for r in rows if self.years[r] >= first_year), rows.stop),
+                next((r for r in rows if self.years[r] > last_year), rows.stop))
+        return rows
+
+    def get_gini_data(self, country_code: str, date_range: Optional[str] = None) -> tuple[Optional[Records], Optional[str]]:
+        """
+        Mismo contrato que core_logic.get_gini_data. Los registros imitan los de la API
+        (más reciente primero) pero solo incluyen años con valor.
+        """
+        rows = self._rows_for(country_code, date_range)
+        if rows is None:
+            return None, f"Error API Banco Mundial: ¿Código de país inválido '{country_code}'?"
+        code, name = self.countries[self._code_to_index[country_code.upper()]]
+        records = [{
+            'indicator': {'id': self.indicator, 'value': 'Gini index'},
+            'country': {'id': code, 'value': name},
+            'countryiso3code': code,
+            'date': str(self.years[r]),
+            'value': self.values[r],
+        } for r in reversed(rows)]
+        return records, None
+
+    def series(self) -> GiniSeries:
+        """Toda la base como GiniSeries (copia las columnas del mmap a arrays)."""
+        return GiniSeries(list(self.countries), array("H", self.country_idx),
+                          array("h", self.years), array("d", self.values))
+
+    def close(self) -> None:
+        for column in (self._index, self.country_idx, self.years, self.values, self._view):
+            column.release()
+        self._mmap.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    import zipfile
+    parser = argparse.ArgumentParser(description="Importa el archivo masivo GINI del Banco Mundial a un archivo mmap.")
+    parser.add_argument("source", help="CSV o ZIP descargado (API_SI.POV.GINI_DS2_*.zip)")
+    parser.add_argument("output", nargs="?", default=DEFAULT_STORE_PATH, help=f"Archivo de salida (por defecto {DEFAULT_STORE_PATH})")
+    args = parser.parse_args(argv)
+    try:
+        countries, rows = import_bulk_file(args.source, args.output)
+    except (OSError, ValueError, zipfile.BadZipFile) as e:
+        print(f"Error importando '{args.source}': {e}", file=sys.stderr)
+        return 1
+    print(f"Importados {countries} países y {rows} valores en '{args.output}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
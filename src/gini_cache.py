@@ -0,0 +1,260 @@
+# src/gini_cache.py
+# Caché persistente (SQLite) de las respuestas ya procesadas de la API del Banco Mundial.
+# Clave: (código de país, indicador, rango de fechas). Se guarda la lista de registros
+# ya decodificada, con TTL configurable y desalojo LRU acotado por cantidad de entradas.
+# Delante de SQLite hay una pequeña caché en memoria para que las consultas repetidas
+# no paguen ni HTTP, ni decodificación, ni acceso a disco.
+# Los registros se devuelven como copia superficial de la lista: el llamador puede ordenarla
+# o ampliarla sin alterar la caché (los dicts de cada registro se comparten: no modificarlos).
+# Cada entrada guarda además lo necesario para la actualización incremental: el último año
+# con valor, los validadores HTTP (ETag / Last-Modified) y el rango al que corresponden.
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, List, Dict, Any, NamedTuple
+
+from gini_metrics import get_logger
+
+log = get_logger("Cache")
+
+# --- Configuración por defecto ---
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "tp2_gini", "gini_cache.sqlite3")
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600  # Los datos GINI cambian pocas veces al año
+DEFAULT_MAX_ENTRIES = 1000           # Límite de entradas en disco (LRU)
+DEFAULT_MEMORY_ENTRIES = 256         # Límite de entradas en memoria (LRU)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gini_cache (
+    cache_key    TEXT PRIMARY KEY,
+    country_code TEXT NOT NULL,
+    indicator    TEXT NOT NULL,
+    date_range   TEXT NOT NULL,
+    records      BLOB NOT NULL,
+    fetched_at   REAL NOT NULL,
+    last_access  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_gini_cache_last_access ON gini_cache (last_access);
+"""
+# Columnas agregadas para la actualización incremental (las bases viejas se migran al abrir)
+_INCREMENTAL_COLUMNS = (
+    ("newest_year", "INTEGER"),      # Último año con valor
+    ("etag", "TEXT"),                # Validadores de la última respuesta...
+    ("last_modified", "TEXT"),
+    ("validated_range", "TEXT"),     # ...y el rango de años que pedía esa respuesta
+    ("full_fetched_at", "REAL"),     # Última descarga del rango completo
+)
+
+Records = List[Dict[str, Any]]
+
+
+class CacheEntry(NamedTuple):
+    """Una entrada de la caché con sus metadatos de actualización."""
+    records: Records
+    fetched_at: float
+    newest_year: Optional[int] = None
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    validated_range: Optional[str] = None
+    full_fetched_at: float = 0.0
+
+
+def make_cache_key(country_code: str, indicator: str, date_range: str) -> str:
+    """Construye la clave de caché normalizada (el código de país no distingue mayúsculas)."""
+    return f"{country_code.upper()}|{indicator}|{date_range}"
+
+
+class GiniCache:
+    """
+    Caché de dos niveles: memoria (OrderedDict LRU) + SQLite en disco (LRU por 'last_access').
+    Es segura para usar desde varios hilos. Si la base no se puede abrir, la caché queda
+    deshabilitada y todas las consultas son 'miss' (la aplicación sigue funcionando).
+    """
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, memory_entries: int = DEFAULT_MEMORY_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self._lock = threading.Lock()
+        # cache_key -> CacheEntry
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._migrate()
+        except (sqlite3.Error, OSError) as e:
+            log.warning("No se pudo abrir la caché '%s': %s. Caché deshabilitada.", path, e)
+            self._conn = None
+
+    def _migrate(self) -> None:
+        """Agrega las columnas que falten a una base creada por una versión anterior."""
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(gini_cache)")}
+        for name, column_type in _INCREMENTAL_COLUMNS:
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE gini_cache ADD COLUMN {name} {column_type}")
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    def _is_fresh(self, fetched_at: float, now: float) -> bool:
+        return (now - fetched_at) <= self.ttl_seconds
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """True si la entrada está dentro del TTL."""
+        return self._is_fresh(entry.fetched_at, time.time())
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        """Guarda en la caché de memoria (se asume el lock tomado)."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, key: str) -> Optional[CacheEntry]:
+        """Busca primero en memoria y luego en disco (se asume el lock tomado)."""
+        hit = self._memory.get(key)
+        if hit is not None:
+            self._memory.move_to_end(key)
+            return hit
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT records, fetched_at, newest_year, etag, last_modified, validated_range, full_fetched_at "
+                "FROM gini_cache WHERE cache_key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            records = pickle.loads(row[0])
+            self._conn.execute("UPDATE gini_cache SET last_access = ? WHERE cache_key = ?", (time.time(), key))
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            log.warning("Error leyendo '%s': %s", key, e)
+            return None
+        # Entradas migradas de una base vieja: sin full_fetched_at, cuenta como descargada completa en fetched_at
+        entry = CacheEntry(records, row[1], row[2], row[3], row[4], row[5], row[6] if row[6] is not None else row[1])
+        self._remember(key, entry)
+        return entry
+
+    def get(self, country_code: str, indicator: str, date_range: str) -> Optional[Records]:
+        """Devuelve los registros si están en caché y dentro del TTL; None en otro caso."""
+        key = make_cache_key(country_code, indicator, date_range)
+        with self._lock:
+            hit = self._lookup(key)
+        if hit is None or not self._is_fresh(hit.fetched_at, time.time()):
+            return None
+        return list(hit.records)
+
+    def peek(self, country_code: str, indicator: str, date_range: str) -> Optional[Records]:
+        """Como get, pero solo mira la caché en memoria (nunca lee el disco)."""
+        key = make_cache_key(country_code, indicator, date_range)
+        with self._lock:
+            hit = self._memory.get(key)
+        if hit is None or not self._is_fresh(hit.fetched_at, time.time()):
+            return None
+        return list(hit.records)
+
+    def get_stale(self, country_code: str, indicator: str, date_range: str) -> Optional[Records]:
+        """Devuelve los registros aunque el TTL haya vencido (para cuando la API no responde)."""
+        entry = self.get_entry(country_code, indicator, date_range)
+        return entry.records if entry is not None else None # get_entry ya devuelve una copia
+
+    def get_entry(self, country_code: str, indicator: str, date_range: str) -> Optional[CacheEntry]:
+        """Devuelve la entrada completa (vencida o no), o None si no está en caché."""
+        key = make_cache_key(country_code, indicator, date_range)
+        with self._lock:
+            entry = self._lookup(key)
+        return entry._replace(records=list(entry.records)) if entry is not None else None
+
+    def put(self, country_code: str, indicator: str, date_range: str, records: Records,
+            newest_year: Optional[int] = None, etag: Optional[str] = None, last_modified: Optional[str] = None,
+            validated_range: Optional[str] = None, full_fetched_at: Optional[float] = None) -> None:
+        """
+        Guarda (o reemplaza) los registros y aplica el desalojo LRU en disco.
+        'full_fetched_at' es la última descarga del rango completo (por defecto, ahora).
+        """
+        key = make_cache_key(country_code, indicator, date_range)
+        now = time.time()
+        entry = CacheEntry(list(records), now, newest_year, etag, last_modified, validated_range,
+                           now if full_fetched_at is None else full_fetched_at)
+        with self._lock:
+            self._remember(key, entry)
+            if self._conn is None:
+                return
+            try:
+                blob = pickle.dumps(records, protocol=pickle.HIGHEST_PROTOCOL)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO gini_cache "
+                    "(cache_key, country_code, indicator, date_range, records, fetched_at, last_access, "
+                    "newest_year, etag, last_modified, validated_range, full_fetched_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, country_code.upper(), indicator, date_range, blob, now, now,
+                     newest_year, etag, last_modified, validated_range, entry.full_fetched_at))
+                self._evict()
+            except (sqlite3.Error, pickle.PicklingError) as e:
+                log.warning("Error guardando '%s': %s", key, e)
+
+    def touch(self, country_code: str, indicator: str, date_range: str) -> None:
+        """Marca la entrada como recién validada (respuesta 304): renueva el TTL sin reescribir los registros."""
+        key = make_cache_key(country_code, indicator, date_range)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory[key] = entry._replace(fetched_at=now)
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute("UPDATE gini_cache SET fetched_at = ?, last_access = ? WHERE cache_key = ?",
+                                   (now, now, key))
+            except sqlite3.Error as e:
+                log.warning("Error actualizando '%s': %s", key, e)
+
+    def cached_countries(self, indicator: str, date_range: str) -> List[str]:
+        """Códigos de país con entrada en disco para el indicador y rango indicados (vencidas incluidas)."""
+        with self._lock:
+            if self._conn is None:
+                return sorted({key.split("|", 1)[0] for key in self._memory
+                               if key.endswith(f"|{indicator}|{date_range}")})
+            try:
+                rows = self._conn.execute(
+                    "SELECT country_code FROM gini_cache WHERE indicator = ? AND date_range = ? ORDER BY country_code",
+                    (indicator, date_range)).fetchall()
+            except sqlite3.Error as e:
+                log.warning("Error listando la caché: %s", e)
+                return []
+        return [row[0] for row in rows]
+
+    def _evict(self) -> None:
+        """Elimina las entradas menos usadas recientemente por encima de max_entries."""
+        count = self._conn.execute("SELECT COUNT(*) FROM gini_cache").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM gini_cache WHERE cache_key IN "
+                "(SELECT cache_key FROM gini_cache ORDER BY last_access ASC LIMIT ?)", (excess,))
+
+    def clear(self) -> None:
+        """Vacía ambos niveles de la caché."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM gini_cache")
+                except sqlite3.Error as e:
+                    log.warning("Error vaciando la caché: %s", e)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
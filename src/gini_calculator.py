@@ -0,0 +1,603 @@
+# src/gini_calculator.py
+# Calculador del coeficiente GINI a partir de microdatos de ingreso (la consigna del TP):
+# lee una columna de ingreso, opcionalmente ponderada, de un CSV o de un archivo binario
+# (.npy, o float64/float32 crudo) por bloques, y calcula
+#
+#     GINI = A / (W·T) - 1,   A = Σ x·w·(2·C + w)   sobre los valores ordenados,
+#
+# con W = Σw, T = Σw·x y C el peso acumulado antes de cada valor (O(n log n) por el orden).
+# El ordenamiento y la acumulación corren en el núcleo C (c_bridge/gini_kernel.c, compilado
+# por build.sh como lib/libginikernel64.so) o, si no está compilado, con NumPy.
+#
+# Archivos que no entran en memoria (o grandes, con varios procesos): se eligen cortes por
+# muestreo, cada proceso reparte su parte del archivo en cubetas por rango de valor (archivos
+# temporales), y cada cubeta se ordena y acumula por separado. Como las cubetas no se solapan,
+# sus (W, T, A) se combinan en orden sin ninguna mezcla de datos (ver GiniAccumulator.extend).
+#
+# Uso: python src/gini_calculator.py encuesta.csv --column ingreso --weight factor
+#      python src/gini_calculator.py ingresos.f64 --workers 8 --json
+# Salida: 0 si se pudo calcular, 1 si no hay datos válidos, 2 si los argumentos o el archivo no son válidos.
+
+import argparse
+import ctypes
+import json
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, List, Dict, Any, Iterator, NamedTuple, Tuple, Union
+
+import numpy as np
+
+from gini_metrics import get_logger, metrics
+
+log = get_logger("Calculator")
+
+# --- Configuración ---
+KERNEL_PATH = os.environ.get("GINI_KERNEL_LIB") or os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "lib", "libginikernel64.so"))
+MEMORY_LIMIT_BYTES = int(float(os.environ.get("GINI_CALC_MEMORY_MB", "2048")) * 1024 * 1024)
+CHUNK_ROWS = 1 << 22                 # Filas por bloque al leer binarios (32 MiB en float64)
+CSV_BLOCK_BYTES = 16 * 1024 * 1024   # Bytes por bloque al leer CSV
+PARALLEL_MIN_ROWS = 4_000_000        # Por debajo de esto no vale la pena lanzar procesos
+SAMPLE_SIZE = 1 << 20                # Valores muestreados para elegir los cortes entre cubetas
+CSV_SAMPLE_WINDOWS = 64              # Ventanas leídas del CSV para el muestreo
+SORT_OVERHEAD = 2                    # El radix sort usa un buffer auxiliar del mismo tamaño
+
+BINARY_DTYPES = {".f64": "<f8", ".bin": "<f8", ".f32": "<f4"}
+
+Column = Union[int, str]
+
+
+class GiniResult(NamedTuple):
+    gini: float
+    rows: int               # Filas usadas
+    skipped: int            # Filas descartadas (vacías, no numéricas, NaN o peso <= 0)
+    total_weight: float
+    total_income: float
+    method: str             # 'memory' o 'partitioned'
+    kernel: str             # 'C' o 'numpy'
+    elapsed_s: float
+
+
+class GiniAccumulator:
+    """W, T y A de un tramo ordenado. Los tramos consecutivos por rango de valor se combinan con extend()."""
+    __slots__ = ("weight", "total", "area", "rows")
+
+    def __init__(self, weight: float = 0.0, total: float = 0.0, area: float = 0.0, rows: int = 0):
+        self.weight, self.total, self.area, self.rows = weight, total, area, rows
+
+    def extend(self, other: "GiniAccumulator") -> None:
+        """Agrega un tramo con valores mayores o iguales a todos los ya acumulados."""
+        self.area += other.area + 2.0 * self.weight * other.total
+        self.weight += other.weight
+        self.total += other.total
+        self.rows += other.rows
+
+    def gini(self) -> float:
+        if self.weight <= 0 or self.total == 0:
+            return math.nan
+        return self.area / (self.weight * self.total) - 1.0
+
+
+# --- Núcleo C (con respaldo NumPy) ---
+class _CAccum(ctypes.Structure):
+    _fields_ = [("weight", ctypes.c_double), ("total", ctypes.c_double), ("area", ctypes.c_double)]
+
+
+_kernel = None # None = no cargado todavía, False = no disponible
+
+
+def load_kernel() -> Optional[ctypes.CDLL]:
+    """Carga libginikernel64.so una vez por proceso; None si no está compilada."""
+    global _kernel
+    if _kernel is None:
+        _kernel = False
+        if os.path.exists(KERNEL_PATH):
+            try:
+                lib = ctypes.CDLL(KERNEL_PATH)
+                double_p = ctypes.POINTER(ctypes.c_double)
+                lib.gini_radix_sort.argtypes = [double_p, double_p, ctypes.c_size_t]
+                lib.gini_radix_sort.restype = ctypes.c_int
+                lib.gini_accumulate_sorted.argtypes = [double_p, double_p, ctypes.c_size_t, ctypes.POINTER(_CAccum)]
+                lib.gini_accumulate_sorted.restype = ctypes.c_int
+                lib.gini_parse_csv.argtypes = [ctypes.c_char_p, ctypes.c_size_t, ctypes.c_char, ctypes.c_int, ctypes.c_int,
+                                               double_p, double_p, ctypes.c_size_t, ctypes.POINTER(ctypes.c_size_t)]
+                lib.gini_parse_csv.restype = ctypes.c_size_t
+                _kernel = lib
+            except (OSError, AttributeError) as e:
+                log.warning("No se pudo cargar '%s': %s. Se usa NumPy.", KERNEL_PATH, e)
+        else:
+            log.info("'%s' no existe (ejecuta './build.sh'). Se usa NumPy.", KERNEL_PATH)
+    return _kernel or None
+
+
+def _pointer(array: Optional[np.ndarray]):
+    return array.ctypes.data_as(ctypes.POINTER(ctypes.c_double)) if array is not None else None
+
+
+def clean(values: np.ndarray, weights: Optional[np.ndarray]) -> Tuple[np.ndarray, Optional[np.ndarray], int]:
+    """Descarta ingresos no finitos y pesos no finitos o <= 0. Devuelve (valores, pesos, descartados)."""
+    keep = np.isfinite(values)
+    if weights is not None:
+        keep &= np.isfinite(weights) & (weights > 0)
+    if keep.all():
+        return values, weights, 0
+    return values[keep], (weights[keep] if weights is not None else None), int(len(keep) - np.count_nonzero(keep))
+
+
+def sort_and_accumulate(values: np.ndarray, weights: Optional[np.ndarray] = None) -> GiniAccumulator:
+    """Ordena (en el lugar, si el arreglo es propio y contiguo) y acumula un tramo ya limpio."""
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    if weights is not None:
+        weights = np.ascontiguousarray(weights, dtype=np.float64)
+    kernel = load_kernel()
+    if kernel is not None:
+        if not values.flags.writeable or not values.flags.owndata:
+            values = values.copy()
+        if weights is not None and (not weights.flags.writeable or not weights.flags.owndata):
+            weights = weights.copy()
+        with metrics.timer("calculator.sort"):
+            if kernel.gini_radix_sort(_pointer(values), _pointer(weights), len(values)) != 0:
+                raise MemoryError("gini_radix_sort: sin memoria para los buffers auxiliares")
+        acc = _CAccum()
+        with metrics.timer("calculator.accumulate"):
+            kernel.gini_accumulate_sorted(_pointer(values), _pointer(weights), len(values), ctypes.byref(acc))
+        return GiniAccumulator(acc.weight, acc.total, acc.area, len(values))
+
+    with metrics.timer("calculator.sort"):
+        if weights is None:
+            values = np.sort(values, kind="stable")
+        else:
+            order = np.argsort(values, kind="stable")
+            values, weights = values[order], weights[order]
+    with metrics.timer("calculator.accumulate"):
+        if weights is None:
+            # C antes de cada valor = i (0, 1, 2, ...): A = Σ x·(2i + 1)
+            area = float(np.dot(values, 2.0 * np.arange(len(values), dtype=np.float64) + 1.0))
+            return GiniAccumulator(float(len(values)), float(values.sum()), area, len(values))
+        previous = np.cumsum(weights) - weights
+        area = float(np.sum(values * weights * (2.0 * previous + weights)))
+        return GiniAccumulator(float(weights.sum()), float(np.dot(values, weights)), area, len(values))
+
+
+def gini_from_arrays(values, weights=None) -> float:
+    """GINI de arreglos en memoria (los NaN y pesos <= 0 se descartan)."""
+    values, weights, _ = clean(np.asarray(values, dtype=np.float64),
+                               None if weights is None else np.asarray(weights, dtype=np.float64))
+    return sort_and_accumulate(values, weights).gini()
+
+
+# --- Fuentes de datos ---
+class Source(NamedTuple):
+    """Descripción serializable (se pasa a los procesos) de dónde leer ingreso y peso."""
+    path: str
+    kind: str                    # 'csv', 'npy' o 'raw'
+    column: int
+    weight_column: Optional[int]
+    delimiter: str = ","
+    data_start: int = 0          # CSV: byte donde empiezan los datos (después del encabezado)
+    dtype: str = "<f8"           # raw: tipo de cada campo
+    columns: int = 1             # raw / npy 2-D: campos por fila
+    size: int = 0                # CSV: bytes; binarios: filas
+
+
+def open_source(path: str, column: Column = 0, weight_column: Optional[Column] = None, delimiter: str = ",",
+                header: Optional[bool] = None, dtype: Optional[str] = None, columns: int = 1) -> Source:
+    """
+    Valida el archivo y resuelve las columnas. CSV: 'column' puede ser nombre (requiere
+    encabezado) o índice; el encabezado se detecta si no se indica. Binarios: índices de
+    campo dentro de cada fila (.npy 1-D o 2-D, o crudo con 'columns' campos por fila).
+    Lanza ValueError u OSError con un mensaje para el usuario.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".npy":
+        array = np.load(path, mmap_mode="r")
+        if array.ndim not in (1, 2):
+            raise ValueError(f"'{path}': se esperaba un arreglo 1-D o 2-D, no {array.ndim}-D.")
+        fields = 1 if array.ndim == 1 else array.shape[1]
+        return Source(path, "npy", _field_index(column, fields), _field_index(weight_column, fields),
+                      columns=fields, size=array.shape[0])
+    if extension in BINARY_DTYPES or dtype:
+        dtype = np.dtype(dtype or BINARY_DTYPES[extension]).str
+        row_bytes = np.dtype(dtype).itemsize * columns
+        file_size = os.path.getsize(path)
+        if file_size % row_bytes:
+            raise ValueError(f"'{path}': {file_size} bytes no es múltiplo de {row_bytes} ({columns} × {dtype}).")
+        return Source(path, "raw", _field_index(column, columns), _field_index(weight_column, columns),
+                      dtype=dtype, columns=columns, size=file_size // row_bytes)
+
+    with open(path, "rb") as handle:
+        first_line = handle.readline()
+    names = [name.strip().strip('"') for name in first_line.decode("utf-8-sig", "replace").rstrip("\r\n").split(delimiter)]
+    if header is None:
+        # Un índice fuera de rango no decide nada: _csv_index lo rechaza con su propio mensaje
+        index = _as_index(column, 0)
+        header = (isinstance(column, str) and not column.isdigit()
+                  or 0 <= index < len(names) and not _is_number(names[index]))
+    data_start = len(first_line) if header else 0
+    return Source(path, "csv", _csv_index(column, names, header), _csv_index(weight_column, names, header),
+                  delimiter=delimiter, data_start=data_start, size=os.path.getsize(path))
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text)
+        return True
+    except ValueError:
+        return False
+
+
+def _as_index(column: Optional[Column], default: int) -> int:
+    if column is None:
+        return default
+    return int(column) if isinstance(column, int) or column.isdigit() else default
+
+
+def _field_index(column: Optional[Column], fields: int) -> Optional[int]:
+    if column is None:
+        return None
+    if isinstance(column, str) and not column.isdigit():
+        raise ValueError(f"Los archivos binarios no tienen nombres de columna: usa un índice (no '{column}').")
+    index = int(column)
+    if not 0 <= index < fields:
+        raise ValueError(f"Columna {index} fuera de rango (el archivo tiene {fields} por fila).")
+    return index
+
+
+def _csv_index(column: Optional[Column], names: List[str], header: bool) -> Optional[int]:
+    if column is None:
+        return None
+    if isinstance(column, int) or column.isdigit():
+        index = int(column)
+        if not 0 <= index < len(names):
+            raise ValueError(f"Columna {index} fuera de rango (la primera fila tiene {len(names)} campos).")
+        return index
+    if not header:
+        raise ValueError(f"La columna '{column}' se indicó por nombre, pero el archivo no tiene encabezado.")
+    try:
+        return names.index(column)
+    except ValueError:
+        raise ValueError(f"No existe la columna '{column}'. Columnas: {', '.join(names)}") from None
+
+
+def parse_csv_block(block: bytes, source: Source) -> Tuple[np.ndarray, Optional[np.ndarray], int]:
+    """Extrae (ingresos, pesos, filas inválidas) de un bloque de líneas CSV completas."""
+    capacity = block.count(b"\n") + 1
+    values = np.empty(capacity, dtype=np.float64)
+    weights = np.empty(capacity, dtype=np.float64) if source.weight_column is not None else None
+    kernel = load_kernel()
+    if kernel is not None:
+        bad = ctypes.c_size_t(0)
+        rows = kernel.gini_parse_csv(block, len(block), source.delimiter.encode(), source.column,
+                                     -1 if source.weight_column is None else source.weight_column,
+                                     _pointer(values), _pointer(weights), capacity, ctypes.byref(bad))
+        return values[:rows], (weights[:rows] if weights is not None else None), bad.value
+
+    rows = bad = 0
+    needed = max(source.column, source.weight_column or 0)
+    for line in block.decode("utf-8", "replace").splitlines():
+        if not line.strip():
+            continue
+        fields = line.split(source.delimiter)
+        try:
+            if len(fields) <= needed:
+                raise ValueError
+            values[rows] = float(fields[source.column].strip().strip('"'))
+            if weights is not None:
+                weights[rows] = float(fields[source.weight_column].strip().strip('"'))
+            rows += 1
+        except ValueError:
+            bad += 1
+    return values[:rows], (weights[:rows] if weights is not None else None), bad
+
+
+def split_ranges(source: Source, parts: int) -> List[Tuple[int, int]]:
+    """Parte la fuente en rangos [inicio, fin): bytes para CSV (se alinean a líneas al leer), filas para binarios."""
+    start = source.data_start if source.kind == "csv" else 0
+    total = source.size - start
+    parts = max(1, min(parts, total))
+    bounds = [start + total * i // parts for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1]) for i in range(parts) if bounds[i + 1] > bounds[i]]
+
+
+def iter_chunks(source: Source, start: int = 0, end: Optional[int] = None
+                ) -> Iterator[Tuple[np.ndarray, Optional[np.ndarray], int]]:
+    """
+    Recorre [start, end) de la fuente por bloques: (ingresos, pesos, filas inválidas).
+    En CSV cada rango procesa las líneas que empiezan dentro de él.
+    """
+    if source.kind == "csv":
+        start = max(start, source.data_start)
+        end = source.size if end is None else end
+        with open(source.path, "rb") as handle:
+            if start > source.data_start:
+                handle.seek(start - 1)
+                handle.readline() # La línea que empezó antes de 'start' es del rango anterior
+            else:
+                handle.seek(start)
+            position = handle.tell()
+            while position < end:
+                block = handle.read(min(CSV_BLOCK_BYTES, end - position))
+                if not block:
+                    break
+                if not block.endswith(b"\n"):
+                    block += handle.readline() # Completa la última línea (empezó dentro del rango)
+                position = handle.tell()
+                with metrics.timer("calculator.parse"):
+                    yield parse_csv_block(block, source)
+        return
+
+    matrix = _open_matrix(source)
+    end = len(matrix) if end is None else end
+    for offset in range(start, end, CHUNK_ROWS):
+        block = matrix[offset:min(offset + CHUNK_ROWS, end)]
+        values = np.array(block[:, source.column], dtype=np.float64)
+        weights = np.array(block[:, source.weight_column], dtype=np.float64) if source.weight_column is not None else None
+        yield values, weights, 0
+
+
+def estimate_rows(source: Source) -> int:
+    """Filas de la fuente (exactas en binarios, estimadas por el largo medio de línea en CSV)."""
+    if source.kind != "csv":
+        return source.size
+    with open(source.path, "rb") as handle:
+        handle.seek(source.data_start)
+        sample = handle.read(1 << 20)
+    lines = sample.count(b"\n")
+    if not lines:
+        return 1
+    return max(1, (source.size - source.data_start) * lines // len(sample))
+
+
+def sample_values(source: Source, size: int = SAMPLE_SIZE) -> np.ndarray:
+    """Muestra de ingresos repartida por todo el archivo (para elegir los cortes entre cubetas)."""
+    if source.kind != "csv":
+        matrix = _open_matrix(source)
+        values = np.array(matrix[::max(1, source.size // size), source.column], dtype=np.float64)
+        return values[np.isfinite(values)]
+    window = max(64 * 1024, min(CSV_BLOCK_BYTES, (source.size - source.data_start) // CSV_SAMPLE_WINDOWS))
+    pieces = []
+    for start, _ in split_ranges(source, CSV_SAMPLE_WINDOWS):
+        for values, _, _ in iter_chunks(source, start, min(source.size, start + window)):
+            pieces.append(values)
+            break
+    values = np.concatenate(pieces) if pieces else np.empty(0)
+    return values[np.isfinite(values)]
+
+
+def _open_matrix(source: Source) -> np.ndarray:
+    """Vista mapeada (filas × campos) de una fuente binaria."""
+    if source.kind == "npy":
+        matrix = np.load(source.path, mmap_mode="r")
+        return matrix.reshape(-1, 1) if matrix.ndim == 1 else matrix
+    return np.memmap(source.path, dtype=source.dtype, mode="r").reshape(-1, source.columns)
+
+
+# --- Camino particionado (varios procesos, archivos más grandes que la memoria) ---
+def _bucket_paths(directory: str, bucket: int, part: int) -> Tuple[str, str]:
+    base = os.path.join(directory, f"b{bucket:04d}_p{part:04d}")
+    return base + ".x", base + ".w"
+
+
+def _scatter_range(source: Source, start: int, end: int, cuts: np.ndarray, directory: str,
+                   part: int) -> Tuple[int, int]:
+    """Reparte [start, end) en cubetas por rango de valor (archivos por cubeta y parte). Devuelve (filas, descartadas)."""
+    rows = skipped = 0
+    handles: Dict[int, Tuple[Any, Any]] = {}
+    try:
+        for values, weights, bad in iter_chunks(source, start, end):
+            values, weights, dropped = clean(values, weights)
+            skipped += bad + dropped
+            rows += len(values)
+            with metrics.timer("calculator.scatter"):
+                buckets = np.searchsorted(cuts, values, side="right")
+                order = np.argsort(buckets, kind="stable")
+                bounds = np.searchsorted(buckets[order], np.arange(len(cuts) + 2))
+                for bucket in np.flatnonzero(np.diff(bounds)):
+                    selected = order[bounds[bucket]:bounds[bucket + 1]]
+                    if bucket not in handles:
+                        x_path, w_path = _bucket_paths(directory, bucket, part)
+                        handles[bucket] = (open(x_path, "wb"), open(w_path, "wb") if weights is not None else None)
+                    x_handle, w_handle = handles[bucket]
+                    values[selected].tofile(x_handle)
+                    if w_handle is not None:
+                        weights[selected].tofile(w_handle)
+    finally:
+        for x_handle, w_handle in handles.values():
+            x_handle.close()
+            if w_handle is not None:
+                w_handle.close()
+    return rows, skipped
+
+
+def _reduce_bucket(paths: List[Tuple[str, Optional[str]]], memory_limit: int, directory: str,
+                   depth: int = 0) -> GiniAccumulator:
+    """Ordena y acumula una cubeta. Si no entra en memoria, la vuelve a partir (o la recorre si es constante)."""
+    weighted = any(w_path is not None for _, w_path in paths)
+    total_bytes = sum(os.path.getsize(x_path) for x_path, _ in paths) * (2 if weighted else 1)
+    if total_bytes * SORT_OVERHEAD <= memory_limit or depth >= 4:
+        values = np.concatenate([np.fromfile(x_path, dtype=np.float64) for x_path, _ in paths])
+        weights = np.concatenate([np.fromfile(w_path, dtype=np.float64) for _, w_path in paths]) if weighted else None
+        return sort_and_accumulate(values, weights)
+
+    # Cubeta demasiado grande (datos muy concentrados): nuevos cortes con una muestra propia
+    sample = np.concatenate([np.fromfile(x_path, dtype=np.float64, count=SAMPLE_SIZE // len(paths))
+                             for x_path, _ in paths])
+    if sample.min() == sample.max() and all(_is_constant(x_path, sample[0]) for x_path, _ in paths):
+        # Todos iguales: A no depende del orden, se acumula por bloques sin ordenar
+        result = GiniAccumulator()
+        for x_path, w_path in paths:
+            for offset in range(0, os.path.getsize(x_path) // 8, CHUNK_ROWS):
+                values = np.fromfile(x_path, dtype=np.float64, count=CHUNK_ROWS, offset=offset * 8)
+                weights = np.fromfile(w_path, dtype=np.float64, count=CHUNK_ROWS, offset=offset * 8) if w_path else None
+                result.extend(sort_and_accumulate(values, weights))
+        return result
+    pieces = max(2, math.ceil(total_bytes * SORT_OVERHEAD / memory_limit))
+    cuts = _choose_cuts(sample, pieces)
+    sub_directory = tempfile.mkdtemp(prefix=f"sub{depth}_", dir=directory)
+    for part, (x_path, w_path) in enumerate(paths):
+        raw = Source(x_path, "raw", 0, None, dtype="<f8", size=os.path.getsize(x_path) // 8)
+        if w_path is None:
+            _scatter_range(raw, 0, raw.size, cuts, sub_directory, part)
+        else:
+            pair = _interleave(x_path, w_path, sub_directory, part)
+            _scatter_range(pair, 0, pair.size, cuts, sub_directory, part)
+            os.remove(pair.path)
+    result = _reduce_directory(sub_directory, len(cuts) + 1, memory_limit, depth + 1)
+    shutil.rmtree(sub_directory, ignore_errors=True)
+    return result
+
+
+def _is_constant(x_path: str, value: float) -> bool:
+    for offset in range(0, os.path.getsize(x_path) // 8, CHUNK_ROWS):
+        if np.any(np.fromfile(x_path, dtype=np.float64, count=CHUNK_ROWS, offset=offset * 8) != value):
+            return False
+    return True
+
+
+def _interleave(x_path: str, w_path: str, directory: str, part: int) -> Source:
+    """Une ingreso y peso en un binario de dos campos (para volver a repartirlos juntos)."""
+    path = os.path.join(directory, f"pair_{part:04d}.bin")
+    rows = os.path.getsize(x_path) // 8
+    with open(path, "wb") as handle:
+        for offset in range(0, rows, CHUNK_ROWS):
+            pair = np.empty((min(CHUNK_ROWS, rows - offset), 2))
+            pair[:, 0] = np.fromfile(x_path, dtype=np.float64, count=len(pair), offset=offset * 8)
+            pair[:, 1] = np.fromfile(w_path, dtype=np.float64, count=len(pair), offset=offset * 8)
+            pair.tofile(handle)
+    return Source(path, "raw", 0, 1, dtype="<f8", columns=2, size=rows)
+
+
+def _reduce_directory(directory: str, buckets: int, memory_limit: int, depth: int,
+                      executor: Optional[ProcessPoolExecutor] = None) -> GiniAccumulator:
+    """Reduce todas las cubetas de 'directory' (en paralelo si hay executor) y las combina en orden."""
+    files = sorted(os.listdir(directory))
+    groups = []
+    for bucket in range(buckets):
+        prefix = f"b{bucket:04d}_"
+        paths = [(os.path.join(directory, name), os.path.join(directory, name[:-2] + ".w")
+                  if os.path.exists(os.path.join(directory, name[:-2] + ".w")) else None)
+                 for name in files if name.startswith(prefix) and name.endswith(".x")]
+        if paths:
+            groups.append(paths)
+    if executor is not None:
+        partials = list(executor.map(_reduce_bucket, groups, [memory_limit] * len(groups),
+                                     [directory] * len(groups), [depth] * len(groups)))
+    else:
+        partials = [_reduce_bucket(paths, memory_limit, directory, depth) for paths in groups]
+    result = GiniAccumulator()
+    for partial in partials: # Las cubetas ya vienen en orden creciente de valor
+        result.extend(partial)
+    return result
+
+
+def _choose_cuts(sample: np.ndarray, buckets: int) -> np.ndarray:
+    """Cortes entre cubetas: cuantiles de la muestra, sin repetidos (valores iguales van a la misma cubeta)."""
+    if not len(sample) or buckets < 2:
+        return np.empty(0)
+    return np.unique(np.quantile(sample, np.arange(1, buckets) / buckets))
+
+
+# --- Cálculo ---
+def compute_gini(path: str, column: Column = 0, weight_column: Optional[Column] = None, delimiter: str = ",",
+                 header: Optional[bool] = None, dtype: Optional[str] = None, columns: int = 1,
+                 workers: Optional[int] = None, memory_limit: int = MEMORY_LIMIT_BYTES,
+                 temp_dir: Optional[str] = None) -> GiniResult:
+    """
+    Calcula el GINI de la columna de ingreso (ponderada si se indica 'weight_column').
+    Si la columna entra en memoria y el archivo es chico se resuelve en este proceso; si no,
+    se usa el camino particionado con 'workers' procesos (por defecto, uno por CPU).
+    Lanza ValueError / OSError si el archivo o las columnas no son válidos.
+    """
+    started = time.perf_counter()
+    source = open_source(path, column, weight_column, delimiter, header, dtype, columns)
+    workers = max(1, workers or os.cpu_count() or 1)
+    rows_estimate = estimate_rows(source)
+    bytes_needed = rows_estimate * 8 * (2 if source.weight_column is not None else 1) * SORT_OVERHEAD
+    kernel = "C" if load_kernel() is not None else "numpy"
+
+    if bytes_needed <= memory_limit and (workers == 1 or rows_estimate < PARALLEL_MIN_ROWS):
+        with metrics.timer("calculator.memory"):
+            values_parts, weight_parts, skipped = [], [], 0
+            for values, weights, bad in iter_chunks(source):
+                values, weights, dropped = clean(values, weights)
+                values_parts.append(values)
+                if weights is not None:
+                    weight_parts.append(weights)
+                skipped += bad + dropped
+            values = np.concatenate(values_parts) if values_parts else np.empty(0)
+            weights = np.concatenate(weight_parts) if weight_parts else None
+            result = sort_and_accumulate(values, weights)
+        method = "memory"
+    else:
+        with metrics.timer("calculator.partitioned"):
+            result, skipped = _compute_partitioned(source, workers, memory_limit, bytes_needed, temp_dir)
+        method = "partitioned"
+
+    return GiniResult(result.gini(), result.rows, skipped, result.weight, result.total,
+                      method, kernel, time.perf_counter() - started)
+
+
+def _compute_partitioned(source: Source, workers: int, memory_limit: int, bytes_needed: int,
+                         temp_dir: Optional[str]) -> Tuple[GiniAccumulator, int]:
+    # Cada proceso ordena una cubeta a la vez: que 'workers' cubetas entren juntas en la memoria
+    per_worker_limit = max(64 * 1024 * 1024, memory_limit // workers)
+    buckets = max(workers, math.ceil(bytes_needed / per_worker_limit))
+    cuts = _choose_cuts(sample_values(source), buckets)
+    directory = tempfile.mkdtemp(prefix="gini_calc_", dir=temp_dir)
+    log.info("Camino particionado: %d cubetas, %d procesos, temporales en '%s'.", len(cuts) + 1, workers, directory)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            ranges = split_ranges(source, workers)
+            scattered = list(executor.map(_scatter_range, [source] * len(ranges), [r[0] for r in ranges],
+                                          [r[1] for r in ranges], [cuts] * len(ranges), [directory] * len(ranges),
+                                          range(len(ranges))))
+            skipped = sum(dropped for _, dropped in scattered)
+            result = _reduce_directory(directory, len(cuts) + 1, per_worker_limit, 0, executor)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    return result, skipped
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Calcula el coeficiente GINI de una columna de ingresos.")
+    parser.add_argument("path", help="CSV, .npy o binario crudo (.f64/.bin float64, .f32 float32)")
+    parser.add_argument("-c", "--column", default="0", help="Columna de ingreso: nombre o índice (por defecto 0)")
+    parser.add_argument("-w", "--weight", default=None, help="Columna de ponderación (factor de expansión)")
+    parser.add_argument("-d", "--delimiter", default=",", help="Separador del CSV (por defecto ',')")
+    parser.add_argument("--no-header", action="store_true", help="El CSV no tiene encabezado")
+    parser.add_argument("--dtype", help="Tipo de los binarios crudos (p. ej. '<f8', '<f4')")
+    parser.add_argument("--fields", type=int, default=1, help="Campos por fila en binarios crudos")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="Procesos (por defecto, uno por CPU)")
+    parser.add_argument("--memory-mb", type=float, default=MEMORY_LIMIT_BYTES / 1024 / 1024,
+                        help="Memoria para ordenar; por encima se usa el camino particionado")
+    parser.add_argument("--temp-dir", help="Directorio para las cubetas temporales")
+    parser.add_argument("--json", action="store_true", help="Resultado como JSON")
+    args = parser.parse_args(argv)
+    if args.delimiter == "\\t":
+        args.delimiter = "\t"
+    if len(args.delimiter) != 1:
+        parser.error("--delimiter debe ser un solo carácter")
+
+    try:
+        result = compute_gini(args.path, args.column, args.weight, args.delimiter,
+                              False if args.no_header else None, args.dtype, args.fields,
+                              args.workers, int(args.memory_mb * 1024 * 1024), args.temp_dir)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    if args.json:
+        print(json.dumps(result._asdict()))
+    else:
+        print(f"GINI: {result.gini:.6f}  ({result.gini * 100:.2f} en escala 0-100)")
+        print(f"Filas: {result.rows:,} usadas, {result.skipped:,} descartadas; peso total {result.total_weight:,.0f}")
+        print(f"Método: {result.method}, núcleo {result.kernel}, {result.elapsed_s:.2f} s")
+    return 0 if result.rows and not math.isnan(result.gini) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
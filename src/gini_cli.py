@@ -0,0 +1,216 @@
+# src/gini_cli.py
+# Modo por lotes sin interfaz gráfica (no importa tkinter): lee códigos de país de los
+# argumentos, de un archivo o de stdin, obtiene los datos con concurrencia acotada,
+# elige el último GINI válido de cada país y escribe CSV o JSONL a medida que llegan.
+# Opcionalmente pasa cada valor por el redondeo nativo C/ASM (--native); sin esa opción
+# nunca se carga la biblioteca ni se lanza el servidor 32-bit.
+#
+# Uso: python src/gini_cli.py ARG BRA CHL
+#      python src/gini_cli.py --file paises.txt --format jsonl --native > gini.jsonl
+#      cat paises.txt | python src/main.py --format csv -
+#      python src/gini_cli.py --refresh > /dev/null   (revalida todo lo que hay en caché, p. ej. cada noche)
+#      python src/gini_cli.py --update-countries      (actualiza el índice local de códigos desde /v2/country)
+#      python src/gini_cli.py --indicators gini,quintiles --file paises.txt > tablero.csv
+#        (varios indicadores: una fila por país, indicador y año; ver core_logic.fetch_indicators)
+# Los códigos que no están en el índice local de países salen con status 'error' sin consultar la API.
+# Salida: 0 si todos los países se obtuvieron sin error, 1 si alguno falló, 2 si los argumentos no son válidos.
+
+import argparse
+import csv
+import json
+import logging
+import sys
+from typing import Optional, List, Dict, Any, Iterable, Iterator, TextIO
+
+import core_logic
+from indicator_store import IndicatorStore, Pair, expand_indicators, INDICATOR_PRESETS
+
+CSV_COLUMNS = ["country_code", "country_name", "year", "value", "rounded", "status", "error"]
+INDICATOR_COLUMNS = ["country_code", "country_name", "indicator", "year", "value", "status", "error"]
+
+STATUS_OK = "ok"            # Hay un último valor válido
+STATUS_NO_DATA = "no_data"  # La API respondió, pero sin valores para el periodo
+STATUS_ERROR = "error"      # La consulta falló (ver columna 'error')
+
+
+def iter_codes_from_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Códigos separados por espacios o comas, uno o varios por línea; '#' inicia un comentario."""
+    for line in lines:
+        for code in line.split("#", 1)[0].replace(",", " ").split():
+            yield code
+
+
+def iter_input_codes(args: argparse.Namespace, stdin: TextIO) -> Iterator[str]:
+    """Códigos de los argumentos, del archivo (--file) y de stdin ('-' o sin códigos con stdin redirigido)."""
+    read_stdin = "-" in args.codes or (not args.codes and not args.file and not stdin.isatty())
+    for code in args.codes:
+        if code != "-":
+            yield code
+    if args.file:
+        with open(args.file, encoding="utf-8") as handle:
+            yield from iter_codes_from_lines(handle)
+    if read_stdin:
+        yield from iter_codes_from_lines(stdin)
+
+
+def build_row(code: str, records: Optional[List[Dict[str, Any]]], error_message: Optional[str],
+              native: bool) -> Dict[str, Any]:
+    """Fila de salida de un país (mismas claves en CSV y JSONL)."""
+    row: Dict[str, Any] = dict.fromkeys(CSV_COLUMNS)
+    row["country_code"] = code
+    if error_message is not None or records is None:
+        row["status"] = STATUS_ERROR
+        row["error"] = error_message or "Error desconocido"
+        return row
+    latest = core_logic.find_latest_valid_gini(records)
+    if latest is None:
+        row["status"] = STATUS_NO_DATA
+        return row
+    row.update(country_name=latest["country_name"], year=int(latest["date"]), value=latest["value"], status=STATUS_OK)
+    if native:
+        row["rounded"] = core_logic.process_gini_with_c_asm(latest["value"])
+    return row
+
+
+def iter_indicator_rows(codes: List[str], indicators: List[str], store: IndicatorStore,
+                        errors: Dict[Pair, str]) -> Iterator[Dict[str, Any]]:
+    """Filas de --indicators: una por país, indicador y año con valor (o una de error / sin datos por par)."""
+    for code in dict.fromkeys(code.strip().upper() for code in codes):
+        for indicator in indicators:
+            row: Dict[str, Any] = dict.fromkeys(INDICATOR_COLUMNS)
+            row.update(country_code=code, indicator=indicator)
+            error_message = errors.get((code, indicator))
+            if error_message is not None:
+                yield dict(row, status=STATUS_ERROR, error=error_message)
+                continue
+            points = store.series(code, indicator)
+            if not points:
+                yield dict(row, status=STATUS_NO_DATA)
+                continue
+            for year, value in points:
+                yield dict(row, country_name=store.country_name(code), year=year, value=value, status=STATUS_OK)
+
+
+class _RowWriter:
+    """Escribe filas CSV o JSONL y vacía el buffer en cada una (salida en streaming)."""
+    def __init__(self, stream: TextIO, output_format: str, columns: List[str] = CSV_COLUMNS):
+        self.stream = stream
+        self.format = output_format
+        self._csv = None
+        if output_format == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=columns, lineterminator="\n")
+            self._csv.writeheader()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        if self._csv is not None:
+            self._csv.writerow(row)
+        else:
+            self.stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.stream.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="gini_cli",
+                                     description="Obtiene el último índice GINI válido de una lista de países (sin GUI).")
+    parser.add_argument("codes", nargs="*", help="Códigos ISO de país ('-' lee de stdin)")
+    parser.add_argument("-f", "--file", help="Archivo con códigos (separados por espacios, comas o líneas)")
+    parser.add_argument("-o", "--output", help="Archivo de salida (por defecto stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv", help="Formato de salida (por defecto csv)")
+    parser.add_argument("--native", action="store_true", help="Redondea cada valor con el backend nativo C/ASM")
+    parser.add_argument("-i", "--indicators",
+                        help="Indicadores separados por comas (ids o grupos: " + ", ".join(INDICATOR_PRESETS) +
+                             "). Se piden juntos, varios países por consulta, y la salida tiene una fila por "
+                             "país, indicador y año")
+    parser.add_argument("-j", "--workers", type=int, default=core_logic.MAX_CONCURRENT_REQUESTS,
+                        help=f"Consultas simultáneas a la API (por defecto {core_logic.MAX_CONCURRENT_REQUESTS})")
+    parser.add_argument("--date-range", default=core_logic.DATE_RANGE,
+                        help=f"Rango de años 'AAAA:AAAA' (por defecto {core_logic.DATE_RANGE})")
+    parser.add_argument("--no-cache", action="store_true", help="No usa ni actualiza la caché persistente")
+    parser.add_argument("--refresh", action="store_true",
+                        help="Revalida contra la API aunque la caché no haya vencido (solo años nuevos, "
+                             "peticiones condicionales). Sin códigos, revalida todos los países en caché")
+    parser.add_argument("--update-countries", action="store_true",
+                        help="Actualiza el índice local de códigos de país desde la API antes de consultar "
+                             "(sin códigos, solo actualiza)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mensajes informativos en stderr")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None, stdin: TextIO = sys.stdin) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers debe ser al menos 1")
+    if args.refresh and args.no_cache:
+        parser.error("--refresh y --no-cache no se pueden combinar")
+    indicators = expand_indicators([args.indicators]) if args.indicators else []
+    if args.indicators and not indicators:
+        parser.error("--indicators no contiene ningún indicador")
+    if indicators and args.native:
+        parser.error("--native solo aplica al último GINI: no se combina con --indicators")
+    if args.verbose:
+        logging.getLogger("gini").setLevel(logging.INFO)
+    core_logic.DATE_RANGE = args.date_range
+
+    if args.update_countries:
+        count, error_message = core_logic.refresh_country_index()
+        if error_message is not None:
+            print(f"No se pudo actualizar el índice de países: {error_message}", file=sys.stderr)
+        elif args.verbose:
+            print(f"Índice de países actualizado: {count} códigos.", file=sys.stderr)
+        if not args.codes and not args.file and not args.refresh and stdin.isatty(): # Nada más que hacer
+            return 1 if error_message is not None else 0
+
+    try:
+        output = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    except OSError as e:
+        print(f"No se pudo abrir '{args.output}': {e}", file=sys.stderr)
+        return 2
+    writer = _RowWriter(output, args.format, INDICATOR_COLUMNS if indicators else CSV_COLUMNS)
+    if args.native:
+        core_logic.prewarm_native_backend() # En paralelo con las primeras consultas HTTP
+
+    total = failed = 0
+    try:
+        codes = iter_input_codes(args, stdin)
+        if args.refresh and not args.codes and not args.file: # Para leer de stdin, pasar "-"
+            codes = iter(core_logic.cached_country_codes())
+        if indicators:
+            # Las consultas se agrupan por países × indicadores: hace falta la lista completa de códigos
+            codes = list(codes)
+            store, errors = core_logic.fetch_indicators(codes, indicators, max_workers=args.workers,
+                                                        use_cache=not args.no_cache, force_refresh=args.refresh)
+            for row in iter_indicator_rows(codes, indicators, store, errors):
+                writer.write(row)
+                failed += row["status"] == STATUS_ERROR
+            total = len(set(code.strip().upper() for code in codes))
+            codes = iter(())
+        results = core_logic.iter_gini_data_many(codes, max_workers=args.workers, use_cache=not args.no_cache,
+                                                 force_refresh=args.refresh)
+        for code, records, error_message in results:
+            row = build_row(code, records, error_message, args.native)
+            writer.write(row)
+            total += 1
+            failed += row["status"] == STATUS_ERROR
+    except OSError as e:
+        print(f"Error de entrada/salida: {e}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("\nInterrumpido.", file=sys.stderr)
+        return 130
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if args.native:
+            core_logic.shutdown_server32_pool()
+
+    if total == 0:
+        print("No se indicó ningún código de país (argumentos, --file o stdin).", file=sys.stderr)
+        return 2
+    if args.verbose:
+        print(f"{total} países procesados, {failed} con error.", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
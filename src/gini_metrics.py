@@ -0,0 +1,142 @@
+# src/gini_metrics.py
+# Instrumentación liviana para todo el pipeline: contadores, histogramas de latencia,
+# un context manager para cronometrar etapas y un snapshot exportable como JSON.
+# También configura el logging por niveles que reemplaza a los print(..., file=sys.stderr):
+# el nivel se elige con GINI_LOG_LEVEL (por defecto WARNING) y en los caminos calientes
+# se consulta DEBUG_ENABLED antes de armar el mensaje, así no se paga ni el formateo.
+# Solo usa la biblioteca estándar: lo importan tanto el Python 64-bit como el 32-bit.
+
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+
+# --- Logging ---
+LOG_LEVEL = os.environ.get("GINI_LOG_LEVEL", "WARNING").upper()
+_LOG_FORMAT = "%(levelname)s [%(name)s] %(message)s"
+
+_root_logger = logging.getLogger("gini")
+if not _root_logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+    _root_logger.addHandler(_handler)
+    _root_logger.propagate = False
+_root_logger.setLevel(getattr(logging, LOG_LEVEL, logging.WARNING))
+
+# Chequeo barato para los caminos calientes: `if DEBUG_ENABLED: log.debug(f"...")`
+DEBUG_ENABLED = _root_logger.isEnabledFor(logging.DEBUG)
+
+
+def get_logger(component: str) -> logging.Logger:
+    """Logger de un componente ('CoreLogic', 'Client64', 'Server32', 'GUI', ...)."""
+    return _root_logger.getChild(component)
+
+
+# --- Métricas ---
+# Límites superiores (en segundos) de los buckets del histograma: potencias de 2 desde 1 µs
+_BUCKET_BOUNDS = [1e-6 * 2 ** i for i in range(28)] # 1 µs .. ~134 s
+
+
+class Histogram:
+    """Histograma de duraciones con buckets logarítmicos fijos (memoria constante)."""
+    __slots__ = ("count", "total", "minimum", "maximum", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = 0.0
+        self.buckets = [0] * (len(_BUCKET_BOUNDS) + 1)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.minimum = min(self.minimum, seconds)
+        self.maximum = max(self.maximum, seconds)
+        index = 0 if seconds <= 1e-6 else min(len(_BUCKET_BOUNDS), max(0, math.ceil(math.log2(seconds / 1e-6))))
+        self.buckets[index] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Estimación del percentil (límite superior del bucket, acotado por el máximo)."""
+        if self.count == 0:
+            return 0.0
+        target = fraction * self.count
+        accumulated = 0
+        for index, bucket_count in enumerate(self.buckets):
+            accumulated += bucket_count
+            if accumulated >= target:
+                bound = _BUCKET_BOUNDS[index] if index < len(_BUCKET_BOUNDS) else self.maximum
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def summary(self) -> Dict[str, Any]:
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1e3,
+            "min_ms": self.minimum * 1e3,
+            "p50_ms": self.percentile(0.50) * 1e3,
+            "p95_ms": self.percentile(0.95) * 1e3,
+            "p99_ms": self.percentile(0.99) * 1e3,
+            "max_ms": self.maximum * 1e3,
+        }
+
+
+class MetricsRegistry:
+    """Registro de contadores e histogramas, seguro para varios hilos."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+        self._histograms: Dict[str, Histogram] = {}
+        self._started = time.time()
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Cronometra el bloque y lo registra en el histograma 'name' (también si lanza)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "uptime_s": time.time() - self._started,
+                "counters": dict(sorted(self._counters.items())),
+                "timers": {name: h.summary() for name, h in sorted(self._histograms.items())},
+            }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.snapshot(), indent=indent)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._started = time.time()
+
+
+# Registro global del proceso
+metrics = MetricsRegistry()
+incr = metrics.incr
+observe = metrics.observe
+timer = metrics.timer
+snapshot = metrics.snapshot
@@ -0,0 +1,303 @@
+# src/gini_resilience.py
+# Control de la latencia de cola en las consultas a la API del Banco Mundial.
+# ResiliencePolicy.call(attempt, budget) ejecuta 'attempt(timeout)' con:
+#   - timeout adaptativo  : p99 de las latencias recientes (LatencyWindow) × margen, acotado; los
+#     intentos que vencen cuentan con su timeout, y cada reintento (y la prueba del circuito) usa
+#     el doble que el anterior, así el timeout sigue a un servicio que se volvió más lento;
+#   - petición de cobertura (hedging): si el intento no terminó al llegar al p95 observado, se lanza
+#     un segundo intento idéntico y gana el primero que responda (con un presupuesto de coberturas
+#     para no duplicar la carga cuando todo anda lento);
+#   - reintentos con backoff exponencial y jitter completo, solo para errores transitorios
+#     (timeout, conexión, 5xx, 429) y sin pasarse del presupuesto de tiempo total;
+#   - circuit breaker: tras varios fallos seguidos la API se da por caída y las consultas fallan
+#     al instante (quien tenga una copia vencida la sirve) hasta que una prueba vuelve a funcionar.
+# No conoce HTTP: el llamador marca los errores transitorios con el atributo 'retryable' = True
+# y los timeouts con 'timed_out' = True.
+
+import random
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Optional, Dict, Any, Callable, TypeVar
+
+from gini_metrics import get_logger, metrics
+
+log = get_logger("Resilience")
+
+T = TypeVar("T")
+
+# --- Configuración por defecto ---
+LATENCY_WINDOW_SIZE = 200     # Latencias recientes consideradas
+MIN_SAMPLES = 20              # Por debajo de esto no se adapta el timeout ni se cubre
+TIMEOUT_MULTIPLIER = 3.0      # Timeout = p99 × margen
+MIN_TIMEOUT = 1.0             # Cotas del timeout adaptativo (s)
+MAX_TIMEOUT = 15.0
+HEDGE_QUANTILE = 0.95         # Cobertura al superar este cuantil
+HEDGE_MIN_DELAY = 0.010       # Nunca cubrir antes de esto (s)
+HEDGE_BUDGET = 0.10           # Fracción máxima de intentos con cobertura
+MAX_RETRIES = 2               # Reintentos después del primer intento
+BACKOFF_BASE = 0.2            # Backoff exponencial con jitter completo: U(0, base·2^n), tope BACKOFF_MAX
+BACKOFF_MAX = 3.0
+BREAKER_FAILURES = 5          # Consultas seguidas que fallan (agotados los reintentos) y abren el circuito
+BREAKER_RESET = 30.0          # Segundos abierto antes de dejar pasar una prueba
+
+
+class CircuitOpenError(Exception):
+    """El circuito está abierto: no se intentó la consulta."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"'{name}' no disponible (circuito abierto, próximo intento en {retry_in:.0f} s).")
+        self.retry_in = retry_in
+
+
+def is_retryable(error: BaseException) -> bool:
+    """True si el error es transitorio (vale la pena reintentar: el servicio puede recuperarse)."""
+    return bool(getattr(error, "retryable", False))
+
+
+def is_timeout(error: BaseException) -> bool:
+    """True si el intento se cortó por timeout (su latencia real es al menos el timeout)."""
+    return bool(getattr(error, "timed_out", False))
+
+
+class LatencyWindow:
+    """Últimas N latencias de intentos (los vencidos, con su timeout), con cuantiles sobre una copia ordenada."""
+
+    def __init__(self, size: int = LATENCY_WINDOW_SIZE):
+        self._samples: deque = deque(maxlen=size)
+        self._sorted: list = []
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            if len(self._samples) == self._samples.maxlen:
+                oldest = self._samples[0]
+                del self._sorted[bisect_left(self._sorted, oldest)]
+            self._samples.append(seconds)
+            insort(self._sorted, seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Cuantil q (0-1) por el método del rango más cercano; None si no hay muestras."""
+        with self._lock:
+            if not self._sorted:
+                return None
+            return self._sorted[min(len(self._sorted) - 1, int(q * len(self._sorted)))]
+
+
+class CircuitBreaker:
+    """
+    Cerrado -> (BREAKER_FAILURES consultas fallidas seguidas) -> abierto -> (BREAKER_RESET s) -> semiabierto:
+    pasa una sola prueba; si funciona se cierra, si falla vuelve a abrirse.
+    """
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self) -> bool:
+        """
+        Lanza CircuitOpenError si no se debe intentar. En semiabierto deja pasar una sola
+        consulta de prueba y devuelve True para ella (False para las consultas normales).
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            elapsed = self._clock() - self._opened_at
+            if elapsed >= self.reset_timeout and not self._probe_in_flight:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = True
+                return True
+            metrics.incr("resilience.breaker.rejected")
+            raise CircuitOpenError(self.name, max(0.0, self.reset_timeout - elapsed))
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != self.CLOSED:
+                log.info("Circuito '%s' cerrado: el servicio volvió a responder.", self.name)
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    metrics.incr("resilience.breaker.opened")
+                    log.warning("Circuito '%s' abierto tras %d fallos: se falla rápido durante %.0f s.",
+                                self.name, self._failures, self.reset_timeout)
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"state": self.state, "consecutive_failures": self._failures}
+
+
+class ResiliencePolicy:
+    """Reintentos, cobertura, timeout adaptativo y circuit breaker para un servicio (ver cabecera)."""
+
+    def __init__(self, name: str, max_retries: int = MAX_RETRIES, hedge: bool = True,
+                 breaker: Optional[CircuitBreaker] = None, window: Optional[LatencyWindow] = None,
+                 default_timeout: float = MAX_TIMEOUT, max_workers: int = 8):
+        self.name = name
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.default_timeout = default_timeout
+        self.breaker = breaker or CircuitBreaker(name)
+        self.window = window or LatencyWindow()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}Hedge") if hedge else None
+        self._attempts = 0
+        self._hedges = 0
+        self._lock = threading.Lock()
+
+    # --- Parámetros adaptativos ---
+    def attempt_timeout(self, escalation: int = 0) -> float:
+        """
+        Timeout de un intento: p99 × margen una vez que hay muestras, si no el de por defecto.
+        'escalation' lo duplica esa cantidad de veces (reintentos, prueba del circuito), hasta MAX_TIMEOUT.
+        """
+        if len(self.window) < MIN_SAMPLES:
+            timeout = self.default_timeout
+        else:
+            timeout = min(MAX_TIMEOUT, max(MIN_TIMEOUT, self.window.quantile(0.99) * TIMEOUT_MULTIPLIER))
+        return max(timeout, min(MAX_TIMEOUT, timeout * 2 ** escalation)) if escalation else timeout
+
+    def hedge_delay(self) -> Optional[float]:
+        """Espera antes de la cobertura (p95 observado), o None si no corresponde cubrir."""
+        if not self.hedge or len(self.window) < MIN_SAMPLES:
+            return None
+        with self._lock:
+            if self._hedges >= HEDGE_BUDGET * max(1, self._attempts):
+                return None
+        return max(HEDGE_MIN_DELAY, self.window.quantile(HEDGE_QUANTILE))
+
+    @staticmethod
+    def backoff(retry: int) -> float:
+        return random.uniform(0.0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** retry)))
+
+    # --- Ejecución ---
+    def call(self, attempt: Callable[[float], T], budget: Optional[float] = None) -> T:
+        """
+        Ejecuta 'attempt(timeout)' con la política completa, sin pasarse de 'budget' segundos en
+        total (None = sin límite). Relanza el último error si se agotan los intentos, o
+        CircuitOpenError si el circuito está abierto.
+        """
+        deadline = None if budget is None else time.monotonic() + budget
+        # El circuito cuenta consultas, no intentos: una falla aislada que un reintento resuelve no
+        # lo acerca a abrirse. La prueba en semiabierto no se reintenta (si falla, vuelve a abrirse),
+        # pero va con el timeout duplicado: si el servicio solo se volvió más lento, debe poder pasar.
+        probe = self.breaker.before_call()
+        retries = 0 if probe else self.max_retries
+        retry = 0
+        while True:
+            timeout = self.attempt_timeout(retry + int(probe))
+            if deadline is not None:
+                timeout = max(0.05, min(timeout, deadline - time.monotonic()))
+            try:
+                result = self._hedged(attempt, timeout)
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.record_success() # El servicio respondió (p. ej. código inválido)
+                    raise
+                pause = self.backoff(retry)
+                if retry >= retries or (deadline is not None and time.monotonic() + pause >= deadline):
+                    self.breaker.record_failure()
+                    raise
+                retry += 1
+                metrics.incr("resilience.retries")
+                log.info("%s: intento fallido (%s). Reintento %d en %.2f s.", self.name, e, retry, pause)
+                time.sleep(pause)
+                continue
+            self.breaker.record_success()
+            return result
+
+    def _timed(self, attempt: Callable[[float], T], timeout: float, won: Optional[threading.Event] = None) -> T:
+        """
+        Un intento medido. 'won' se marca con el primer éxito de una consulta cubierta: el intento
+        que pierde esa carrera no entra en la ventana (si no, la cola que la cobertura esquiva
+        subiría el p95 y con él la espera antes de cubrir).
+        """
+        start = time.perf_counter()
+        with self._lock:
+            self._attempts += 1
+        try:
+            result = attempt(timeout)
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            # Si solo se aprendiera de los éxitos, un servicio más lento que el timeout no volvería a
+            # responder. Un corte a mitad del cuerpo puede no venir marcado: cuenta si agotó el tiempo.
+            if (is_timeout(e) or elapsed >= timeout) and (won is None or not won.is_set()):
+                self.window.add(max(timeout, elapsed))
+                metrics.incr("resilience.timeouts")
+            raise
+        elapsed = time.perf_counter() - start
+        if won is None or not won.is_set():
+            if won is not None:
+                won.set()
+            self.window.add(elapsed)
+        metrics.observe("resilience.attempt", elapsed)
+        return result
+
+    def _hedged(self, attempt: Callable[[float], T], timeout: float) -> T:
+        """Un intento; si tarda más que hedge_delay(), otro en paralelo. Gana el primer éxito."""
+        delay = self.hedge_delay()
+        if delay is None or delay >= timeout or self._executor is None:
+            return self._timed(attempt, timeout)
+
+        won = threading.Event()
+        primary: Future = self._executor.submit(self._timed, attempt, timeout, won)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+        with self._lock:
+            self._hedges += 1
+        metrics.incr("resilience.hedges")
+        hedge: Future = self._executor.submit(self._timed, attempt, timeout, won)
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        metrics.incr("resilience.hedge_wins")
+                    return future.result() # El otro intento sigue hasta su timeout y se descarta
+                error = future.exception()
+        raise error
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p95, p99 = (self.window.quantile(q) for q in (0.5, 0.95, 0.99))
+        return {
+            "breaker": self.breaker.snapshot(),
+            "samples": len(self.window),
+            "latency_p50_s": p50, "latency_p95_s": p95, "latency_p99_s": p99,
+            "attempt_timeout_s": self.attempt_timeout(),
+            "hedge_delay_s": self.hedge_delay(),
+            "attempts": self._attempts, "hedges": self._hedges,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
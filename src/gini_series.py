@@ -0,0 +1,186 @@
+# src/gini_series.py
+# Estructura compacta para series GINI: en lugar de una lista de diccionarios anidados
+# (uno por registro de la API), guarda una tabla de países internada y arrays paralelos
+# de índice de país, año (int16) y valor (float64, NaN si falta).
+# El último valor válido de cada país se calcula una sola vez al construir la serie.
+# lttb() reduce una serie a tantos puntos como píxeles tenga el gráfico que la dibuja.
+
+import math
+import sys
+from array import array
+from typing import Optional, List, Dict, Any, Iterable, Iterator, NamedTuple, Sequence, Tuple
+
+
+class GiniPoint(NamedTuple):
+    """Un punto de la serie: país, año y valor (NaN si la API no informó valor)."""
+    country_code: str
+    country_name: str
+    year: int
+    value: float
+
+
+class GiniSeries:
+    """
+    Serie GINI de uno o varios países, ordenada por (país, año).
+
+    - countries: lista de (código, nombre) con strings internados, uno por país.
+    - country_idx / years / values: arrays paralelos, una fila por (país, año).
+    - El último año con valor válido por país (y global) queda precalculado, así
+      latest() es O(1).
+    """
+    __slots__ = ("countries", "country_idx", "years", "values", "_code_to_index", "_latest_row", "_latest_overall")
+
+    def __init__(self, countries: List[Tuple[str, str]], country_idx: array, years: array, values: array):
+        self.countries = countries
+        self.country_idx = country_idx
+        self.years = years
+        self.values = values
+        self._code_to_index = {code: i for i, (code, _) in enumerate(countries)}
+        # Fila del último valor válido por país (-1 si el país no tiene ninguno)
+        self._latest_row = array('i', [-1]) * len(countries)
+        self._latest_overall = -1
+        for row in range(len(years)):
+            if math.isnan(values[row]):
+                continue
+            c = country_idx[row]
+            current = self._latest_row[c]
+            if current < 0 or years[row] > years[current]:
+                self._latest_row[c] = row
+            if self._latest_overall < 0 or years[row] > years[self._latest_overall]:
+                self._latest_overall = row
+
+    @classmethod
+    def from_records(cls, records: Optional[Iterable[Dict[str, Any]]]) -> "GiniSeries":
+        """
+        Construye la serie a partir de registros de la API (lista o generador), parseando
+        cada valor y año una sola vez. Se ignoran registros sin año numérico.
+        """
+        countries: List[Tuple[str, str]] = []
+        code_to_index: Dict[str, int] = {}
+        rows = []
+        for record in records or ():
+            if not isinstance(record, dict):
+                continue
+            try:
+                year = int(record.get('date'))
+            except (ValueError, TypeError):
+                continue
+            country = record.get('country') or {}
+            code = record.get('countryiso3code') or country.get('id') or ''
+            index = code_to_index.get(code)
+            if index is None:
+                index = len(countries)
+                code_to_index[code] = index
+                countries.append((sys.intern(code), sys.intern(country.get('value') or 'N/A')))
+            try:
+                value = float(record.get('value'))
+            except (ValueError, TypeError):
+                value = math.nan
+            rows.append((index, year, value))
+
+        rows.sort(key=lambda row: (row[0], row[1]))
+        return cls(countries,
+                   array('H', (row[0] for row in rows)),
+                   array('h', (row[1] for row in rows)),
+                   array('d', (row[2] for row in rows)))
+
+    def __len__(self) -> int:
+        return len(self.years)
+
+    def _point(self, row: int) -> GiniPoint:
+        code, name = self.countries[self.country_idx[row]]
+        return GiniPoint(code, name, self.years[row], self.values[row])
+
+    def country_codes(self) -> List[str]:
+        return [code for code, _ in self.countries]
+
+    def latest(self, country_code: Optional[str] = None) -> Optional[GiniPoint]:
+        """
+        Último punto con valor válido del país indicado (o de toda la serie si no se indica).
+        Devuelve None si no hay ninguno.
+        """
+        if country_code is None:
+            row = self._latest_overall
+        else:
+            index = self._code_to_index.get(country_code.upper())
+            row = self._latest_row[index] if index is not None else -1
+        return self._point(row) if row >= 0 else None
+
+    def points(self, country_code: Optional[str] = None, valid_only: bool = False) -> Iterator[GiniPoint]:
+        """Recorre los puntos ordenados por (país, año), opcionalmente de un solo país."""
+        target = None
+        if country_code is not None:
+            target = self._code_to_index.get(country_code.upper())
+            if target is None:
+                return
+        for row in range(len(self.years)):
+            if target is not None and self.country_idx[row] != target:
+                continue
+            if valid_only and math.isnan(self.values[row]):
+                continue
+            yield self._point(row)
+
+    def country_rows(self) -> Iterator[Tuple[int, int, int]]:
+        """(índice de país, primera fila, fila siguiente a la última) de cada país, en orden."""
+        start = 0
+        total = len(self.years)
+        while start < total:
+            index = self.country_idx[start]
+            end = start + 1
+            while end < total and self.country_idx[end] == index:
+                end += 1
+            yield index, start, end
+            start = end
+
+    def xy(self, start: int, end: int) -> Tuple[List[int], List[float]]:
+        """Años y valores válidos de las filas [start, end) (un país de country_rows)."""
+        years, values = [], []
+        for row in range(start, end):
+            value = self.values[row]
+            if not math.isnan(value):
+                years.append(self.years[row])
+                values.append(value)
+        return years, values
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes ocupados por los arrays de datos (sin contar la tabla de países)."""
+        return sum(a.itemsize * len(a) for a in (self.country_idx, self.years, self.values))
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """
+    Largest-Triangle-Three-Buckets: índices de a lo sumo 'threshold' puntos que conservan la
+    forma de la serie (xs creciente). Mantiene el primero y el último; de cada cubeta intermedia
+    elige el punto que forma el triángulo más grande con el elegido antes y el promedio de la
+    cubeta siguiente. Si la serie ya es corta, devuelve todos los índices.
+    """
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1][:max(threshold, 0)]
+    selected = [0]
+    bucket_size = (n - 2) / (threshold - 2)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        # Promedio de la cubeta siguiente (o el último punto)
+        next_end = min(int((bucket + 2) * bucket_size) + 1, n)
+        if end >= n - 1:
+            avg_x, avg_y = xs[n - 1], ys[n - 1]
+        else:
+            span = next_end - end
+            avg_x = sum(xs[end:next_end]) / span
+            avg_y = sum(ys[end:next_end]) / span
+        px, py = xs[previous], ys[previous]
+        best, best_area = start, -1.0
+        for i in range(start, end):
+            area = abs((px - avg_x) * (ys[i] - py) - (px - xs[i]) * (avg_y - py))
+            if area > best_area:
+                best, best_area = i, area
+        selected.append(best)
+        previous = best
+    selected.append(n - 1)
+    return selected
@@ -0,0 +1,334 @@
+# src/gini_service.py
+# Servicio HTTP local (asyncio, solo biblioteca estándar) que expone core_logic a otras
+# herramientas, así no cada una embebe su propia copia con su propio tráfico a la API y
+# su propio servidor 32-bit:
+#   GET /v1/gini/{código}/latest[?round=1] -> último valor válido (y redondeo nativo)
+#   GET /v1/gini/{código}/history          -> serie de valores válidos por año
+#   GET /v1/round?value=41.5&value=38.2    -> redondeo C/ASM de uno o varios valores
+#   GET /v1/health, GET /v1/metrics         -> estado y snapshot de gini_metrics
+#
+# - Single-flight: peticiones simultáneas del mismo país comparten una sola consulta en vuelo.
+# - Los redondeos que llegan en el mismo ciclo del event loop se juntan en un solo lote
+#   (process_gini_batch_with_c_asm), sobre el único backend nativo del proceso (un Server32 caliente).
+# Las respuestas son JSON; los errores llevan {"error": "..."} y el código HTTP correspondiente.
+#
+# Uso: python src/gini_service.py --port 8790
+#      curl http://127.0.0.1:8790/v1/gini/ARG/latest?round=1
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import sys
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Callable, Tuple
+
+import core_logic
+from gini_series import GiniSeries
+from gini_metrics import get_logger, DEBUG_ENABLED, metrics
+
+log = get_logger("Service")
+
+# --- Configuración ---
+DEFAULT_HOST = os.environ.get("GINI_SERVICE_HOST", "127.0.0.1")
+DEFAULT_PORT = int(os.environ.get("GINI_SERVICE_PORT", "8790"))
+KEEP_ALIVE_TIMEOUT = 15.0       # Segundos sin peticiones antes de cerrar una conexión
+MAX_HEADER_BYTES = 16 * 1024    # Tope de la línea de petición + encabezados
+MAX_ROUND_VALUES = 10000        # Valores por petición a /v1/round
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            431: "Request Header Fields Too Large", 500: "Internal Server Error", 502: "Bad Gateway"}
+
+
+class HTTPError(Exception):
+    """Error que se responde al cliente con el código y el mensaje indicados."""
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+# --- Single-flight ---
+class SingleFlight:
+    """
+    Junta llamadas simultáneas con la misma clave: la primera ejecuta 'func' en el executor y
+    las demás esperan su resultado. Al terminar se olvida la clave (no es una caché).
+    """
+    def __init__(self, executor: ThreadPoolExecutor, name: str):
+        self._executor = executor
+        self._name = name
+        self._in_flight: Dict[Any, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def do(self, key: Any, func: Callable[[], Any]) -> Any:
+        future = self._in_flight.get(key)
+        if future is not None:
+            metrics.incr(f"service.{self._name}.shared")
+        else:
+            metrics.incr(f"service.{self._name}.calls")
+            future = asyncio.get_running_loop().run_in_executor(self._executor, func)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # shield: si un cliente se desconecta, la consulta sigue para los demás que esperan
+        return await asyncio.shield(future)
+
+
+# --- Redondeo nativo por lotes ---
+class RoundBatcher:
+    """
+    Junta los valores pedidos durante un mismo ciclo del event loop y los redondea con una
+    sola llamada a process_gini_batch_with_c_asm. Hay un solo lote en vuelo a la vez: lo que
+    llega mientras tanto forma el siguiente.
+    """
+    def __init__(self, executor: ThreadPoolExecutor):
+        self._executor = executor
+        self._pending: List[Tuple[List[float], asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def round(self, values: List[float]) -> List[int]:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((values, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush())
+        return await future
+
+    async def _flush(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while self._pending:
+                await asyncio.sleep(0) # Deja que lleguen las demás peticiones de este ciclo
+                batch, self._pending = self._pending, []
+                flat = [value for values, _ in batch for value in values]
+                metrics.incr("service.round.batches")
+                metrics.incr("service.round.values", len(flat))
+                try:
+                    results = await loop.run_in_executor(self._executor, core_logic.process_gini_batch_with_c_asm, flat)
+                except Exception as e: # process_gini_batch_with_c_asm ya captura los errores del backend
+                    log.error("Error inesperado en el lote de redondeo: %s: %s", type(e).__name__, e)
+                    results = None
+                offset = 0
+                for values, future in batch:
+                    if future.done(): # El cliente se fue
+                        offset += len(values)
+                        continue
+                    if results is None:
+                        future.set_exception(HTTPError(502, "Error en el backend nativo C/ASM"))
+                    else:
+                        future.set_result(results[offset:offset + len(values)])
+                    offset += len(values)
+        finally:
+            self._flush_task = None
+
+
+# --- Servicio ---
+class GiniService:
+    """Rutas y estado compartido del servicio (executor, single-flight, lote de redondeo)."""
+    def __init__(self, max_workers: int = core_logic.MAX_CONCURRENT_REQUESTS, use_cache: bool = True):
+        self.use_cache = use_cache
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="GiniService")
+        self._fetches = SingleFlight(self._executor, "fetch")
+        self._rounder = RoundBatcher(self._executor)
+        self._routes: Dict[str, Callable] = {"latest": self._latest, "history": self._history}
+
+    async def _series(self, code: str) -> GiniSeries:
+        """Serie del país, compartiendo la consulta con las peticiones simultáneas del mismo país."""
+        key = (code, core_logic.DATE_RANGE)
+        series, error_message = await self._fetches.do(
+            key, lambda: core_logic.get_gini_series(code, use_cache=self.use_cache))
+        if error_message is not None or series is None:
+            raise HTTPError(502, error_message or "Error desconocido")
+        return series
+
+    async def _latest(self, code: str, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        latest = (await self._series(code)).latest() # Serie de un solo país (acepta ISO2 o ISO3)
+        if latest is None:
+            raise HTTPError(404, f"No hay valores GINI para '{code}' en {core_logic.DATE_RANGE}.")
+        body = {"country_code": code, "country_name": latest.country_name, "year": latest.year,
+                "value": latest.value}
+        if query.get("round", ["0"])[-1].lower() not in ("0", "false", "no"): # "?round" o "?round=1"
+            body["rounded"] = (await self._rounder.round([latest.value]))[0]
+        return body
+
+    async def _history(self, code: str, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        series = await self._series(code)
+        points = list(series.points(valid_only=True))
+        return {"country_code": code, "country_name": points[0].country_name if points else None,
+                "date_range": core_logic.DATE_RANGE,
+                "values": [{"year": point.year, "value": point.value} for point in points]}
+
+    async def _round(self, query: Dict[str, List[str]]) -> Dict[str, Any]:
+        raw_values = [part for item in query.get("value", []) for part in item.split(",") if part]
+        if not raw_values:
+            raise HTTPError(400, "Falta el parámetro 'value' (p. ej. /v1/round?value=41.5).")
+        if len(raw_values) > MAX_ROUND_VALUES:
+            raise HTTPError(400, f"Demasiados valores (máximo {MAX_ROUND_VALUES}).")
+        try:
+            values = [float(raw) for raw in raw_values]
+        except ValueError as e:
+            raise HTTPError(400, f"Valor no numérico: {e}") from None
+        if not all(math.isfinite(value) for value in values):
+            raise HTTPError(400, "Los valores deben ser finitos.")
+        return {"values": values, "rounded": await self._rounder.round(values)}
+
+    async def dispatch(self, method: str, target: str) -> Tuple[int, Dict[str, Any]]:
+        """Resuelve una petición y devuelve (código HTTP, cuerpo JSON)."""
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query, keep_blank_values=True)
+        parts = [part for part in url.path.split("/") if part]
+        if method not in ("GET", "HEAD"):
+            raise HTTPError(405, f"Método '{method}' no soportado (solo GET).")
+        if parts[:1] != ["v1"]:
+            raise HTTPError(404, f"Ruta desconocida: {url.path}")
+        parts = parts[1:]
+        if len(parts) == 3 and parts[0] == "gini" and parts[2] in self._routes:
+            code = parts[1].upper()
+            if not (2 <= len(code) <= 3 and code.isalnum()):
+                raise HTTPError(400, f"Código de país inválido: '{parts[1]}'.")
+            # Rechazado por el índice local, sin consultar la API: no es un fallo del servicio de origen
+            unknown = core_logic.validate_country_code(code)
+            if unknown is not None:
+                raise HTTPError(404, unknown)
+            with metrics.timer(f"service.request.{parts[2]}"):
+                return 200, await self._routes[parts[2]](code, query)
+        if parts == ["round"]:
+            with metrics.timer("service.request.round"):
+                return 200, await self._round(query)
+        if parts == ["health"]:
+            return 200, {"status": "ok", "in_flight_fetches": len(self._fetches),
+                         "native_backend": self._native_backend_name()}
+        if parts == ["metrics"]:
+            # Con ?server32 consulta a cada Server32 por IPC: fuera del event loop
+            snapshot = await asyncio.get_running_loop().run_in_executor(
+                self._executor, core_logic.get_metrics_snapshot, "server32" in query)
+            return 200, snapshot
+        raise HTTPError(404, f"Ruta desconocida: {url.path}")
+
+    @staticmethod
+    def _native_backend_name() -> Optional[str]:
+        """Nombre del backend nativo si ya está listo (nunca espera a que arranque el Server32)."""
+        ready = core_logic.prewarm_native_backend()
+        if not ready.done() or ready.exception() is not None:
+            return None
+        return ready.result().name
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        core_logic.shutdown_server32_pool()
+
+
+# --- HTTP/1.1 mínimo sobre asyncio streams ---
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, str, Dict[str, str]]]:
+    """Lee línea de petición y encabezados. None si el cliente cerró la conexión."""
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), KEEP_ALIVE_TIMEOUT)
+    except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+        return None
+    except asyncio.LimitOverrunError:
+        raise HTTPError(431, "Encabezados demasiado grandes.") from None
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ")
+    except ValueError:
+        raise HTTPError(400, "Línea de petición inválida.") from None
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(":")
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return method.upper(), target, version, headers
+
+
+def _encode_response(status: int, body: Dict[str, Any], keep_alive: bool, head_only: bool) -> bytes:
+    payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    header = (f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+              f"Content-Type: application/json; charset=utf-8\r\n"
+              f"Content-Length: {len(payload)}\r\n"
+              f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode("latin-1")
+    return header if head_only else header + payload
+
+
+async def handle_connection(service: GiniService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # Respuestas chicas: sin esperar ACK diferido
+    try:
+        while True:
+            keep_alive = False
+            head_only = False
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers = request
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                head_only = method == "HEAD"
+                metrics.incr("service.requests")
+                if DEBUG_ENABLED:
+                    log.debug(f"{method} {target}")
+                status, body = await service.dispatch(method, target)
+            except HTTPError as e:
+                metrics.incr("service.errors")
+                status, body = e.status, {"error": str(e)}
+            except Exception as e:
+                metrics.incr("service.errors")
+                log.error("Error atendiendo la petición: %s: %s", type(e).__name__, e)
+                status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+            writer.write(_encode_response(status, body, keep_alive, head_only))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, service: Optional[GiniService] = None,
+                ready: Optional[Callable[[asyncio.AbstractServer], None]] = None) -> None:
+    """Atiende hasta que se cancele la tarea. 'ready' recibe el servidor ya escuchando."""
+    service = service or GiniService()
+    core_logic.prewarm_native_backend() # Un solo backend (y un solo Server32) para todos los clientes
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port,
+                                        limit=MAX_HEADER_BYTES)
+    log.info("Escuchando en %s", ", ".join(str(s.getsockname()) for s in server.sockets))
+    if ready is not None:
+        ready(server)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.shutdown()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Servicio HTTP local con los datos GINI y el redondeo C/ASM.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Dirección (por defecto {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Puerto (por defecto {DEFAULT_PORT})")
+    parser.add_argument("-j", "--workers", type=int, default=core_logic.MAX_CONCURRENT_REQUESTS,
+                        help="Hilos para consultas a la API y llamadas nativas")
+    parser.add_argument("--no-cache", action="store_true", help="No usa ni actualiza la caché persistente")
+    args = parser.parse_args(argv)
+
+    service = GiniService(max_workers=args.workers, use_cache=not args.no_cache)
+    print(f"Servicio GINI en http://{args.host}:{args.port}/v1/ (Ctrl+C para salir)", file=sys.stderr)
+    try:
+        asyncio.run(serve(args.host, args.port, service))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"No se pudo iniciar el servicio: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,71 @@
 # src/gui.py
 # Define la clase de la aplicación GUI con Tkinter.
 # Importa y utiliza funciones de core_logic.py.
-
+# El historial se muestra en una tabla virtualizada y un gráfico reducido con LTTB (gui_widgets.py),
+# así que varios países o historiales largos no traban la ventana.
+# El campo de códigos autocompleta por código o nombre y valida contra el índice local de países
+# (country_index.py): un código inválido se rechaza sin ir a la red.
+# Los países consultados con frecuencia se precargan en los momentos libres (prefetch_scheduler.py):
+# si ya están en la caché en memoria, la búsqueda no va a la red: en el hilo de Tk solo se consulta
+# la caché, y la serie y el historial se arman en el executor como un trabajo 'fetch' más.
+
+import re
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import sys
+import queue
+from concurrent.futures import ThreadPoolExecutor, Future
 import core_logic # <--- Importar el módulo renombrado
-from typing import Optional, List, Dict, Any
+from gini_metrics import get_logger, metrics
+from gini_series import GiniSeries
+from gui_widgets import VirtualTable, TableColumn, LineChart, ChartSeries, AutocompleteEntry
+from country_index import get_country_index
+from prefetch_scheduler import PrefetchScheduler, PREFETCH_ENABLED
+from typing import Optional, List, Dict, Any, Callable, NamedTuple, Union
+
+log = get_logger("GUI")
+
+# Intervalo (ms) de sondeo de resultados de los hilos de trabajo (~60 fps)
+RESULT_POLL_MS = 16
+
+HISTORY_COLUMNS = (
+    TableColumn("country", "País", 180),
+    TableColumn("code", "Código", 60, "center"),
+    TableColumn("year", "Año", 60, "center"),
+    TableColumn("value", "Índice GINI", 90, "e", lambda value: f"{value:.2f}"),
+)
+
+
+class HistoryView(NamedTuple):
+    """Historial listo para mostrar: filas de la tabla, series del gráfico y mensaje si no hay datos."""
+    rows: List[tuple]
+    series: List[ChartSeries]
+    message: str
+
+
+def build_history_view(records: Union[GiniSeries, List[Dict[str, Any]], None]) -> HistoryView:
+    """Arma filas (país, código, año, valor) y una serie por país con los registros válidos (lista o GiniSeries)."""
+    if records is None: # Si hubo un error al obtener los datos
+        return HistoryView([], [], "(No se pudo cargar el historial de datos)")
+    if not records: # Si la API devolvió explícitamente "sin datos"
+        return HistoryView([], [], "(No hay datos GINI disponibles para este país/periodo)")
+    series = records if isinstance(records, GiniSeries) else GiniSeries.from_records(records)
+    rows: List[tuple] = []
+    chart: List[ChartSeries] = []
+    for index, start, end in series.country_rows():
+        code, name = series.countries[index]
+        years, values = series.xy(start, end)
+        rows.extend((name, code, year, value) for year, value in zip(years, values))
+        chart.append(ChartSeries(code or name, years, values))
+    if not rows:
+        return HistoryView([], [], "(No se encontraron puntos de datos históricos válidos)")
+    return HistoryView(rows, chart, "")
+
 
 class GiniApp:
     def __init__(self, master: tk.Tk):
         self.master = master
         master.title("GINI Index Fetcher (TP2)")
-        master.geometry("550x500") # Un poco más de alto para el botón C
+        master.geometry("720x680") # Espacio para la tabla y el gráfico del historial
         master.config(bg="#f0f0f0")
 
         # --- Inyectar funciones de core_logic ---
@@ -21,6 +74,15 @@ class GiniApp:
         # Usar la función de core_logic que maneja Client64 -> Server32 -> C/ASM
         self.process_with_c_asm = core_logic.process_gini_with_c_asm
 
+        # --- Trabajo en segundo plano (ver _submit_job) ---
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="GiniApp")
+        self._results_queue: "queue.Queue" = queue.Queue()
+        self._jobs: Dict[str, Future] = {}
+        self._job_generation: Dict[str, int] = {}
+        self._polling = False
+        self._fetching_code: Optional[str] = None
+        master.protocol("WM_DELETE_WINDOW", self._on_close)
+
         self._setup_styles()
         self._create_widgets()
         self._layout_widgets()
@@ -29,6 +91,33 @@ class GiniApp:
         self.latest_gini_value_for_processing: Optional[float] = None
         self.entry_code.focus_set()
 
+        # Prepara el backend C/ASM en segundo plano (incluye lanzar el Server32 si hace falta),
+        # así el primer clic en "Procesar" no paga el arranque. Se inicia con after_idle, una vez
+        # dibujada la ventana: importar msl-loadlib en otro hilo competiría por el GIL con el primer pintado.
+        self.native_backend_ready: Optional[Future] = None
+        self.master.after_idle(self._start_native_prewarm)
+
+        # Precarga de los países más consultados (arranca recién tras IDLE_SECONDS sin actividad)
+        self.prefetcher: Optional[PrefetchScheduler] = PrefetchScheduler() if PREFETCH_ENABLED else None
+        if self.prefetcher is not None:
+            self.master.after_idle(self.prefetcher.start)
+            self.entry_code.bind("<Key>", lambda event: self.prefetcher.user_activity(), add="+")
+
+    def _start_native_prewarm(self):
+        self.native_backend_ready = core_logic.prewarm_native_backend()
+        self.master.after(200, self._check_native_backend_ready)
+
+    def _check_native_backend_ready(self):
+        """Sondea (sin bloquear el hilo de Tk) si el backend C/ASM ya está listo."""
+        if not self.native_backend_ready.done():
+            self.master.after(200, self._check_native_backend_ready)
+            return
+        try:
+            backend = self.native_backend_ready.result()
+            log.info("Backend C/ASM listo: %s", backend.name)
+        except Exception as e:
+            log.warning("No se pudo preparar el backend C/ASM: %s", e)
+
     def _setup_styles(self):
         """Configura estilos ttk."""
         self.style = ttk.Style()
@@ -50,7 +139,7 @@ class GiniApp:
         """Crea todos los widgets de la GUI."""
         # Variables Tkinter para vincular a widgets
         self.country_code_var = tk.StringVar()
-        self.status_var = tk.StringVar(value="Introduce código de país (3 letras) y pulsa 'Obtener Datos'.")
+        self.status_var = tk.StringVar(value="Introduce uno o más países (código o nombre, con sugerencias) y pulsa 'Obtener Datos'.")
         self.summary_country_var = tk.StringVar(value="-")
         self.summary_year_var = tk.StringVar(value="-")
         self.summary_gini_var = tk.StringVar(value="-")
@@ -64,9 +153,10 @@ class GiniApp:
         self.status_frame = ttk.Frame(self.master, padding="15 5 15 10")
 
         # Widgets de entrada
-        self.label_code = ttk.Label(self.input_frame, text="Código País (ISO 3):")
-        self.entry_code = ttk.Entry(self.input_frame, textvariable=self.country_code_var, width=8)
+        self.label_code = ttk.Label(self.input_frame, text="Código(s) País:")
+        self.entry_code = AutocompleteEntry(self.input_frame, self._complete_country, textvariable=self.country_code_var, width=24)
         self.fetch_button = ttk.Button(self.input_frame, text="Obtener Datos", command=self.fetch_and_display_handler)
+        self.cancel_button = ttk.Button(self.input_frame, text="Cancelar", command=self.cancel_fetch_handler, state=tk.DISABLED)
 
         # Widgets de resumen
         self.label_summary_country_title = ttk.Label(self.summary_frame, text="País:", style="Summary.TLabel")
@@ -83,10 +173,16 @@ class GiniApp:
 
         # Widgets de historial
         self.label_history_header = ttk.Label(self.history_frame, text="Historial Datos (Válidos, por año)", style="Header.TLabel")
-        self.result_text = scrolledtext.ScrolledText(self.history_frame, wrap=tk.WORD, state='disabled', height=8, width=60, font=("Consolas", 9), relief=tk.SUNKEN, borderwidth=1)
+        self.history_panes = ttk.PanedWindow(self.history_frame, orient=tk.VERTICAL)
+        self.history_table = VirtualTable(self.history_panes, HISTORY_COLUMNS, on_select=self._on_history_select)
+        self.history_chart = LineChart(self.history_panes, height=200, relief=tk.SUNKEN, borderwidth=1)
+        self.history_panes.add(self.history_table, weight=1)
+        self.history_panes.add(self.history_chart, weight=1)
 
         # Barra de estado
         self.status_label = ttk.Label(self.status_frame, textvariable=self.status_var, style="Status.TLabel")
+        self.diagnostics_button = ttk.Button(self.status_frame, text="Diagnóstico", command=self.show_diagnostics_handler)
+        self.diagnostics_window: Optional[tk.Toplevel] = None
 
         # Binding para tecla Enter en el campo de código
         self.entry_code.bind("<Return>", self.fetch_and_display_handler)
@@ -98,7 +194,7 @@ class GiniApp:
         self.master.grid_rowconfigure(0, weight=0) # Input
         self.master.grid_rowconfigure(1, weight=0) # Summary
         self.master.grid_rowconfigure(2, weight=0) # Process Button
-        self.master.grid_rowconfigure(3, weight=1) # History Text
+        self.master.grid_rowconfigure(3, weight=1) # History (tabla + gráfico)
         self.master.grid_rowconfigure(4, weight=0) # Status Bar
 
         # Input Frame
@@ -107,6 +203,7 @@ class GiniApp:
         self.label_code.grid(row=0, column=0, padx=(0, 5), pady=5, sticky="w")
         self.entry_code.grid(row=0, column=1, padx=5, pady=5, sticky="ew")
         self.fetch_button.grid(row=0, column=2, padx=(5, 0), pady=5, sticky="e")
+        self.cancel_button.grid(row=0, column=3, padx=(5, 0), pady=5, sticky="e")
 
         # Summary Frame
         self.summary_frame.grid(row=1, column=0, sticky="ew", pady=(5, 10))
@@ -127,103 +224,210 @@ class GiniApp:
         self.history_frame.grid_rowconfigure(1, weight=1)
         self.history_frame.grid_columnconfigure(0, weight=1)
         self.label_history_header.grid(row=0, column=0, sticky="w", pady=(0, 5))
-        self.result_text.grid(row=1, column=0, sticky="nsew")
+        self.history_panes.grid(row=1, column=0, sticky="nsew")
 
         # Status Frame
         self.status_frame.grid(row=4, column=0, sticky="ew")
-        self.status_label.pack(fill=tk.X) # Ocupa todo el ancho
+        self.diagnostics_button.pack(side=tk.RIGHT, padx=(5, 0))
+        self.status_label.pack(side=tk.LEFT, fill=tk.X, expand=True) # Ocupa el resto del ancho
 
     # --- Métodos de Ayuda para la UI ---
     def update_status(self, message: str, is_error=False):
         """Actualiza el texto y color de la barra de estado."""
         self.status_var.set(message)
         self.status_label.config(foreground="red" if is_error else "gray")
-        self.master.update_idletasks() # Asegura actualización inmediata
 
     def clear_output_fields(self):
         """Limpia los campos de resumen e historial."""
+        self._cancel_job('process') # Su resultado sería del valor anterior, que ya no se muestra
         self.summary_country_var.set("-")
         self.summary_year_var.set("-")
         self.summary_gini_var.set("-")
         self.latest_gini_value_for_processing = None # Resetea valor guardado
         self.process_button.config(state=tk.DISABLED) # Deshabilita botón C/ASM
-        try:
-            self.result_text.config(state='normal')
-            self.result_text.delete('1.0', tk.END)
-            self.result_text.config(state='disabled')
-        except tk.TclError as e:
-            print(f"Error limpiando el widget de texto: {e}", file=sys.stderr)
-
-    def display_history_in_textbox(self, records: Optional[List[Dict[str, Any]]]):
-        """Muestra el historial de datos GINI en el ScrolledText."""
-        text_to_display = ""
-        if records: # Si records es una lista (puede estar vacía)
-            # Filtra y ordena solo registros válidos
-            valid_records = sorted(
-                [r for r in records if r and r.get('value') is not None and r.get('date')],
-                key=lambda x: x.get('date', '')
-            )
-            if valid_records:
-                lines = []
-                for entry in valid_records:
-                    try:
-                        # Intenta formatear como float con 2 decimales
-                        value_float = float(entry['value'])
-                        lines.append(f"  Año: {entry['date']}, Índice GINI: {value_float:>6.2f}")
-                    except (ValueError, TypeError):
-                        # Si no se puede convertir, muestra el valor original
-                        lines.append(f"  Año: {entry.get('date','?')}, Índice GINI: {entry.get('value','?')} (inválido?)")
-                text_to_display = "\n".join(lines)
-            else:
-                text_to_display = "(No se encontraron puntos de datos históricos válidos)"
-        elif records == []: # Si la API devolvió explícitamente "sin datos"
-            text_to_display = "(No hay datos GINI disponibles para este país/periodo)"
-        else: # Si hubo un error al obtener los datos (records es None)
-            text_to_display = "(No se pudo cargar el historial de datos)"
+        self.history_table.clear()
+        self.history_chart.clear()
+
+    @staticmethod
+    def _complete_country(text: str) -> List[tuple]:
+        """Sugerencias del índice local de países para el campo de códigos: (ISO3, 'ISO3  Nombre')."""
+        index = get_country_index()
+        if index is None:
+            return []
+        return [(country.iso3, f"{country.iso3}  {country.name}") for country in index.complete(text)]
+
+    def display_history(self, view: HistoryView):
+        """Muestra el historial en la tabla y el gráfico (el armado de 'view' ya se hizo fuera del hilo de Tk)."""
+        self.history_table.set_rows(view.rows, view.message)
+        self.history_chart.set_series(view.series, view.message)
+
+    def _on_history_select(self, row: tuple):
+        """Al elegir una fila, resalta la serie de ese país en el gráfico."""
+        self.history_chart.highlight(row[1] or row[0])
+
+    # --- Ejecución en Segundo Plano ---
+    # El trabajo lento (HTTP, C/ASM) corre en un ThreadPoolExecutor. Los resultados vuelven
+    # al hilo de Tk por una cola que se sondea con master.after (Tk no es thread-safe).
+    # Cada tipo de trabajo ('fetch', 'process') tiene un número de generación: cancelar o
+    # reemplazar un trabajo incrementa la generación y su resultado, al llegar, se descarta.
+    def _submit_job(self, kind: str, on_done: Callable[[Future], None], fn: Callable, *args) -> Future:
+        """Lanza 'fn(*args)' en el executor; 'on_done(future)' se llamará en el hilo de Tk."""
+        self._job_generation[kind] = self._job_generation.get(kind, 0) + 1
+        generation = self._job_generation[kind]
+        future = self._executor.submit(fn, *args)
+        self._jobs[kind] = future
+        future.add_done_callback(lambda f: self._results_queue.put((kind, generation, on_done, f)))
+        if not self._polling:
+            self._polling = True
+            self.master.after(RESULT_POLL_MS, self._poll_results)
+        return future
+
+    def _cancel_job(self, kind: str) -> None:
+        """Cancela el trabajo en curso: si no empezó no se ejecuta; si ya empezó, se ignora su resultado."""
+        future = self._jobs.pop(kind, None)
+        if future is not None:
+            future.cancel()
+            self._job_generation[kind] = self._job_generation.get(kind, 0) + 1
+
+    def _poll_results(self):
+        """Entrega en el hilo de Tk los resultados terminados; se reprograma mientras haya trabajos."""
+        while True:
+            try:
+                kind, generation, on_done, future = self._results_queue.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self._job_generation.get(kind) or future.cancelled():
+                continue # Trabajo cancelado o reemplazado
+            self._jobs.pop(kind, None)
+            on_done(future)
+        if self._jobs:
+            self.master.after(RESULT_POLL_MS, self._poll_results)
+        else:
+            self._polling = False
 
-        try:
-            self.result_text.config(state='normal')
-            self.result_text.delete('1.0', tk.END)
-            self.result_text.insert(tk.END, text_to_display)
-            self.result_text.config(state='disabled')
-        except tk.TclError as e:
-            print(f"Error actualizando el widget de texto: {e}", file=sys.stderr)
+    def _on_close(self):
+        """Cierra la ventana sin esperar a los trabajos en curso."""
+        for kind in list(self._jobs):
+            self._cancel_job(kind)
+        if self.prefetcher is not None:
+            self.prefetcher.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.master.destroy()
 
     # --- Manejador de Eventos Principal ---
     def fetch_and_display_handler(self, event=None):
         """Maneja el clic del botón 'Obtener Datos' o la tecla Enter."""
-        country_code = self.country_code_var.get().strip().upper()
-        # Validación simple del código de país
-        if len(country_code) != 3 or not country_code.isalpha():
-            messagebox.showerror("Error de Entrada", "Introduce un código de país ISO válido de 3 letras (ej: ARG, USA, BRA).")
+        codes = [code for code in re.split(r"[\s,;]+", self.country_code_var.get().strip().upper()) if code]
+        # Validación local (sin red) contra el índice de países; ISO2 se normaliza a ISO3
+        index = get_country_index()
+        if not codes:
+            messagebox.showerror("Error de Entrada", "Introduce uno o más códigos de país separados por comas (ej: ARG, USA, BRA).")
+            return
+        if index is not None:
+            unknown = index.unknown(codes)
+            if unknown:
+                messagebox.showerror("Error de Entrada", index.unknown_message(unknown))
+                return
+            codes = [index.lookup(code).iso3 for code in codes]
+        elif any(len(code) != 3 or not code.isalpha() for code in codes):
+            messagebox.showerror("Error de Entrada", "Introduce códigos de país ISO válidos de 3 letras, separados por comas (ej: ARG, USA, BRA).")
             return
+        codes = list(dict.fromkeys(codes)) # Sin repetidos
+        country_code = ", ".join(codes)
+        if self.prefetcher is not None:
+            self.prefetcher.record_query(codes)
+
+        # Pedidos repetidos del mismo país mientras uno está en curso se agrupan en uno solo
+        if 'fetch' in self._jobs and self._fetching_code == country_code:
+            self.update_status(f"Ya se están obteniendo datos para {country_code}...")
+            return
+        # Un país distinto reemplaza al pedido en curso
+        self._cancel_job('fetch')
 
-        # Deshabilitar controles durante la carga
-        self.fetch_button.config(state='disabled')
-        self.entry_code.config(state='disabled')
         self.clear_output_fields() # Limpia resultados anteriores
+
+        # Todos los países vigentes en la caché en memoria (precargados o ya consultados): sin red.
+        # Solo la consulta a la caché corre en el hilo de Tk; la serie y la vista del historial
+        # (decenas de ms con cientos de países) se arman en el executor.
+        cached = [core_logic.cached_gini_data(code, memory_only=True) for code in codes]
+        if all(records is not None for records in cached):
+            metrics.incr("gui.fetch.memory_hits")
+            self._fetching_code = country_code
+            self._submit_job('fetch', lambda f: self._on_fetch_done(country_code, f), self._build_fetch_result,
+                             [record for records in cached for record in records], None)
+            return
+
+        self._fetching_code = country_code
+        self.cancel_button.config(state=tk.NORMAL)
         self.update_status(f"Obteniendo datos para {country_code}...")
+        if self.prefetcher is not None:
+            self.prefetcher.user_fetch_started()
 
-        # --- Llamada a la capa de lógica ---
-        gini_records, error_msg = self.get_gini_data(country_code)
-        # -----------------------------------
+        # --- Llamada a la capa de lógica (en segundo plano) ---
+        self._submit_job('fetch', lambda f: self._on_fetch_done(country_code, f), self._fetch_worker, codes)
 
-        # Rehabilitar controles
-        self.fetch_button.config(state='normal')
-        self.entry_code.config(state='normal')
+    def _fetch_worker(self, codes: List[str]):
+        """
+        Corre en un hilo del executor: obtiene los registros (de varios países a la vez si se
+        pidieron varios), busca el último GINI válido y arma la vista del historial.
+        """
+        if self.prefetcher is not None:
+            self.prefetcher.join_inflight(codes) # Si se están precargando, se usa esa consulta
+        if len(codes) == 1:
+            gini_records, error_msg = self.get_gini_data(codes[0])
+        else:
+            gini_records, errors = [], []
+            for code, (records, error) in core_logic.get_gini_data_many(codes).items():
+                if error:
+                    errors.append(f"{code}: {error}")
+                else:
+                    gini_records.extend(records)
+            error_msg = "\n".join(errors) if errors else None
+            if errors and len(errors) < len(codes):
+                log.warning("Fallaron %d de %d países: %s", len(errors), len(codes), "; ".join(errors))
+                error_msg = None # Resultado parcial: se muestran los países que sí respondieron
+            elif errors:
+                gini_records = None
+        return self._build_fetch_result(gini_records, error_msg)
+
+    def _build_fetch_result(self, gini_records: Optional[List[Dict[str, Any]]], error_msg: Optional[str]):
+        """(registros, error, último registro válido, vista del historial) para _on_fetch_done."""
+        # Una sola GiniSeries para el último valor y para la tabla/gráfico
+        series = GiniSeries.from_records(gini_records) if gini_records else gini_records
+        latest_record = self.find_latest_valid_gini(series) if series else None
+        return gini_records, error_msg, latest_record, build_history_view(series)
+
+    def cancel_fetch_handler(self):
+        """Cancela la obtención de datos en curso (el resultado, si llega, se descarta)."""
+        if 'fetch' not in self._jobs:
+            return
+        self._cancel_job('fetch')
+        if self.prefetcher is not None:
+            self.prefetcher.user_fetch_finished()
+        self.cancel_button.config(state=tk.DISABLED)
+        self.update_status(f"Obtención de datos para {self._fetching_code} cancelada.")
+        self._fetching_code = None
+
+    def _on_fetch_done(self, country_code: str, future: Future):
+        """Muestra el resultado de la obtención de datos (hilo de Tk)."""
+        self._fetching_code = None
+        if self.prefetcher is not None:
+            self.prefetcher.user_fetch_finished()
+        self.cancel_button.config(state=tk.DISABLED)
         self.entry_code.select_range(0, tk.END) # Selecciona texto para fácil reemplazo
-        # self.entry_code.focus_set() # Devuelve foco
+        try:
+            gini_records, error_msg, latest_record, history = future.result()
+        except Exception as e:
+            log.error("Error inesperado obteniendo datos: %s: %s", type(e).__name__, e)
+            gini_records, error_msg, latest_record, history = None, f"Error inesperado: {e}", None, build_history_view(None)
 
         # --- Procesar resultado de la lógica ---
         if error_msg:
             # Hubo un error en la API o conexión
             messagebox.showerror("Error de API/Red", error_msg)
             self.update_status(f"Fallo al obtener datos para {country_code}.", is_error=True)
-            self.display_history_in_textbox(None) # Muestra mensaje de error en historial
+            self.display_history(history) # Muestra mensaje de error en historial
         elif gini_records is not None:
-            # La llamada fue exitosa, buscar el último GINI válido
-            latest_record = self.find_latest_valid_gini(gini_records)
-
             if latest_record:
                 # Mostrar datos del último registro válido
                 country_name = latest_record.get('country_name', country_code)
@@ -253,32 +457,45 @@ class GiniApp:
                 self.update_status(f"Se encontraron registros para {country_code}, pero ninguno tenía un valor GINI válido.", is_error=True)
 
             # Muestra el historial (incluso si está vacío o tiene errores parciales)
-            self.display_history_in_textbox(gini_records)
+            self.display_history(history)
         else:
              # Caso inesperado: gini_records es None sin error_msg (no debería ocurrir)
              self.update_status(f"Error desconocido al procesar datos para {country_code}.", is_error=True)
-             self.display_history_in_textbox(None)
+             self.display_history(build_history_view(None))
 
 
     # --- Manejador para el botón de procesamiento C/ASM ---
     def _trigger_c_asm_processing(self):
         """
         Llamado al hacer clic en el botón 'Procesar GINI con C/ASM'.
-        Utiliza el último valor GINI float válido guardado.
+        Utiliza el último valor GINI float válido guardado; el procesamiento corre en segundo plano.
         """
         if self.latest_gini_value_for_processing is None:
             messagebox.showwarning("No Procesable", "No hay un valor GINI numérico válido para procesar.")
             return
+        if 'process' in self._jobs:
+            return # Ya hay un procesamiento en curso
 
         gini_input_float = self.latest_gini_value_for_processing
+        # Resultado ya calculado por la precarga: se muestra sin ir al backend
+        rounded = self.prefetcher.rounded(gini_input_float) if self.prefetcher is not None else None
+        if rounded is not None:
+            future: Future = Future()
+            future.set_result(rounded)
+            self._on_c_asm_done(gini_input_float, future)
+            return
         self.update_status(f"Procesando {gini_input_float:.2f} con C/ASM...")
         self.process_button.config(state=tk.DISABLED) # Deshabilita mientras procesa
 
-        print(f"[GUI] Iniciando procesamiento C/ASM con valor: {gini_input_float}", file=sys.stderr)
+        log.debug("Iniciando procesamiento C/ASM con valor: %s", gini_input_float)
+        # --- Llamada a la capa de lógica que maneja C/ASM (en segundo plano) ---
+        self._submit_job('process', lambda f: self._on_c_asm_done(gini_input_float, f),
+                         self.process_with_c_asm, gini_input_float)
+
+    def _on_c_asm_done(self, gini_input_float: float, future: Future):
+        """Muestra el resultado del procesamiento C/ASM (hilo de Tk)."""
         try:
-            # --- Llamada a la capa de lógica que maneja C/ASM ---
-            c_asm_result = self.process_with_c_asm(gini_input_float)
-            # -----------------------------------------------------
+            c_asm_result = future.result()
 
             if c_asm_result is not None:
                 # Éxito: Muestra el resultado
@@ -295,11 +512,45 @@ class GiniApp:
                 self.update_status("Error durante el procesamiento C/ASM.", is_error=True)
 
         except Exception as e:
-            # Error inesperado en la propia GUI al intentar llamar a la lógica
-            print(f"[GUI] Error inesperado al llamar a process_with_c_asm: {e}", file=sys.stderr)
+            # Error inesperado al llamar a la lógica
+            log.error("Error inesperado al llamar a process_with_c_asm: %s", e)
             messagebox.showerror("Error Inesperado", f"Error inesperado en la GUI al iniciar el procesamiento:\n{e}")
             self.update_status("Error inesperado en la GUI.", is_error=True)
         finally:
             # Rehabilita el botón si aún hay un valor válido para procesar
             if self.latest_gini_value_for_processing is not None:
                  self.process_button.config(state=tk.NORMAL)
+
+    # --- Panel de Diagnóstico ---
+    def show_diagnostics_handler(self):
+        """Abre (o trae al frente) la ventana con el snapshot de métricas en JSON."""
+        if self.diagnostics_window is not None and self.diagnostics_window.winfo_exists():
+            self.diagnostics_window.lift()
+        else:
+            window = tk.Toplevel(self.master)
+            window.title("Diagnóstico (métricas)")
+            window.geometry("520x480")
+            text = scrolledtext.ScrolledText(window, wrap=tk.NONE, state='disabled', font=("Consolas", 9))
+            buttons = ttk.Frame(window, padding="5 5 5 5")
+            ttk.Button(buttons, text="Actualizar", command=self._refresh_diagnostics).pack(side=tk.LEFT)
+            ttk.Button(buttons, text="Cerrar", command=window.destroy).pack(side=tk.RIGHT)
+            buttons.pack(side=tk.BOTTOM, fill=tk.X)
+            text.pack(fill=tk.BOTH, expand=True)
+            self.diagnostics_window, self.diagnostics_text = window, text
+        self._refresh_diagnostics()
+
+    def _refresh_diagnostics(self):
+        """Pide el snapshot en segundo plano (consultar al Server32 es una petición IPC)."""
+        self._submit_job('diagnostics', self._on_diagnostics_done, core_logic.dump_metrics_json)
+
+    def _on_diagnostics_done(self, future: Future):
+        if self.diagnostics_window is None or not self.diagnostics_window.winfo_exists():
+            return
+        try:
+            text_to_display = future.result()
+        except Exception as e:
+            text_to_display = f"No se pudieron obtener las métricas: {type(e).__name__}: {e}"
+        self.diagnostics_text.config(state='normal')
+        self.diagnostics_text.delete('1.0', tk.END)
+        self.diagnostics_text.insert(tk.END, text_to_display)
+        self.diagnostics_text.config(state='disabled')
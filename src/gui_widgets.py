@@ -0,0 +1,457 @@
+# src/gui_widgets.py
+# Widgets Tkinter para mostrar series GINI largas sin trabar la GUI:
+#   - VirtualTable: ttk.Treeview virtualizado. Los datos viven en una lista de tuplas y el
+#     Treeview solo tiene tantos ítems como filas visibles; desplazarse reescribe sus valores.
+#     Columnas ordenables con clic en el encabezado.
+#   - LineChart: gráfico de líneas en un Canvas. Cada serie se reduce con LTTB (gini_series.lttb)
+#     a tantos puntos como píxeles de ancho tiene el área de dibujo, y el redibujo se agrupa en
+#     un solo after_idle por ráfaga de cambios (redimensionar, nuevos datos, selección).
+#   - AutocompleteEntry: ttk.Entry con lista desplegable de sugerencias para el término bajo el
+#     cursor (la GUI la alimenta con el índice local de países, country_index.py).
+
+import math
+import tkinter as tk
+from tkinter import ttk
+from typing import Optional, List, Any, Callable, NamedTuple, Sequence, Tuple
+
+from gini_series import lttb
+
+# Paleta para las series; con muchas series solo la resaltada lleva color
+CHART_COLORS = ("#1f77b4", "#d62728", "#2ca02c", "#ff7f0e", "#9467bd", "#8c564b", "#e377c2", "#17becf")
+CHART_MUTED_COLOR = "#c8c8c8"
+CHART_MAX_COLORED = len(CHART_COLORS)
+WHEEL_ROWS = 3 # Filas por paso de la rueda del mouse
+AUTOCOMPLETE_ROWS = 8 # Sugerencias visibles en la lista desplegable
+
+
+class TableColumn(NamedTuple):
+    key: str
+    heading: str
+    width: int
+    anchor: str = "w"
+    format: Callable[[Any], str] = str
+
+
+class VirtualTable(ttk.Frame):
+    """
+    Tabla de solo lectura para miles de filas. set_rows() recibe tuplas (una por fila, un valor
+    por columna); la tabla las ordena y muestra solo la ventana visible. 'on_select(row)' se llama
+    con la tupla de la fila seleccionada.
+    """
+
+    def __init__(self, master, columns: Sequence[TableColumn], on_select: Optional[Callable[[tuple], None]] = None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = list(columns)
+        self.on_select = on_select
+        self._rows: List[tuple] = []
+        self._offset = 0
+        self._visible = 1
+        self._sort_column: Optional[int] = None
+        self._sort_descending = False
+        self._selected: Optional[tuple] = None
+        self._items: List[str] = [] # Ítems reutilizados del Treeview, uno por fila visible
+
+        self.tree = ttk.Treeview(self, columns=[c.key for c in self.columns], show="headings",
+                                 selectmode="browse", height=1)
+        for index, column in enumerate(self.columns):
+            self.tree.heading(column.key, text=column.heading, command=lambda i=index: self.sort_by(i))
+            self.tree.column(column.key, width=column.width, anchor=column.anchor, stretch=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.message = ttk.Label(self.tree, foreground="gray")
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<MouseWheel>", lambda e: self._scroll(-WHEEL_ROWS if e.delta > 0 else WHEEL_ROWS))
+        self.tree.bind("<Button-4>", lambda e: self._scroll(-WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda e: self._scroll(WHEEL_ROWS))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self._visible))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self._visible))
+        self.tree.bind("<Home>", lambda e: self._move_selection(-len(self._rows)))
+        self.tree.bind("<End>", lambda e: self._move_selection(len(self._rows)))
+
+    # --- Datos ---
+    def set_rows(self, rows: List[tuple], message: str = "") -> None:
+        """Reemplaza las filas (se conserva el orden elegido). 'message' se muestra si no hay filas."""
+        self._rows = list(rows)
+        self._selected = None
+        self._offset = 0
+        if self._sort_column is not None:
+            self._sort_rows()
+        if rows or not message:
+            self.message.place_forget()
+        else:
+            self.message.config(text=message)
+            self.message.place(relx=0.5, rely=0.5, anchor="center")
+        self._render()
+
+    def clear(self, message: str = "") -> None:
+        self.set_rows([], message)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def sort_by(self, column: int, descending: Optional[bool] = None) -> None:
+        """Ordena por la columna (un segundo clic invierte el orden). Los None van al final."""
+        if descending is None:
+            descending = not self._sort_descending if self._sort_column == column else False
+        self._sort_column, self._sort_descending = column, descending
+        for index, spec in enumerate(self.columns):
+            arrow = (" ▼" if descending else " ▲") if index == column else ""
+            self.tree.heading(spec.key, text=spec.heading + arrow)
+        self._sort_rows()
+        if self._selected is not None:
+            self._scroll_to(self._rows.index(self._selected))
+        self._render()
+
+    def _sort_rows(self) -> None:
+        column = self._sort_column
+        present = [row for row in self._rows if not _is_missing(row[column])]
+        missing = [row for row in self._rows if _is_missing(row[column])]
+        present.sort(key=lambda row: row[column], reverse=self._sort_descending)
+        self._rows = present + missing
+
+    # --- Ventana visible ---
+    def _on_resize(self, event) -> None:
+        row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        heading_height = row_height + 4
+        visible = max(1, (event.height - heading_height) // row_height)
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
+
+    def _render(self) -> None:
+        """Ajusta la cantidad de ítems del Treeview a la ventana y les escribe los valores."""
+        count = max(0, min(self._visible, len(self._rows) - self._offset))
+        while len(self._items) < count:
+            self._items.append(self.tree.insert("", tk.END))
+        while len(self._items) > count:
+            self.tree.delete(self._items.pop())
+        selected_item = ()
+        for item, row in zip(self._items, self._rows[self._offset:self._offset + count]):
+            self.tree.item(item, values=[spec.format(value) for spec, value in zip(self.columns, row)])
+            if row is self._selected:
+                selected_item = item
+        # El <<TreeviewSelect>> que genera esto llega después y _on_tree_select lo ignora (misma fila)
+        self.tree.selection_set(selected_item)
+        total = len(self._rows)
+        if total:
+            self.scrollbar.set(self._offset / total, (self._offset + count) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _scroll(self, rows: int) -> str:
+        self._scroll_to(self._offset + rows, align_top=True)
+        self._render()
+        return "break"
+
+    def _scroll_to(self, index: int, align_top: bool = False) -> None:
+        """Lleva 'index' a la ventana (arriba si align_top; si no, con el mínimo desplazamiento)."""
+        last_offset = max(0, len(self._rows) - self._visible)
+        if align_top:
+            self._offset = index
+        elif index < self._offset:
+            self._offset = index
+        elif index >= self._offset + self._visible:
+            self._offset = index - self._visible + 1
+        self._offset = max(0, min(self._offset, last_offset))
+
+    def _on_scrollbar(self, action: str, amount, unit: Optional[str] = None) -> None:
+        if action == tk.MOVETO:
+            self._scroll_to(int(float(amount) * len(self._rows)), align_top=True)
+        elif action == tk.SCROLL:
+            step = self._visible if unit == tk.PAGES else 1
+            self._scroll_to(self._offset + int(amount) * step, align_top=True)
+        self._render()
+
+    # --- Selección ---
+    def _on_tree_select(self, event=None) -> None:
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self._items:
+            return
+        row = self._rows[self._offset + self._items.index(selection[0])]
+        if row is not self._selected:
+            self._selected = row
+            if self.on_select is not None:
+                self.on_select(row)
+
+    def _move_selection(self, delta: int) -> str:
+        if not self._rows:
+            return "break"
+        current = self._rows.index(self._selected) if self._selected is not None else self._offset - (1 if delta > 0 else 0)
+        self.select_index(max(0, min(len(self._rows) - 1, current + delta)))
+        return "break"
+
+    def select_index(self, index: int) -> None:
+        """Selecciona la fila 'index' del orden actual y la deja visible."""
+        self._selected = self._rows[index]
+        self._scroll_to(index)
+        self._render()
+        if self.on_select is not None:
+            self.on_select(self._selected)
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class ChartSeries(NamedTuple):
+    label: str
+    xs: Sequence[float]
+    ys: Sequence[float]
+
+
+class LineChart(tk.Canvas):
+    """Gráfico de líneas de una o muchas series (años en X, GINI en Y)."""
+    MARGIN_LEFT, MARGIN_RIGHT, MARGIN_TOP, MARGIN_BOTTOM = 40, 12, 10, 22
+
+    def __init__(self, master, **kwargs):
+        kwargs.setdefault("background", "white")
+        kwargs.setdefault("highlightthickness", 0)
+        super().__init__(master, **kwargs)
+        self._series: List[ChartSeries] = []
+        self._highlight: Optional[str] = None
+        self._message = ""
+        self._redraw_pending = False
+        self.bind("<Configure>", lambda e: self.schedule_redraw())
+
+    def set_series(self, series: List[ChartSeries], message: str = "") -> None:
+        """Reemplaza las series (las vacías se ignoran). 'message' se muestra si no queda ninguna."""
+        self._series = [s for s in series if len(s.xs)]
+        self._message = message
+        if self._highlight not in {s.label for s in self._series}:
+            self._highlight = None
+        self.schedule_redraw()
+
+    def clear(self, message: str = "") -> None:
+        self.set_series([], message)
+
+    def highlight(self, label: Optional[str]) -> None:
+        """Resalta una serie (se dibuja al frente, más gruesa y con color)."""
+        if label != self._highlight:
+            self._highlight = label
+            self.schedule_redraw()
+
+    def schedule_redraw(self) -> None:
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self._redraw)
+
+    def _redraw(self) -> None:
+        self._redraw_pending = False
+        self.delete("all")
+        width, height = self.winfo_width(), self.winfo_height()
+        if not self._series:
+            if self._message:
+                self.create_text(width / 2, height / 2, text=self._message, fill="gray")
+            return
+        left, top = self.MARGIN_LEFT, self.MARGIN_TOP
+        right, bottom = width - self.MARGIN_RIGHT, height - self.MARGIN_BOTTOM
+        plot_width = right - left
+        if plot_width < 10 or bottom - top < 10:
+            return
+
+        x_min = min(s.xs[0] for s in self._series)
+        x_max = max(s.xs[-1] for s in self._series)
+        y_min = min(min(s.ys) for s in self._series)
+        y_max = max(max(s.ys) for s in self._series)
+        y_min, y_max, y_step = _nice_range(y_min, y_max)
+        x_span = (x_max - x_min) or 1
+        y_span = (y_max - y_min) or 1
+        x_scale = plot_width / x_span
+        y_scale = (bottom - top) / y_span
+        self._draw_axes(left, top, right, bottom, x_min, x_max, y_min, y_max, y_step, x_scale, y_scale)
+
+        colored = len(self._series) <= CHART_MAX_COLORED
+        highlighted = None
+        for number, series in enumerate(self._series):
+            if series.label == self._highlight:
+                highlighted = (number, series)
+                continue
+            color = CHART_COLORS[number % len(CHART_COLORS)] if colored else CHART_MUTED_COLOR
+            self._draw_series(series, color, 1, plot_width, left, bottom, x_min, y_min, x_scale, y_scale)
+        if highlighted is not None:
+            number, series = highlighted
+            color = CHART_COLORS[number % len(CHART_COLORS)] if colored else CHART_COLORS[0]
+            self._draw_series(series, color, 2, plot_width, left, bottom, x_min, y_min, x_scale, y_scale)
+            self.create_text(right, top, text=series.label, anchor="ne", fill=color)
+
+    def _draw_series(self, series: ChartSeries, color: str, line_width: int, plot_width: int,
+                     left: int, bottom: int, x_min: float, y_min: float, x_scale: float, y_scale: float) -> None:
+        keep = lttb(series.xs, series.ys, max(3, plot_width))
+        coords: List[float] = []
+        for i in keep:
+            coords.append(left + (series.xs[i] - x_min) * x_scale)
+            coords.append(bottom - (series.ys[i] - y_min) * y_scale)
+        if len(coords) >= 4:
+            self.create_line(coords, fill=color, width=line_width)
+        else:
+            x, y = coords
+            self.create_oval(x - 2, y - 2, x + 2, y + 2, fill=color, outline=color)
+
+    def _draw_axes(self, left, top, right, bottom, x_min, x_max, y_min, y_max, y_step, x_scale, y_scale) -> None:
+        self.create_rectangle(left, top, right, bottom, outline="#a0a0a0")
+        y = y_min
+        while y <= y_max + y_step / 2:
+            py = bottom - (y - y_min) * y_scale
+            self.create_line(left, py, right, py, fill="#eeeeee")
+            self.create_text(left - 4, py, text=f"{y:g}", anchor="e", font=("Segoe UI", 8))
+            y += y_step
+        for year in _year_ticks(int(x_min), int(x_max), max(1, (right - left) // 60)):
+            px = left + (year - x_min) * x_scale
+            self.create_line(px, bottom, px, bottom + 3, fill="#a0a0a0")
+            self.create_text(px, bottom + 4, text=str(year), anchor="n", font=("Segoe UI", 8))
+
+
+class AutocompleteEntry(ttk.Entry):
+    """
+    Entry con una lista desplegable de sugerencias para el término bajo el cursor (los términos
+    se separan con cualquiera de 'separators'). 'complete(text)' devuelve tuplas (valor a insertar,
+    texto a mostrar). Flechas para elegir, Tab o clic para aceptar, Escape para cerrar. Enter acepta
+    la sugerencia si el término todavía no es exactamente la primera; si ya lo es, sigue de largo
+    hacia los bindings propios del Entry (p. ej. el de buscar).
+    """
+
+    def __init__(self, master, complete: Callable[[str], List[Tuple[str, str]]], separators: str = ",; ",
+                 max_items: int = AUTOCOMPLETE_ROWS, **kwargs):
+        super().__init__(master, **kwargs)
+        self.complete = complete
+        self.separators = separators
+        self.max_items = max_items
+        self._suggestions: List[Tuple[str, str]] = []
+        self._last_text = ""
+        self._popup: Optional[tk.Toplevel] = None
+        self._listbox: Optional[tk.Listbox] = None
+
+        # Etiqueta propia delante de la del widget: sus "break" frenan los bindings del Entry
+        tag = f"Autocomplete{id(self)}"
+        self.bindtags((tag,) + self.bindtags())
+        self.bind_class(tag, "<Down>", lambda e: self._move(1))
+        self.bind_class(tag, "<Up>", lambda e: self._move(-1))
+        self.bind_class(tag, "<Return>", lambda e: self._accept(only_if_incomplete=True))
+        self.bind_class(tag, "<Tab>", lambda e: self._accept())
+        self.bind_class(tag, "<Escape>", lambda e: self._hide(consume=True))
+        self.bind_class(tag, "<FocusOut>", lambda e: self.after(150, self._hide_unless_focused))
+        self.bind("<KeyRelease>", self._on_key_release)
+
+    # --- Término bajo el cursor ---
+    def _current_term(self) -> Tuple[int, int, str]:
+        text = self.get()
+        cursor = self.index(tk.INSERT)
+        start = cursor
+        while start > 0 and text[start - 1] not in self.separators:
+            start -= 1
+        end = cursor
+        while end < len(text) and text[end] not in self.separators:
+            end += 1
+        return start, end, text[start:end]
+
+    def _on_key_release(self, event=None) -> None:
+        text = self.get()
+        if text == self._last_text: # Flechas, Shift, etc.: el texto no cambió
+            return
+        self._last_text = text
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Recalcula las sugerencias para el término actual y muestra u oculta la lista."""
+        _, _, term = self._current_term()
+        self._suggestions = self.complete(term)[:self.max_items] if term.strip() else []
+        if not self._suggestions:
+            self._hide()
+            return
+        self._show()
+
+    # --- Lista desplegable ---
+    def _show(self) -> None:
+        if self._popup is None:
+            self._popup = tk.Toplevel(self)
+            self._popup.withdraw()
+            self._popup.overrideredirect(True)
+            self._listbox = tk.Listbox(self._popup, activestyle="none", exportselection=False, borderwidth=1,
+                                       relief=tk.SOLID, highlightthickness=0)
+            self._listbox.pack(fill=tk.BOTH, expand=True)
+            self._listbox.bind("<ButtonRelease-1>", self._on_click)
+        self._listbox.delete(0, tk.END)
+        for _, label in self._suggestions:
+            self._listbox.insert(tk.END, label)
+        self._listbox.config(height=len(self._suggestions))
+        self._listbox.selection_set(0)
+        self._popup.geometry(f"{self.winfo_width()}x{self._listbox.winfo_reqheight()}"
+                             f"+{self.winfo_rootx()}+{self.winfo_rooty() + self.winfo_height()}")
+        self._popup.deiconify()
+        self._popup.lift()
+
+    def _visible(self) -> bool:
+        return self._popup is not None and self._popup.winfo_ismapped()
+
+    def _hide(self, consume: bool = False) -> Optional[str]:
+        was_visible = self._visible()
+        if was_visible:
+            self._popup.withdraw()
+        return "break" if consume and was_visible else None
+
+    def _hide_unless_focused(self) -> None:
+        if not self.winfo_exists(): # La ventana se cerró antes de que corriera el after
+            return
+        try:
+            focused = self.focus_get()
+        except (KeyError, tk.TclError): # focus_get falla con ventanas sin decorar en algunos gestores
+            focused = None
+        if focused is not self and focused is not self._listbox:
+            self._hide()
+
+    def _move(self, delta: int) -> Optional[str]:
+        if not self._visible():
+            return None
+        current = self._listbox.curselection()
+        index = max(0, min(len(self._suggestions) - 1, (current[0] if current else -1) + delta))
+        self._listbox.selection_clear(0, tk.END)
+        self._listbox.selection_set(index)
+        self._listbox.see(index)
+        return "break"
+
+    def _on_click(self, event) -> None:
+        self._listbox.selection_clear(0, tk.END)
+        self._listbox.selection_set(self._listbox.nearest(event.y))
+        self._accept()
+        self.focus_set()
+
+    def _accept(self, only_if_incomplete: bool = False) -> Optional[str]:
+        """Reemplaza el término actual por la sugerencia elegida."""
+        if not self._visible():
+            return None
+        selection = self._listbox.curselection()
+        value = self._suggestions[selection[0] if selection else 0][0]
+        start, end, term = self._current_term()
+        if only_if_incomplete and term.strip().upper() == value.upper() and (not selection or selection[0] == 0):
+            self._hide()
+            return None # El término ya está completo: que siga el Enter
+        self.delete(start, end)
+        self.insert(start, value)
+        self.icursor(start + len(value))
+        self._last_text = self.get()
+        self._hide()
+        return "break"
+
+
+def _nice_range(low: float, high: float, ticks: int = 5) -> Tuple[float, float, float]:
+    """Extiende [low, high] a múltiplos de un paso 'redondo' (1, 2 o 5 × 10^k)."""
+    if high <= low:
+        low, high = low - 1, high + 1
+    raw_step = (high - low) / ticks
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(m * magnitude for m in (1, 2, 5, 10) if m * magnitude >= raw_step)
+    return math.floor(low / step) * step, math.ceil(high / step) * step, step
+
+
+def _year_ticks(first: int, last: int, max_ticks: int) -> List[int]:
+    span = max(1, last - first)
+    step = next(s for s in (1, 2, 5, 10, 20, 50, 100) if span / s <= max_ticks or s == 100)
+    start = -(-first // step) * step
+    return list(range(start, last + 1, step))
@@ -0,0 +1,159 @@
+# src/indicator_store.py
+# Almacén compartido de valores de varios indicadores del Banco Mundial (GINI, participación en
+# el ingreso por quintil, pobreza, ...), con clave (país, indicador, año). Lo llena
+# core_logic.fetch_indicators, que trae varios indicadores y varios países en una sola petición
+# ('ARG;BRA/indicator/SI.POV.GINI;SI.DST.FRST.20?source=2') y reparte la respuesta con
+# split_records. Cada par (país, indicador) consultado queda registrado aunque no tenga datos,
+# así "sin datos" se distingue de "no consultado".
+# records() devuelve registros con la forma de la API, para GiniSeries / GiniMatrix.
+
+import math
+import sys
+import threading
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
+
+Records = List[Dict[str, Any]]
+Pair = Tuple[str, str] # (código de país ISO3, id de indicador)
+
+# Grupos de indicadores relacionados con el GINI, para pedirlos por nombre (ver expand_indicators)
+INDICATOR_PRESETS: Dict[str, Tuple[str, ...]] = {
+    "gini": ("SI.POV.GINI",),
+    # Participación en el ingreso de cada quintil (del 20% más pobre al 20% más rico)
+    "quintiles": ("SI.DST.FRST.20", "SI.DST.02ND.20", "SI.DST.03RD.20", "SI.DST.04TH.20", "SI.DST.05TH.20"),
+    # Razón de Palma: 10% más rico / 40% más pobre (primer + segundo quintil)
+    "palma": ("SI.DST.10TH.10", "SI.DST.FRST.20", "SI.DST.02ND.20"),
+    # Recuento de pobreza a 2,15 / 3,65 / 6,85 USD por día (PPA 2017)
+    "poverty": ("SI.POV.DDAY", "SI.POV.LMIC", "SI.POV.UMIC"),
+}
+
+
+def expand_indicators(names: Iterable[str]) -> List[str]:
+    """Ids de indicador a partir de ids o nombres de INDICATOR_PRESETS ('gini,quintiles'), sin repetidos."""
+    indicators: List[str] = []
+    for name in names:
+        for part in name.replace(";", ",").split(","):
+            part = part.strip()
+            if part:
+                indicators.extend(INDICATOR_PRESETS.get(part.lower(), (part.upper(),)))
+    return list(dict.fromkeys(indicators))
+
+
+def record_indicator(record: Dict[str, Any]) -> str:
+    return ((record.get('indicator') or {}).get('id') or '').upper()
+
+
+def split_records(records: Iterable[Dict[str, Any]], country_codes: Iterable[str],
+                  indicators: Iterable[str]) -> Dict[Pair, Records]:
+    """
+    Reparte los registros de una consulta multi-país / multi-indicador por (país, indicador).
+    Hay una entrada por cada combinación pedida (lista vacía si la API no devolvió nada para ella).
+    La API identifica al país por ISO3 ('countryiso3code') y por ISO2 ('country.id'): vale cualquiera.
+    """
+    codes = [code.upper() for code in country_codes]
+    indicators = [indicator.upper() for indicator in indicators]
+    grouped: Dict[Pair, Records] = {(code, indicator): [] for code in codes for indicator in indicators}
+    wanted = set(codes)
+    for record in records:
+        if not isinstance(record, dict):
+            continue
+        indicator = record_indicator(record)
+        for key in (record.get('countryiso3code'), (record.get('country') or {}).get('id')):
+            if key and key.upper() in wanted:
+                pair = (key.upper(), indicator)
+                if pair in grouped:
+                    grouped[pair].append(record)
+                break
+    return grouped
+
+
+class IndicatorStore:
+    """
+    Valores por (país, indicador, año), NaN si la API informó el año sin valor.
+    Es seguro agregar desde varios hilos (las consultas agrupadas terminan en paralelo).
+    """
+
+    def __init__(self):
+        self._values: Dict[Pair, Dict[int, float]] = {}
+        self._country_names: Dict[str, str] = {}
+        self._indicator_names: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add(self, country_code: str, indicator: str, records: Iterable[Dict[str, Any]]) -> int:
+        """Guarda los registros de un par (país, indicador); devuelve cuántos años se agregaron."""
+        pair = (sys.intern(country_code.upper()), sys.intern(indicator.upper()))
+        parsed: Dict[int, float] = {}
+        for record in records:
+            try:
+                year = int(record.get('date'))
+            except (ValueError, TypeError):
+                continue
+            try:
+                parsed[year] = float(record.get('value'))
+            except (ValueError, TypeError):
+                parsed[year] = math.nan
+            country_name = (record.get('country') or {}).get('value')
+            indicator_name = (record.get('indicator') or {}).get('value')
+            if country_name and pair[0] not in self._country_names:
+                self._country_names[pair[0]] = sys.intern(country_name)
+            if indicator_name and pair[1] not in self._indicator_names:
+                self._indicator_names[pair[1]] = indicator_name
+        with self._lock:
+            self._values.setdefault(pair, {}).update(parsed)
+        return len(parsed)
+
+    def add_grouped(self, grouped: Dict[Pair, Records]) -> None:
+        """Guarda el resultado de split_records."""
+        for (country_code, indicator), records in grouped.items():
+            self.add(country_code, indicator, records)
+
+    # --- Consultas ---
+    def __len__(self) -> int:
+        """Cantidad de (país, indicador, año) guardados."""
+        return sum(len(years) for years in self._values.values())
+
+    def has(self, country_code: str, indicator: str) -> bool:
+        """True si el par ya se consultó (aunque no haya tenido datos)."""
+        return (country_code.upper(), indicator.upper()) in self._values
+
+    def get(self, country_code: str, indicator: str, year: int) -> Optional[float]:
+        """Valor del año (NaN si la API no informó valor), o None si el año no está guardado."""
+        return self._values.get((country_code.upper(), indicator.upper()), {}).get(year)
+
+    def series(self, country_code: str, indicator: str, valid_only: bool = True) -> List[Tuple[int, float]]:
+        """(año, valor) del par, ordenados por año."""
+        years = self._values.get((country_code.upper(), indicator.upper()), {})
+        return [(year, years[year]) for year in sorted(years) if not (valid_only and math.isnan(years[year]))]
+
+    def latest(self, country_code: str, indicator: str) -> Optional[Tuple[int, float]]:
+        """Último (año, valor) con valor válido, o None."""
+        points = self.series(country_code, indicator)
+        return points[-1] if points else None
+
+    def countries(self) -> List[str]:
+        return sorted({country for country, _ in self._values})
+
+    def indicators(self) -> List[str]:
+        return sorted({indicator for _, indicator in self._values})
+
+    def country_name(self, country_code: str) -> str:
+        return self._country_names.get(country_code.upper(), 'N/A')
+
+    def rows(self, indicator: Optional[str] = None, valid_only: bool = True) -> Iterator[Tuple[str, str, int, float]]:
+        """(país, indicador, año, valor) ordenados, opcionalmente de un solo indicador."""
+        with self._lock:
+            pairs = sorted(self._values)
+        for country_code, pair_indicator in pairs:
+            if indicator is not None and pair_indicator != indicator.upper():
+                continue
+            for year, value in self.series(country_code, pair_indicator, valid_only):
+                yield country_code, pair_indicator, year, value
+
+    def records(self, indicator: str, valid_only: bool = False) -> Iterator[Dict[str, Any]]:
+        """Registros de un indicador con la forma de la API (GiniSeries.from_records / GiniMatrix.from_records)."""
+        indicator = indicator.upper()
+        indicator_info = {'id': indicator, 'value': self._indicator_names.get(indicator, indicator)}
+        for country_code, _, year, value in self.rows(indicator, valid_only):
+            yield {'indicator': indicator_info,
+                   'country': {'id': country_code, 'value': self.country_name(country_code)},
+                   'countryiso3code': country_code, 'date': str(year),
+                   'value': None if math.isnan(value) else value}
@@ -1,13 +1,17 @@
 # src/main.py
 # Punto de entrada principal de la aplicación GINI Fetcher.
-# Simplemente instancia y ejecuta la clase GiniApp desde gui.py.
+# Sin argumentos instancia y ejecuta la clase GiniApp desde gui.py.
+# Con argumentos (códigos de país, --file, '-', ...) corre el modo por lotes de gini_cli.py,
+# que no importa tkinter: sirve en servidores sin pantalla.
 
-import tkinter as tk
-import gui # Importa el módulo de la interfaz gráfica
 import sys
 import os
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        import gini_cli
+        sys.exit(gini_cli.main(sys.argv[1:]))
+
     print("Lanzando Aplicación GINI Fetcher...")
     # Añadir el directorio src al sys.path temporalmente si es necesario
     # (generalmente no se requiere si se ejecuta desde el directorio raíz con `python src/main.py`)
@@ -15,6 +19,17 @@ if __name__ == "__main__":
     # if src_dir not in sys.path:
     #     sys.path.insert(0, src_dir)
 
+    try:
+        import tkinter as tk
+        import gui # Importa el módulo de la interfaz gráfica
+    except ImportError as e:
+        # Error si no encuentra tkinter, gui.py o core_logic.py
+        print(f"\nError de Importación: {e}", file=sys.stderr)
+        print("No se pudo encontrar un módulo necesario (tkinter, gui.py, core_logic.py?).", file=sys.stderr)
+        print(f"Asegúrate de estar ejecutando desde el directorio raíz del proyecto y que la estructura de 'src/' sea correcta.", file=sys.stderr)
+        print("Sin entorno gráfico, usa el modo por lotes: python src/main.py ARG BRA ... (ver gini_cli.py).", file=sys.stderr)
+        sys.exit(1)
+
     try:
         root = tk.Tk()
         app = gui.GiniApp(root) # Instancia la aplicación desde gui.py
@@ -27,12 +42,6 @@ if __name__ == "__main__":
          print("Asegúrate de tener instalado 'python3-tk' (o equivalente para tu SO).", file=sys.stderr)
          print("Ejecuta './setup.sh' para intentar instalarlo.", file=sys.stderr)
          sys.exit(1)
-    except ImportError as e:
-        # Error si no encuentra gui.py o core_logic.py
-        print(f"\nError de Importación: {e}", file=sys.stderr)
-        print("No se pudo encontrar un módulo necesario (gui.py, core_logic.py?).", file=sys.stderr)
-        print(f"Asegúrate de estar ejecutando desde el directorio raíz del proyecto y que la estructura de 'src/' sea correcta.", file=sys.stderr)
-        sys.exit(1)
     except Exception as e:
         # Captura cualquier otro error inesperado al inicio
         print(f"\nError Inesperado al Iniciar: {type(e).__name__}: {e}", file=sys.stderr)
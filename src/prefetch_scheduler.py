@@ -0,0 +1,427 @@
+# src/prefetch_scheduler.py
+# Precarga en segundo plano de los países que más se consultan. Cada consulta de la GUI suma
+# al puntaje de sus países (frecuencia con decaimiento exponencial: cuenta cuántas veces y qué
+# tan reciente); en los momentos sin actividad un hilo de baja prioridad trae los N de mayor
+# puntaje que no estén vigentes en la caché, de a pocos por consulta y con un tope de consultas
+# por minuto, y deja calculado el redondeo C/ASM de su último GINI. Así la mayoría de las
+# búsquedas se sirven desde la caché en memoria sin esperar a la red.
+# Una búsqueda del usuario tiene prioridad: mientras hay una en curso (o hubo actividad hace
+# menos de IDLE_SECONDS) no se lanza ninguna precarga nueva, y si pide un país que se está
+# precargando espera esa consulta (join_inflight) en lugar de repetirla.
+# El ranking se guarda entre sesiones en STATS_PATH (JSON).
+#
+# Uso: python src/prefetch_scheduler.py                (muestra el ranking guardado)
+#      python src/prefetch_scheduler.py --record ARG BRA
+#      python src/prefetch_scheduler.py --warm         (precarga ya los N primeros, sin esperar)
+
+import argparse
+import heapq
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, wait
+from typing import Optional, List, Dict, Any, Iterable, Tuple
+
+import core_logic
+from gini_metrics import get_logger, metrics
+
+log = get_logger("Prefetch")
+
+# --- Configuración por defecto ---
+DEFAULT_STATS_PATH = os.path.join(os.path.expanduser("~"), ".cache", "tp2_gini", "query_stats.json")
+STATS_PATH = os.environ.get("GINI_PREFETCH_STATS", DEFAULT_STATS_PATH) # "" = no se guarda entre sesiones
+PREFETCH_ENABLED = os.environ.get("GINI_PREFETCH", "1") != "0"
+TOP_N = int(os.environ.get("GINI_PREFETCH_TOP", "32"))          # Países que se mantienen precargados
+BATCH_SIZE = 4                    # Países por consulta de precarga ('ARG;BRA;CHL;URY': una sola petición)
+MAX_BATCHES_PER_MINUTE = float(os.environ.get("GINI_PREFETCH_RATE", "12"))
+IDLE_SECONDS = 2.0                # Sin actividad del usuario durante este tiempo = momento libre
+RESCAN_SECONDS = 60.0             # Con todo precargado, cada cuánto se vuelve a revisar (TTL de la caché)
+ERROR_BACKOFF_INITIAL = 30.0      # Tras un fallo, el país no se reintenta por este tiempo (se duplica, con tope)
+ERROR_BACKOFF_MAX = 15 * 60.0
+JOIN_TIMEOUT = 5.0                # Espera máxima a una precarga en curso del país que pidió el usuario
+HALF_LIFE_SECONDS = 14 * 24 * 3600 # Una consulta vale la mitad a las dos semanas
+MAX_TRACKED = 500                 # Países guardados en el ranking (se descartan los de menor puntaje)
+THREAD_NICE = 10                  # Cuánto se baja la prioridad del hilo de precarga (Linux)
+STATS_VERSION = 1
+
+
+class QueryStats:
+    """
+    Ranking de países por frecuencia y recencia de consulta: cada consulta suma 1 al puntaje y el
+    puntaje se reduce a la mitad cada half_life segundos. Se guarda (puntaje, momento, consultas)
+    y el decaimiento se aplica al leer, así registrar una consulta es O(1).
+    """
+
+    def __init__(self, half_life: float = HALF_LIFE_SECONDS):
+        self.half_life = half_life
+        self.dirty = False
+        self._entries: Dict[str, List[float]] = {} # código -> [puntaje, momento del puntaje, consultas]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _decayed(self, entry: List[float], now: float) -> float:
+        return entry[0] * 0.5 ** (max(0.0, now - entry[1]) / self.half_life)
+
+    def record(self, country_codes: Iterable[str], now: Optional[float] = None) -> None:
+        """Registra una consulta de cada código."""
+        now = time.time() if now is None else now
+        with self._lock:
+            for code in country_codes:
+                code = code.upper()
+                entry = self._entries.get(code)
+                if entry is None:
+                    self._entries[code] = [1.0, now, 1]
+                else:
+                    entry[:] = [self._decayed(entry, now) + 1.0, now, entry[2] + 1]
+            if len(self._entries) > MAX_TRACKED:
+                keep = heapq.nlargest(MAX_TRACKED, self._entries, key=lambda code: self._decayed(self._entries[code], now))
+                self._entries = {code: self._entries[code] for code in keep}
+            self.dirty = True
+
+    def score(self, country_code: str, now: Optional[float] = None) -> float:
+        entry = self._entries.get(country_code.upper())
+        return self._decayed(entry, time.time() if now is None else now) if entry is not None else 0.0
+
+    def top(self, n: int, now: Optional[float] = None) -> List[Tuple[str, float, int]]:
+        """Los n países de mayor puntaje: (código, puntaje, consultas), de mayor a menor."""
+        now = time.time() if now is None else now
+        with self._lock:
+            ranked = heapq.nlargest(n, ((self._decayed(entry, now), code, int(entry[2]))
+                                        for code, entry in self._entries.items()))
+        return [(code, score, count) for score, code, count in ranked]
+
+    # --- Persistencia ---
+    def save(self, path: str) -> None:
+        """Guarda el ranking de forma atómica (ver country_index.save_countries)."""
+        with self._lock:
+            payload = {"version": STATS_VERSION, "half_life": self.half_life, "countries": self._entries}
+            text = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+            self.dirty = False
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f"{path}.tmp{os.getpid()}"
+        with open(temporary, "w", encoding="utf-8") as handle:
+            handle.write(text)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> "QueryStats":
+        """Lee un ranking guardado; uno vacío si no hay archivo. ValueError si el archivo no es válido."""
+        stats = cls()
+        if not path or not os.path.exists(path):
+            return stats
+        with open(path, encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if not isinstance(payload, dict) or payload.get("version") != STATS_VERSION:
+            raise ValueError("versión desconocida")
+        stats.half_life = float(payload.get("half_life") or HALF_LIFE_SECONDS)
+        for code, entry in (payload.get("countries") or {}).items():
+            if isinstance(entry, list) and len(entry) == 3:
+                stats._entries[code.upper()] = [float(entry[0]), float(entry[1]), int(entry[2])]
+        return stats
+
+
+def _lower_thread_priority() -> None:
+    """Baja la prioridad del hilo actual. Solo en Linux, donde setpriority acepta el id del hilo
+    (y los hilos que cree después la heredan); en otros sistemas afectaría a todo el proceso."""
+    if not sys.platform.startswith("linux") or not hasattr(threading, "get_native_id"):
+        return
+    try:
+        thread_id = threading.get_native_id()
+        os.setpriority(os.PRIO_PROCESS, thread_id, os.getpriority(os.PRIO_PROCESS, thread_id) + THREAD_NICE)
+    except OSError as e:
+        log.debug("No se pudo bajar la prioridad del hilo de precarga: %s", e)
+
+
+class PrefetchScheduler:
+    """
+    Precarga en los momentos libres los países de mayor puntaje de QueryStats.
+    La GUI llama a record_query con cada búsqueda y avisa con user_fetch_started /
+    user_fetch_finished; todo lo demás corre en un hilo daemon propio (start / stop).
+    """
+
+    def __init__(self, stats: Optional[QueryStats] = None, stats_path: Optional[str] = STATS_PATH,
+                 top_n: int = TOP_N, batch_size: int = BATCH_SIZE,
+                 max_batches_per_minute: float = MAX_BATCHES_PER_MINUTE,
+                 idle_seconds: float = IDLE_SECONDS, warm_native: bool = True):
+        self.stats = stats
+        self.stats_path = stats_path
+        self.top_n = top_n
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = 60.0 / max_batches_per_minute if max_batches_per_minute > 0 else 0.0
+        self.idle_seconds = idle_seconds
+        self.warm_native = warm_native
+        self._cond = threading.Condition()
+        self._user_busy = False
+        self._last_activity = time.monotonic()
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self._next_batch_at = 0.0
+        self._inflight: Dict[str, Future] = {}        # código -> Future de la consulta de precarga en curso
+        self._retry_at: Dict[str, float] = {}         # código -> cuándo se puede reintentar tras un fallo
+        self._error_backoff = 0.0
+        self._prefetched: set = set()
+        self._rounded: Dict[float, int] = {}          # último GINI -> resultado C/ASM
+        self._early_queries: List[List[str]] = []     # Consultas registradas antes de leer el ranking
+        self._save_lock = threading.Lock()
+
+    # --- API para la GUI (hilo de Tk; nada de esto bloquea) ---
+    def start(self) -> None:
+        """Lanza el hilo de precarga (el ranking guardado se lee en ese hilo, no en el de Tk)."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="GiniPrefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo (sin esperar una consulta en curso) y guarda el ranking."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        self._save_stats()
+
+    def record_query(self, country_codes: Iterable[str]) -> None:
+        """Registra una búsqueda del usuario (suma al puntaje de cada país)."""
+        codes = [code.upper() for code in country_codes]
+        hits = sum(code in self._prefetched for code in codes)
+        if hits:
+            metrics.incr("prefetch.hits", hits)
+        with self._cond:
+            if self.stats is None:
+                self._early_queries.append(codes)
+            else:
+                self.stats.record(codes)
+        self.user_activity()
+
+    def user_activity(self) -> None:
+        """El usuario está interactuando: la próxima precarga espera IDLE_SECONDS más."""
+        with self._cond:
+            self._last_activity = time.monotonic()
+            self._cond.notify_all()
+
+    def user_fetch_started(self) -> None:
+        """Empezó una búsqueda del usuario: no se lanza ninguna precarga hasta que termine."""
+        with self._cond:
+            self._user_busy = True
+            self._last_activity = time.monotonic()
+            self._cond.notify_all()
+
+    def user_fetch_finished(self) -> None:
+        with self._cond:
+            self._user_busy = False
+            self._last_activity = time.monotonic()
+            self._cond.notify_all()
+
+    def join_inflight(self, country_codes: Iterable[str], timeout: float = JOIN_TIMEOUT) -> bool:
+        """
+        Espera (como mucho 'timeout') las precargas en curso de esos países, para que la búsqueda
+        use su resultado en lugar de repetir la consulta. True si no quedó ninguna pendiente.
+        Se llama desde el hilo de trabajo de la búsqueda, nunca desde el de Tk.
+        """
+        with self._cond:
+            futures = [self._inflight[code.upper()] for code in country_codes if code.upper() in self._inflight]
+        if not futures:
+            return True
+        metrics.incr("prefetch.joined")
+        _, pending = wait(futures, timeout=timeout)
+        return not pending
+
+    def rounded(self, gini_value: float) -> Optional[int]:
+        """Resultado C/ASM ya calculado para ese valor, o None."""
+        return self._rounded.get(gini_value)
+
+    # --- Hilo de precarga ---
+    def _is_idle(self) -> bool:
+        return not self._user_busy and time.monotonic() - self._last_activity >= self.idle_seconds
+
+    def _wait_idle(self) -> bool:
+        """Espera un momento libre; False si se detuvo el planificador."""
+        with self._cond:
+            while not self._stopped:
+                if self._user_busy:
+                    self._cond.wait()
+                    continue
+                remaining = self._last_activity + self.idle_seconds - time.monotonic()
+                if remaining <= 0:
+                    return True
+                self._cond.wait(remaining)
+            return False
+
+    def _sleep(self, seconds: float) -> None:
+        """Espera interrumpible (stop, actividad o una consulta nueva despiertan al hilo)."""
+        with self._cond:
+            if not self._stopped:
+                self._cond.wait(seconds)
+
+    def _run(self) -> None:
+        _lower_thread_priority()
+        if self.stats is None:
+            try:
+                stats = QueryStats.load(self.stats_path)
+            except (OSError, ValueError) as e:
+                log.warning("No se pudo leer el ranking de consultas '%s': %s", self.stats_path, e)
+                stats = QueryStats()
+            with self._cond:
+                for codes in self._early_queries:
+                    stats.record(codes)
+                self._early_queries = []
+                self.stats = stats
+        while self._wait_idle():
+            delay = self._next_batch_at - time.monotonic()
+            if delay > 0:
+                self._sleep(delay) # Tope de consultas por minuto
+                continue
+            try:
+                prefetched = self.step()
+            except Exception as e: # Un error inesperado no debe terminar el hilo
+                log.error("Error en la precarga: %s: %s", type(e).__name__, e)
+                prefetched = 0
+            if not prefetched:
+                self._sleep(RESCAN_SECONDS)
+            self._save_stats()
+        self._save_stats()
+
+    def _save_stats(self) -> None:
+        if self.stats is None or not self.stats.dirty or not self.stats_path:
+            return
+        try:
+            with self._save_lock:
+                self.stats.save(self.stats_path)
+        except OSError as e:
+            log.warning("No se pudo guardar el ranking de consultas '%s': %s", self.stats_path, e)
+
+    def pending(self) -> Tuple[List[str], Dict[str, List[Dict[str, Any]]]]:
+        """
+        Recorre los top_n países: devuelve los que hay que pedir a la API (hasta batch_size) y los
+        registros de los que ya están vigentes. Los vigentes en disco quedan cargados en memoria.
+        Sin caché (GINI_CACHE_PATH vacío) no se pide nada: lo descargado no quedaría en ningún lado
+        y los mismos países se volverían a pedir en cada ronda.
+        """
+        now = time.monotonic()
+        cache_enabled = core_logic._get_cache() is not None
+        to_fetch: List[str] = []
+        cached: Dict[str, List[Dict[str, Any]]] = {}
+        for code, _, _ in (self.stats.top(self.top_n) if self.stats is not None else []):
+            if not self._is_idle() or len(to_fetch) >= self.batch_size:
+                break
+            if self._retry_at.get(code, 0.0) > now:
+                continue
+            if core_logic.validate_country_code(code) is not None:
+                continue
+            records = core_logic.cached_gini_data(code)
+            if records is None:
+                if cache_enabled:
+                    to_fetch.append(code)
+            else:
+                cached[code] = records
+        return to_fetch, cached
+
+    def step(self) -> int:
+        """
+        Una ronda de precarga: una consulta agrupada de hasta batch_size países más el redondeo
+        C/ASM pendiente. Devuelve cuántos países se pidieron a la API (0 = nada que hacer).
+        """
+        to_fetch, cached = self.pending()
+        if to_fetch and self._is_idle():
+            cached.update(self._fetch(to_fetch))
+        if self.warm_native and self._is_idle():
+            self._warm_rounding(cached.values())
+        return len(to_fetch)
+
+    def _fetch(self, codes: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        with self._cond:
+            futures = {code: self._inflight.setdefault(code, Future()) for code in codes}
+        fetched: Dict[str, List[Dict[str, Any]]] = {}
+        try:
+            with metrics.timer("prefetch.batch"):
+                results = core_logic.get_gini_data_many(codes, max_workers=1)
+            failed = [code for code, (records, error) in results.items() if error is not None or records is None]
+            fetched = {code: records for code, (records, error) in results.items() if code not in failed}
+            self._prefetched.update(fetched)
+            metrics.incr("prefetch.countries", len(fetched))
+            now = time.monotonic()
+            if failed:
+                # La API falla: se espacian los reintentos de esos países (y los de todos si fallaron todos)
+                metrics.incr("prefetch.errors", len(failed))
+                self._error_backoff = min(ERROR_BACKOFF_MAX, max(ERROR_BACKOFF_INITIAL, self._error_backoff * 2))
+                for code in failed:
+                    self._retry_at[code] = now + self._error_backoff
+                log.info("Precarga fallida para %s (reintento en %.0f s).", ", ".join(failed), self._error_backoff)
+            else:
+                self._error_backoff = 0.0
+            self._next_batch_at = now + (self._error_backoff if not fetched else self.batch_interval)
+        finally:
+            with self._cond:
+                for code, future in futures.items():
+                    if self._inflight.get(code) is future:
+                        del self._inflight[code]
+                    future.set_result(code in fetched)
+        return fetched
+
+    def _warm_rounding(self, records_by_country: Iterable[List[Dict[str, Any]]]) -> None:
+        """Calcula en un solo lote el redondeo C/ASM del último GINI de cada país que falte."""
+        values = []
+        for records in records_by_country:
+            latest = core_logic.find_latest_valid_gini(records)
+            if latest is None:
+                continue
+            try:
+                value = float(latest['value'])
+            except (TypeError, ValueError):
+                continue
+            if value not in self._rounded:
+                values.append(value)
+        if not values:
+            return
+        values = list(dict.fromkeys(values))
+        results = core_logic.process_gini_batch_with_c_asm(values)
+        if results is None:
+            log.warning("No se pudo precalcular el redondeo C/ASM; se desactiva en la precarga.")
+            self.warm_native = False
+            return
+        if len(self._rounded) > 4 * max(self.top_n, 1):
+            self._rounded = {}
+        self._rounded.update(zip(values, results))
+        metrics.incr("prefetch.rounded", len(values))
+
+
+# --- Línea de comandos ---
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Ranking de consultas y precarga de datos GINI.")
+    parser.add_argument("--record", nargs="+", metavar="CODIGO", help="registra una consulta de estos países")
+    parser.add_argument("--warm", action="store_true", help="precarga ya los países del ranking, sin esperar ni limitar")
+    parser.add_argument("-n", type=int, default=TOP_N, help=f"países del ranking (por defecto {TOP_N})")
+    args = parser.parse_args(argv)
+
+    if not STATS_PATH:
+        parser.error("GINI_PREFETCH_STATS está vacío: no hay ranking guardado")
+    try:
+        stats = QueryStats.load(STATS_PATH)
+    except (OSError, ValueError) as e:
+        print(f"No se pudo leer '{STATS_PATH}': {e}", file=sys.stderr)
+        return 1
+    if args.record:
+        stats.record(args.record)
+        stats.save(STATS_PATH)
+    if args.warm:
+        scheduler = PrefetchScheduler(stats, stats_path=None, top_n=args.n, max_batches_per_minute=0, idle_seconds=0)
+        start = time.perf_counter()
+        total = 0
+        # Como mucho una pasada por los top N (los que fallan no se reintentan aquí)
+        for _ in range(-(-max(args.n, 0) // scheduler.batch_size)):
+            fetched = scheduler.step()
+            if not fetched:
+                break
+            total += fetched
+        print(f"{total} países precargados en {time.perf_counter() - start:.2f} s.")
+    for code, score, count in stats.top(args.n):
+        print(f"{code}\t{score:8.2f}\t{count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ import os
 import ctypes
 import sys
 import platform
+import time
 
 try:
     from msl.loadlib import Server32
@@ -13,16 +14,25 @@ except ImportError:
     print("ERROR: msl.loadlib no encontrado en el entorno Python de 32-bit.", file=sys.stderr)
     sys.exit(1)
 
-# --- Logging ---
-INFO_PREFIX = "INFO [Server32] "
+from gini_metrics import get_logger, DEBUG_ENABLED, metrics
 
-ERROR_PREFIX = "ERROR [Server32] "
+# Transporte por memoria compartida (opcional: si falta, solo queda el socket de msl-loadlib)
+try:
+    from shm_ring import ShmRingServer
+except ImportError:
+    ShmRingServer = None
+
+# --- Logging ---
+# Nivel según GINI_LOG_LEVEL (ver gini_metrics); los mensajes por petición son DEBUG.
+log = get_logger("Server32")
 
 # --- Configuración ---
 # Nombre de la biblioteca compartida (generada por build.sh)
 LIB_FILENAME = 'libginiprocessor.so'
 # Nombre de la función C a la que llamaremos desde Python
 C_FUNCTION_NAME = 'process_gini_float'
+# Nombre de la función C por lotes (un buffer de floats -> un buffer de ints)
+C_BATCH_FUNCTION_NAME = 'process_gini_batch'
 
 # Determinar la ruta a la biblioteca .so
 # __file__ es la ruta de este script (server32_bridge.py)
@@ -38,21 +48,22 @@ class GiniProcessorServer(Server32):
     """
     def __init__(self, host, port, **kwargs):
         """Inicializa el servidor y carga la biblioteca C."""
-        print(f"{INFO_PREFIX}Inicializando GiniProcessorServer...", file=sys.stderr)
-        print(f"{INFO_PREFIX}Arquitectura Python: {platform.architecture()[0]}", file=sys.stderr) # Debería ser 32bit
-        print(f"{INFO_PREFIX}Buscando biblioteca en: {LIBRARY_PATH}", file=sys.stderr)
+        log.info("Inicializando GiniProcessorServer...")
+        self._shm_ring = None
+        log.info("Arquitectura Python: %s", platform.architecture()[0]) # Debería ser 32bit
+        log.info("Buscando biblioteca en: %s", LIBRARY_PATH)
 
         if not os.path.exists(LIBRARY_PATH):
-            error_msg = f"{INFO_PREFIX}FATAL ERROR: Biblioteca '{LIBRARY_PATH}' no encontrada."
-            print(error_msg, file=sys.stderr)
-            print(f"{INFO_PREFIX}Asegúrate de haber ejecutado './build.sh' primero.", file=sys.stderr)
+            error_msg = f"FATAL ERROR: Biblioteca '{LIBRARY_PATH}' no encontrada."
+            log.error(error_msg)
+            log.error("Asegúrate de haber ejecutado './build.sh' primero.")
             raise FileNotFoundError(error_msg) # Detiene el inicio del servidor
 
         try:
             # Carga la biblioteca usando Server32 (que usa ctypes.CDLL internamente)
             # 'cdll' asume la convención de llamada cdecl (estándar para gcc -m32)
             super().__init__(LIBRARY_PATH, 'cdll', host, port, **kwargs)
-            print(f"{INFO_PREFIX}Biblioteca '{LIB_FILENAME}' cargada exitosamente.", file=sys.stderr)
+            log.info("Biblioteca '%s' cargada exitosamente.", LIB_FILENAME)
 
             # --- Definir la firma de la función C ---
             # Accede a la función a través de self.lib (el objeto ctypes cargado)
@@ -61,16 +72,22 @@ class GiniProcessorServer(Server32):
             c_func.argtypes = [ctypes.c_float]
             # Valor de retorno: un int (ctypes.c_int)
             c_func.restype = ctypes.c_int
-            print(f"{INFO_PREFIX}Firma definida para la función C '{C_FUNCTION_NAME}'.", file=sys.stderr)
+            log.info("Firma definida para la función C '%s'.", C_FUNCTION_NAME)
+
+            # Firma de la función por lotes: (const float*, int*, int) -> int
+            batch_func = getattr(self.lib, C_BATCH_FUNCTION_NAME)
+            batch_func.argtypes = [ctypes.POINTER(ctypes.c_float), ctypes.POINTER(ctypes.c_int), ctypes.c_int]
+            batch_func.restype = ctypes.c_int
+            log.info("Firma definida para la función C '%s'.", C_BATCH_FUNCTION_NAME)
 
         except OSError as e:
-            print(f"{ERROR_PREFIX}OSError al cargar la biblioteca '{LIBRARY_PATH}': {e}", file=sys.stderr)
+            log.error("OSError al cargar la biblioteca '%s': %s", LIBRARY_PATH, e)
             raise # Re-lanza para que msl-loadlib lo maneje
         except AttributeError as e:
-             print(f"{ERROR_PREFIX}Función '{C_FUNCTION_NAME}' no encontrada en la biblioteca: {e}", file=sys.stderr)
+             log.error("Función C no encontrada en la biblioteca: %s", e)
              raise
         except Exception as e:
-            print(f"{ERROR_PREFIX}Error inesperado durante la inicialización: {type(e).__name__}: {e}", file=sys.stderr)
+            log.error("Error inesperado durante la inicialización: %s: %s", type(e).__name__, e)
             raise
 
 
@@ -81,16 +98,81 @@ class GiniProcessorServer(Server32):
         Recibe el float del Client64, llama a la función C correspondiente
         en la biblioteca cargada y devuelve el resultado int.
         """
-        print(f"{INFO_PREFIX}Recibida petición: process_gini_float({gini_value_float})", file=sys.stderr)
+        if DEBUG_ENABLED:
+            log.debug(f"Recibida petición: process_gini_float({gini_value_float})")
+        start = time.perf_counter()
         try:
             # Llama a la función C usando el objeto self.lib de ctypes
             result = self.lib.process_gini_float(ctypes.c_float(gini_value_float))
-            print(f"{INFO_PREFIX}Función C devolvió: {result} (tipo: {type(result).__name__})", file=sys.stderr)
+            if DEBUG_ENABLED:
+                log.debug(f"Función C devolvió: {result} (tipo: {type(result).__name__})")
             # Devuelve el resultado (int) al Client64
             return result
         except Exception as e:
-            print(f"{ERROR_PREFIX}al llamar a la función C '{C_FUNCTION_NAME}': {type(e).__name__}: {e}", file=sys.stderr)
+            metrics.incr("server32.native.errors")
+            log.error("al llamar a la función C '%s': %s: %s", C_FUNCTION_NAME, type(e).__name__, e)
             # Re-lanza la excepción para que Client64 reciba un Server32Error
             raise
+        finally:
+            metrics.observe("server32.native.process_gini_float", time.perf_counter() - start)
+
+    def attach_shm_ring(self, path, slot_count, slot_capacity, request_fifo, response_fifo):
+        """
+        Mensaje de control: empieza a atender el anillo de memoria compartida creado por
+        el Client64. Desde ahí los lotes se procesan sobre ese buffer, sin pasar por el socket.
+        """
+        if ShmRingServer is None:
+            raise RuntimeError("shm_ring no está disponible en el servidor 32-bit.")
+        self.detach_shm_ring()
+        self._shm_ring = ShmRingServer(path, slot_count, slot_capacity, request_fifo, response_fifo,
+                                       batch_func=self.lib.process_gini_batch)
+        log.info("Anillo compartido conectado: %s (%d slots x %d valores).", path, slot_count, slot_capacity)
+        return True
+
+    def detach_shm_ring(self):
+        """Mensaje de control: deja de atender el anillo de memoria compartida."""
+        if self._shm_ring is not None:
+            self._shm_ring.stop()
+            self._shm_ring = None
+        return True
+
+    def ping(self):
+        """Petición mínima usada por el supervisor del Client64 para comprobar que el servidor vive."""
+        return True
+
+    def get_metrics(self):
+        """Snapshot de las métricas de este proceso (dict con tipos simples, viaja por pickle)."""
+        return metrics.snapshot()
+
+    def process_gini_batch(self, packed_floats):
+        """
+        Recibe un buffer empaquetado de float32 (bytes, como array('f').tobytes()),
+        redondea todos los valores con una sola llamada a la función C por lotes
+        y devuelve los resultados como un buffer empaquetado de int32 (bytes).
+        """
+        float_size = ctypes.sizeof(ctypes.c_float)
+        if len(packed_floats) % float_size != 0:
+            raise ValueError(f"El buffer recibido ({len(packed_floats)} bytes) no es múltiplo de {float_size}.")
+        count = len(packed_floats) // float_size
+        if DEBUG_ENABLED:
+            log.debug(f"Recibida petición: process_gini_batch({count} valores)")
+        start = time.perf_counter()
+        try:
+            # Copia directa de los bytes a un array C, sin conversión valor por valor
+            input_array = (ctypes.c_float * count).from_buffer_copy(packed_floats)
+            output_array = (ctypes.c_int * count)()
+            with metrics.timer("server32.native.process_gini_batch"):
+                processed = self.lib.process_gini_batch(input_array, output_array, count)
+            metrics.incr("server32.batch.values", count)
+            if processed != count:
+                raise RuntimeError(f"'{C_BATCH_FUNCTION_NAME}' procesó {processed} de {count} valores.")
+            return bytes(output_array)
+        except Exception as e:
+            metrics.incr("server32.native.errors")
+            log.error("al llamar a la función C '%s': %s: %s", C_BATCH_FUNCTION_NAME, type(e).__name__, e)
+            raise
+        finally:
+            # Despacho completo: copia de entrada + llamada C + armado de la respuesta
+            metrics.observe("server32.dispatch.process_gini_batch", time.perf_counter() - start)
 
 # No se necesita código adicional, Server32 maneja el bucle principal.
@@ -0,0 +1,255 @@
+# src/shm_ring.py
+# Transporte por memoria compartida entre GiniClient64 (64-bit) y GiniProcessorServer (32-bit).
+# En lugar de mandar cada lote serializado con pickle por el socket de msl-loadlib, ambos
+# procesos mapean el mismo archivo con un anillo de slots de tamaño fijo:
+#
+#   cabecera : magic, versión, cantidad de slots, capacidad (valores por slot)
+#   slot[i]  : estado, cantidad, secuencia | float32 entrada[capacidad] | int32 salida[capacidad]
+#
+# El cliente escribe los floats en los slots, los marca REQUEST y "toca el timbre" (un byte
+# en un FIFO). El servidor llama a la función C directamente sobre el buffer compartido
+# (ctypes.from_buffer, sin copias ni serialización), marca DONE y responde por otro FIFO.
+# El socket de msl-loadlib queda solo para mensajes de control (attach/detach, ping).
+# Solo usa la biblioteca estándar: lo importan tanto el Python 64-bit como el 32-bit.
+
+import ctypes
+import mmap
+import os
+import select
+import shutil
+import struct
+import tempfile
+import threading
+import time
+from array import array
+from typing import List, Sequence, Callable
+
+from gini_metrics import get_logger, metrics
+
+log = get_logger("ShmRing")
+
+# --- Formato ---
+_MAGIC = b"GINIRING"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIII")
+_HEADER_SIZE = 64
+_SLOT_HEADER_SIZE = 16        # 4 x uint32: estado, cantidad, secuencia, reservado
+_CACHE_LINE = 64
+
+STATE_FREE = 0
+STATE_REQUEST = 1
+STATE_DONE = 2
+STATE_ERROR = 3
+
+DEFAULT_SLOT_COUNT = 8
+DEFAULT_SLOT_CAPACITY = 4096  # Valores por slot (4096 * 8 bytes = 32 KiB por slot)
+DEFAULT_TIMEOUT = 10.0        # Espera máxima (s) de una respuesta del servidor
+
+_ITEM_SIZE = 4  # float32 / int32
+
+
+def _slot_size(slot_capacity: int) -> int:
+    size = _SLOT_HEADER_SIZE + 2 * _ITEM_SIZE * slot_capacity
+    return (size + _CACHE_LINE - 1) // _CACHE_LINE * _CACHE_LINE
+
+
+def _open_fifo(path: str) -> int:
+    # O_RDWR: la apertura no se bloquea esperando al otro extremo y nunca hay EOF/EPIPE
+    return os.open(path, os.O_RDWR)
+
+
+class _RingLayout:
+    """Vistas sobre el archivo mapeado, comunes a cliente y servidor."""
+    def __init__(self, path: str, slot_count: int, slot_capacity: int):
+        self.path = path
+        self.slot_count = slot_count
+        self.slot_capacity = slot_capacity
+        self.slot_size = _slot_size(slot_capacity)
+        with open(path, "r+b") as handle:
+            self.mmap = mmap.mmap(handle.fileno(), _HEADER_SIZE + slot_count * self.slot_size)
+        view = memoryview(self.mmap)
+        self._views = [view]
+        self.headers = []
+        self.inputs = []
+        self.outputs = []
+        for i in range(slot_count):
+            base = _HEADER_SIZE + i * self.slot_size
+            data = base + _SLOT_HEADER_SIZE
+            self.headers.append(view[base:data].cast("I"))
+            self.inputs.append(view[data:data + _ITEM_SIZE * slot_capacity].cast("f"))
+            self.outputs.append(view[data + _ITEM_SIZE * slot_capacity:data + 2 * _ITEM_SIZE * slot_capacity].cast("i"))
+
+    def input_offset(self, slot: int) -> int:
+        return _HEADER_SIZE + slot * self.slot_size + _SLOT_HEADER_SIZE
+
+    def output_offset(self, slot: int) -> int:
+        return self.input_offset(slot) + _ITEM_SIZE * self.slot_capacity
+
+    def close(self) -> None:
+        for view in self.headers + self.inputs + self.outputs + self._views:
+            view.release()
+        self.headers, self.inputs, self.outputs, self._views = [], [], [], []
+        self.mmap.close()
+
+
+# --- Lado Cliente (64-bit) ---
+class ShmRingClient:
+    """
+    Crea el archivo compartido y los FIFOs de notificación, y envía lotes al servidor.
+    Un solo lote en curso a la vez (las llamadas concurrentes se serializan con un lock).
+    """
+    def __init__(self, slot_count: int = DEFAULT_SLOT_COUNT, slot_capacity: int = DEFAULT_SLOT_CAPACITY,
+                 timeout: float = DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self.directory = tempfile.mkdtemp(prefix="gini_ring_", dir="/dev/shm" if os.path.isdir("/dev/shm") else None)
+        self.path = os.path.join(self.directory, "ring")
+        self.request_fifo = os.path.join(self.directory, "request")
+        self.response_fifo = os.path.join(self.directory, "response")
+        with open(self.path, "wb") as handle:
+            handle.write(_HEADER.pack(_MAGIC, _VERSION, slot_count, slot_capacity))
+            handle.truncate(_HEADER_SIZE + slot_count * _slot_size(slot_capacity))
+        os.mkfifo(self.request_fifo, 0o600)
+        os.mkfifo(self.response_fifo, 0o600)
+        self._layout = _RingLayout(self.path, slot_count, slot_capacity)
+        self._request_fd = _open_fifo(self.request_fifo)
+        self._response_fd = _open_fifo(self.response_fifo)
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    @property
+    def slot_count(self) -> int:
+        return self._layout.slot_count
+
+    @property
+    def slot_capacity(self) -> int:
+        return self._layout.slot_capacity
+
+    def attach_args(self) -> tuple:
+        """Argumentos para el mensaje de control 'attach_shm_ring' del servidor."""
+        return (self.path, self.slot_count, self.slot_capacity, self.request_fifo, self.response_fifo)
+
+    def round_batch(self, gini_values: Sequence[float]) -> List[int]:
+        """Redondea los valores en el servidor usando los slots compartidos."""
+        values = array("f", gini_values)
+        results: List[int] = []
+        capacity = self.slot_capacity
+        with self._lock:
+            position = 0
+            while position < len(values):
+                # Llena tantos slots como haga falta (hasta slot_count) y toca el timbre una vez
+                used = []
+                for slot in range(self.slot_count):
+                    if position >= len(values):
+                        break
+                    chunk = values[position:position + capacity]
+                    header = self._layout.headers[slot]
+                    self._layout.inputs[slot][:len(chunk)] = memoryview(chunk)
+                    self._sequence = (self._sequence + 1) & 0xFFFFFFFF
+                    header[1] = len(chunk)
+                    header[2] = self._sequence
+                    header[0] = STATE_REQUEST # El estado se escribe último
+                    used.append((slot, len(chunk)))
+                    position += len(chunk)
+                os.write(self._request_fd, b"\x01")
+                self._wait_done([slot for slot, _ in used])
+                for slot, count in used:
+                    header = self._layout.headers[slot]
+                    failed = header[0] == STATE_ERROR
+                    if not failed:
+                        results.extend(self._layout.outputs[slot][:count].tolist())
+                    header[0] = STATE_FREE
+                    if failed:
+                        raise RuntimeError(f"El servidor no pudo procesar el slot {slot} del anillo compartido.")
+        return results
+
+    def _wait_done(self, slots: List[int]) -> None:
+        headers = self._layout.headers
+        while any(headers[slot][0] == STATE_REQUEST for slot in slots):
+            ready, _, _ = select.select([self._response_fd], [], [], self.timeout)
+            if not ready:
+                raise TimeoutError(f"El servidor no respondió por el anillo compartido en {self.timeout}s.")
+            os.read(self._response_fd, 4096) # Vacía el timbre
+
+    def wake(self) -> None:
+        """Despierta al hilo del servidor (p. ej. para que note un detach)."""
+        os.write(self._request_fd, b"\x00")
+
+    def close(self) -> None:
+        for fd in (self._request_fd, self._response_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._layout.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+# --- Lado Servidor (32-bit) ---
+class ShmRingServer:
+    """
+    Hilo del servidor que atiende el anillo: espera el timbre, procesa cada slot en
+    estado REQUEST llamando a 'batch_func(float*, int*, n)' sobre el buffer compartido
+    y avisa por el FIFO de respuesta.
+    """
+    def __init__(self, path: str, slot_count: int, slot_capacity: int, request_fifo: str, response_fifo: str,
+                 batch_func: Callable):
+        self._layout = _RingLayout(path, slot_count, slot_capacity)
+        magic, version, count, capacity = _HEADER.unpack_from(self._layout.mmap, 0)
+        if magic != _MAGIC or version != _VERSION or count != slot_count or capacity != slot_capacity:
+            self._layout.close()
+            raise ValueError(f"Anillo compartido '{path}' con formato inesperado.")
+        self._batch_func = batch_func
+        # Arrays ctypes sobre la memoria compartida: la función C lee y escribe ahí directamente
+        self._c_inputs = [(ctypes.c_float * slot_capacity).from_buffer(self._layout.mmap, self._layout.input_offset(i))
+                          for i in range(slot_count)]
+        self._c_outputs = [(ctypes.c_int * slot_capacity).from_buffer(self._layout.mmap, self._layout.output_offset(i))
+                           for i in range(slot_count)]
+        self._request_fd = _open_fifo(request_fifo)
+        self._response_fd = _open_fifo(response_fifo)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._serve, name="ShmRingServer", daemon=True)
+        self._thread.start()
+
+    def _serve(self) -> None:
+        headers = self._layout.headers
+        capacity = self._layout.slot_capacity
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self._request_fd], [], [], 1.0)
+            if not ready:
+                continue
+            os.read(self._request_fd, 4096)
+            processed = False
+            for slot in range(self._layout.slot_count):
+                header = headers[slot]
+                if header[0] != STATE_REQUEST:
+                    continue
+                count = header[1]
+                start = time.perf_counter()
+                try:
+                    ok = count <= capacity and self._batch_func(self._c_inputs[slot], self._c_outputs[slot], count) == count
+                except Exception as e:
+                    log.error("Error procesando el slot %d: %s: %s", slot, type(e).__name__, e)
+                    ok = False
+                metrics.observe("server32.native.shm_slot", time.perf_counter() - start)
+                if not ok:
+                    metrics.incr("server32.native.errors")
+                header[0] = STATE_DONE if ok else STATE_ERROR
+                processed = True
+            if processed:
+                os.write(self._response_fd, b"\x01")
+
+    def stop(self) -> None:
+        self._stop.set()
+        os.write(self._request_fd, b"\x00")
+        self._thread.join(timeout=2.0)
+        for fd in (self._request_fd, self._response_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        # Los arrays ctypes mantienen exportado el buffer del mmap: se sueltan antes de cerrar
+        self._c_inputs, self._c_outputs = [], []
+        try:
+            self._layout.close()
+        except BufferError:
+            pass
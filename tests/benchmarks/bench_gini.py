@@ -0,0 +1,383 @@
+# tests/benchmarks/bench_gini.py
+# Benchmarks reproducibles de los caminos calientes, contra el simulador local de la API
+# (fake_worldbank.py), así los resultados no dependen de la red ni del Banco Mundial:
+#   - get_gini_data        : una página, paginado, "No data available", respuesta no JSON, caché, revalidación 304,
+#                            código desconocido rechazado por el índice local (sin HTTP)
+#   - country_index.*      : autocompletado por prefijo y validación de códigos
+#   - indicators.*         : 5 indicadores × 200 países con consultas multi-país / multi-indicador
+#   - prefetch.*           : precarga de los 32 países más consultados y búsqueda servida desde memoria
+#   - find_latest_valid_gini: sobre listas de registros y sobre GiniSeries
+#   - history.*            : vista del historial de la GUI (tabla + series) y reducción LTTB del gráfico
+#   - bridge.server32      : ida y vuelta Client64 -> Server32 (si hay Python 32-bit y la .so 32-bit)
+#   - native.*             : la función C/ASM cruda (biblioteca 64-bit en proceso) y la referencia Python
+#
+# Los resultados se guardan como JSON. Con --compare se contrastan con una línea base y el
+# script termina con código 1 si algún benchmark es más lento que su umbral de regresión.
+#
+# Uso: python tests/benchmarks/bench_gini.py --save-baseline      (crea/actualiza la línea base)
+#      python tests/benchmarks/bench_gini.py --compare            (compara contra la línea base)
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from typing import Optional, List, Dict, Any, Callable, NamedTuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, "..", "..", "src"))
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_worldbank import FakeWorldBankServer
+
+# --- Configuración ---
+DEFAULT_BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_THRESHOLD = 0.25   # 25% más lento que la línea base = regresión
+NETWORK_THRESHOLD = 0.50   # Los benchmarks con HTTP local tienen más ruido
+FORMAT_VERSION = 1
+
+
+class Benchmark(NamedTuple):
+    name: str
+    func: Callable[[], Any]
+    iterations: int
+    threshold: float = DEFAULT_THRESHOLD
+    setup: Optional[Callable[[], None]] = None
+    teardown: Optional[Callable[[], None]] = None
+
+
+def measure(benchmark: Benchmark, scale: float, warmup: int = 3) -> Dict[str, Any]:
+    """Ejecuta el benchmark y devuelve la mediana, p95 y mínimo por llamada (en µs)."""
+    iterations = max(5, int(benchmark.iterations * scale))
+    if benchmark.setup is not None:
+        benchmark.setup()
+    try:
+        for _ in range(warmup):
+            benchmark.func()
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter_ns()
+            benchmark.func()
+            samples.append(time.perf_counter_ns() - start)
+    finally:
+        if benchmark.teardown is not None:
+            benchmark.teardown()
+    samples.sort()
+    return {
+        "median_us": statistics.median(samples) / 1000.0,
+        "p95_us": samples[min(len(samples) - 1, int(0.95 * len(samples)))] / 1000.0,
+        "min_us": samples[0] / 1000.0,
+        "iterations": iterations,
+        "threshold": benchmark.threshold,
+    }
+
+
+def _expect(condition: bool, message: str) -> None:
+    """Los benchmarks también verifican el resultado: medir algo roto no sirve."""
+    if not condition:
+        raise AssertionError(message)
+
+
+# --- Definición de los Benchmarks ---
+def build_benchmarks(core_logic, server: FakeWorldBankServer, skipped: Dict[str, str], only: str = "") -> List[Benchmark]:
+    from gini_cache import GiniCache
+    from gini_series import GiniSeries, lttb
+
+    benchmarks: List[Benchmark] = []
+    saved = {}
+
+    def set_config(**values):
+        def apply():
+            for key, value in values.items():
+                saved.setdefault(key, getattr(core_logic, key) if hasattr(core_logic, key) else getattr(server, key))
+                setattr(core_logic if hasattr(core_logic, key) else server, key, value)
+        return apply
+
+    def restore():
+        for key, value in saved.items():
+            setattr(core_logic if hasattr(core_logic, key) else server, key, value)
+        saved.clear()
+
+    # get_gini_data (sin caché: cada llamada es HTTP + decodificación)
+    def single_page():
+        records, error = core_logic.get_gini_data("ARG", use_cache=False)
+        _expect(error is None and len(records) == 10, f"single_page: {error!r}")
+
+    def paginated():
+        records, error = core_logic.get_gini_data("ARG", use_cache=False)
+        _expect(error is None and len(records) == 64, f"paginated: {error!r}")
+
+    def no_data():
+        records, error = core_logic.get_gini_data("NOD", use_cache=False)
+        _expect(error is None and records == [], f"no_data: {error!r}")
+
+    def non_json():
+        records, error = core_logic.get_gini_data("ZZZ", use_cache=False)
+        _expect(records is None and error, "non_json: se esperaba un error")
+
+    def unknown_code():
+        requests_before = server.request_count
+        records, error = core_logic.get_gini_data("ZZZ", use_cache=False)
+        _expect(records is None and error and server.request_count == requests_before,
+                f"unknown_code_local: se esperaba un rechazo sin HTTP ({error!r})")
+
+    benchmarks += [
+        Benchmark("get_gini_data.single_page", single_page, 200, NETWORK_THRESHOLD),
+        Benchmark("get_gini_data.paginated_4_pages", paginated, 100, NETWORK_THRESHOLD,
+                  setup=set_config(DATE_RANGE="1960:2023", PER_PAGE="16"), teardown=restore),
+        Benchmark("get_gini_data.large_payload", paginated, 100, NETWORK_THRESHOLD,
+                  setup=set_config(DATE_RANGE="1960:2023", record_padding=2048), teardown=restore),
+        # NOD y ZZZ son códigos del simulador: sin validación local, para medir el camino HTTP
+        Benchmark("get_gini_data.no_data", no_data, 200, NETWORK_THRESHOLD,
+                  setup=set_config(VALIDATE_COUNTRIES=False), teardown=restore),
+        Benchmark("get_gini_data.non_json", non_json, 200, NETWORK_THRESHOLD,
+                  setup=set_config(VALIDATE_COUNTRIES=False), teardown=restore),
+        Benchmark("get_gini_data.unknown_code_local", unknown_code, 2000),
+    ]
+
+    # Índice de países (el que usa la GUI al tipear y get_gini_data al validar)
+    from country_index import get_country_index
+    index = get_country_index()
+    _expect(index is not None and "ARG" in index, "country_index: no se pudo cargar la instantánea")
+    benchmarks += [
+        Benchmark("country_index.complete_code_prefix", lambda: index.complete("a"), 5000),
+        Benchmark("country_index.complete_name_word", lambda: index.complete("rep"), 5000),
+        Benchmark("country_index.validate", lambda: "arg" in index, 20000),
+    ]
+
+    # get_gini_data servido desde la caché (memoria delante de SQLite)
+    cache_dir = tempfile.mkdtemp(prefix="gini_bench_")
+
+    def cache_setup():
+        saved["_gini_cache_instance"] = core_logic._gini_cache_instance
+        core_logic._gini_cache_instance = GiniCache(os.path.join(cache_dir, "cache.sqlite3"))
+        core_logic.get_gini_data("ARG")
+
+    def cache_teardown():
+        core_logic._gini_cache_instance.close()
+        restore()
+
+    def cache_hit():
+        records, error = core_logic.get_gini_data("ARG")
+        _expect(error is None and records, "cache_hit: sin registros")
+
+    benchmarks.append(Benchmark("get_gini_data.cache_hit", cache_hit, 5000, setup=cache_setup, teardown=cache_teardown))
+
+    # Revalidación de una entrada en caché: petición condicional de los últimos años -> 304
+    def revalidate_setup():
+        cache_setup()
+        core_logic.get_gini_data("ARG", force_refresh=True) # Guarda el ETag del tramo incremental
+
+    def revalidate():
+        records, error = core_logic.get_gini_data("ARG", force_refresh=True)
+        _expect(error is None and len(records) == 10, f"revalidate_304: {error!r}")
+
+    benchmarks.append(Benchmark("get_gini_data.revalidate_304", revalidate, 200, NETWORK_THRESHOLD,
+                                setup=revalidate_setup, teardown=cache_teardown))
+
+    # Varios indicadores para muchos países (tablero): pocas consultas agrupadas en lugar de una por par
+    dashboard_codes = [country.iso3 for country in index.countries if not country.aggregate][:200]
+    dashboard_indicators = ["SI.POV.GINI", "SI.DST.FRST.20", "SI.DST.02ND.20", "SI.DST.10TH.10", "SI.POV.DDAY"]
+
+    def fetch_dashboard():
+        requests_before = server.request_count
+        store, errors = core_logic.fetch_indicators(dashboard_codes, dashboard_indicators, use_cache=False)
+        requests_made = server.request_count - requests_before
+        _expect(not errors and len(store) == 200 * 5 * 10 and requests_made <= 40,
+                f"indicators: {len(errors)} errores, {len(store)} valores, {requests_made} peticiones")
+
+    benchmarks.append(Benchmark("indicators.fetch_5x200", fetch_dashboard, 10, NETWORK_THRESHOLD))
+
+    # Precarga de los 32 países más consultados (sin esperas ni tope por minuto) y la búsqueda
+    # de la GUI servida luego desde la caché en memoria
+    from prefetch_scheduler import PrefetchScheduler, QueryStats
+    prefetch_codes = dashboard_codes[:32]
+
+    def prefetch_top32():
+        core_logic._gini_cache_instance.clear()
+        stats = QueryStats()
+        stats.record(prefetch_codes)
+        scheduler = PrefetchScheduler(stats, stats_path="", max_batches_per_minute=0, idle_seconds=0, warm_native=False)
+        requests_before = server.request_count
+        while scheduler.step():
+            pass
+        requests_made = server.request_count - requests_before
+        _expect(all(core_logic.cached_gini_data(code, memory_only=True) is not None for code in prefetch_codes)
+                and requests_made == 8, f"prefetch: {requests_made} peticiones")
+
+    def memory_lookup():
+        _expect(core_logic.cached_gini_data("ARG", memory_only=True) is not None, "memory_lookup: ARG no está en memoria")
+
+    benchmarks += [
+        Benchmark("prefetch.warm_top32", prefetch_top32, 20, NETWORK_THRESHOLD, setup=cache_setup, teardown=cache_teardown),
+        Benchmark("prefetch.memory_lookup", memory_lookup, 20000, setup=cache_setup, teardown=cache_teardown),
+    ]
+
+    # find_latest_valid_gini
+    records_10 = list(server.records_for(["ARG"], "2011:2020"))
+    records_64 = list(server.records_for(["ARG"], "1960:2023"))
+    series_64 = GiniSeries.from_records(records_64)
+    benchmarks += [
+        Benchmark("find_latest_valid_gini.records_10", lambda: core_logic.find_latest_valid_gini(records_10), 5000),
+        Benchmark("find_latest_valid_gini.records_64", lambda: core_logic.find_latest_valid_gini(records_64), 2000),
+        Benchmark("find_latest_valid_gini.series_64", lambda: core_logic.find_latest_valid_gini(series_64), 10000),
+    ]
+
+    # Historial de la GUI: todas las economías × 60 años (la vista se arma fuera del hilo de Tk)
+    all_codes = [f"{chr(65 + i // 26 % 26)}{chr(65 + i % 26)}X" for i in range(217)]
+    records_all = list(server.records_for(all_codes, "1964:2023"))
+    series_all = GiniSeries.from_records(records_all)
+    long_x = list(range(20000))
+    long_y = [((i * 7919) % 1000) / 10.0 for i in long_x]
+    try:
+        from gui import build_history_view
+    except ImportError as e: # Sin tkinter
+        skipped["history.build_view_all_economies"] = f"no se pudo importar gui: {e}"
+    else:
+        benchmarks.append(Benchmark("history.build_view_all_economies", lambda: build_history_view(series_all), 50))
+    benchmarks.append(Benchmark("history.lttb_20000_to_600", lambda: lttb(long_x, long_y, 600), 200))
+
+    # Función C/ASM cruda (biblioteca 64-bit cargada con ctypes) y referencia en Python
+    batch_1000 = [i * 0.37 for i in range(1000)]
+    inprocess = core_logic.InProcessBackend()
+    if inprocess.is_available():
+        raw_round = inprocess._lib.process_gini_float
+        benchmarks += [
+            Benchmark("native.inprocess.raw_process_gini_float", lambda: raw_round(42.5), 20000),
+            Benchmark("native.inprocess.round_batch_1000", lambda: inprocess.round_batch(batch_1000), 2000),
+        ]
+    else:
+        skipped["native.inprocess.*"] = f"'{inprocess.library_path}' no disponible (ejecuta ./build.sh)"
+    python_backend = core_logic.PythonBackend()
+    benchmarks += [
+        Benchmark("native.python.round_value", lambda: python_backend.round_value(42.5), 20000),
+        Benchmark("native.python.round_batch_1000", lambda: python_backend.round_batch(batch_1000), 1000),
+    ]
+
+    # Puente Client64 -> Server32 (lanza un proceso de Python 32-bit; puede tardar en arrancar)
+    lib32_path = os.path.join(os.path.dirname(core_logic.LIB64_PATH), "libginiprocessor.so")
+    if only and not ("bridge.server32.".startswith(only) or only.startswith("bridge.server32.")):
+        pass # Filtrado con --only: no vale la pena lanzar el servidor
+    elif not os.path.exists(lib32_path):
+        skipped["bridge.server32.*"] = f"'{lib32_path}' no existe (ejecuta ./build.sh)"
+    elif core_logic._get_client() is None:
+        skipped["bridge.server32.*"] = "el servidor 32-bit no pudo iniciarse"
+    else:
+        pool = core_logic._server32_pool
+        benchmarks += [
+            Benchmark("bridge.server32.ping", lambda: pool.call("ping_server"), 500),
+            Benchmark("bridge.server32.round_value", lambda: pool.call("process_gini_float_on_server", 42.5), 500),
+            Benchmark("bridge.server32.round_batch_1000", lambda: pool.map_batch(batch_1000), 500),
+        ]
+    return benchmarks
+
+
+# --- Línea Base ---
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], threshold: Optional[float]) -> List[str]:
+    """Devuelve la lista de regresiones (y muestra la tabla comparativa)."""
+    regressions = []
+    baseline_results = baseline.get("results", {})
+    print(f"\n{'benchmark':<44} {'base (µs)':>12} {'actual (µs)':>12} {'cambio':>9}")
+    for name, result in results.items():
+        reference = baseline_results.get(name)
+        if reference is None:
+            print(f"{name:<44} {'-':>12} {result['median_us']:>12.2f} {'nuevo':>9}")
+            continue
+        limit = threshold if threshold is not None else reference.get("threshold", DEFAULT_THRESHOLD)
+        change = result["median_us"] / reference["median_us"] - 1.0 if reference["median_us"] > 0 else 0.0
+        flag = ""
+        if change > limit:
+            flag = f"  <-- REGRESIÓN (límite +{limit:.0%})"
+            regressions.append(f"{name}: {reference['median_us']:.2f} -> {result['median_us']:.2f} µs ({change:+.1%})")
+        print(f"{name:<44} {reference['median_us']:>12.2f} {result['median_us']:>12.2f} {change:>+9.1%}{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks del pipeline GINI contra un simulador local de la API.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Archivo JSON de línea base")
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda los resultados como nueva línea base")
+    parser.add_argument("--compare", action="store_true", help="Compara contra la línea base (código 1 si hay regresiones)")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="Umbral de regresión único (fracción, p. ej. 0.2); por defecto el de cada benchmark")
+    parser.add_argument("--output", help="Guarda los resultados de esta corrida en este archivo JSON")
+    parser.add_argument("--only", default="", help="Solo los benchmarks cuyo nombre empieza con este prefijo")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplica la cantidad de iteraciones")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia simulada por petición HTTP")
+    args = parser.parse_args(argv)
+
+    server = FakeWorldBankServer(latency=args.latency_ms / 1000.0).start()
+    # core_logic lee estas variables al importarse: sin caché en disco, sin base offline, sin ruido
+    os.environ["GINI_API_BASE_URL"] = server.base_url
+    os.environ["GINI_CACHE_PATH"] = ""
+    os.environ["GINI_BULK_STORE"] = ""
+    os.environ["GINI_COUNTRY_INDEX"] = "" # Solo la instantánea incluida (no la copia actualizada del usuario)
+    os.environ.setdefault("GINI_LOG_LEVEL", "CRITICAL")
+    import core_logic
+
+    skipped: Dict[str, str] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for benchmark in build_benchmarks(core_logic, server, skipped, args.only):
+            if not benchmark.name.startswith(args.only):
+                continue
+            results[benchmark.name] = measure(benchmark, args.scale)
+            r = results[benchmark.name]
+            print(f"{benchmark.name:<44} mediana {r['median_us']:>10.2f} µs   p95 {r['p95_us']:>10.2f} µs   (n={r['iterations']})")
+    finally:
+        core_logic._server32_pool.shutdown()
+        server.stop()
+    for name, reason in skipped.items():
+        print(f"{name:<44} omitido: {reason}")
+
+    report = {
+        "format": FORMAT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"python": platform.python_version(), "implementation": platform.python_implementation(),
+                    "platform": platform.platform(), "processor": platform.machine()},
+        "settings": {"latency_ms": args.latency_ms, "scale": args.scale},
+        "results": results,
+        "skipped": skipped,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    status = 0
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"\nNo existe la línea base '{args.baseline}'. Créala con --save-baseline.", file=sys.stderr)
+            return 2
+        with open(args.baseline, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        if baseline.get("settings") != report["settings"]:
+            print(f"\nAdvertencia: la línea base se midió con otra configuración ({baseline.get('settings')}).", file=sys.stderr)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regresión(es):", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            status = 1
+        else:
+            print("\nSin regresiones respecto de la línea base.")
+    if args.save_baseline:
+        if args.only and os.path.exists(args.baseline):
+            # Corrida parcial: se actualizan solo los benchmarks medidos
+            with open(args.baseline, encoding="utf-8") as handle:
+                previous = json.load(handle)
+            previous["results"].update(results)
+            results_to_save = dict(report, results=previous["results"])
+        else:
+            results_to_save = report
+        with open(args.baseline, "w", encoding="utf-8") as handle:
+            json.dump(results_to_save, handle, indent=2)
+        print(f"\nLínea base guardada en '{args.baseline}'.")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,284 @@
+# tests/benchmarks/fake_worldbank.py
+# Simulador local de la API del Banco Mundial para benchmarks y pruebas sin red.
+# Responde /v2/en/country/{códigos}/indicator/SI.POV.GINI con las mismas formas JSON
+# que la API real (y /v2/en/country con la lista de economías, tomada de src/country_snapshot.tsv).
+# Acepta varios indicadores 'A;B' (exige 'source', como la API) y los valores dependen del indicador:
+#   - datos paginados  : [{"page", "pages", "per_page", "total", ...}, [registros...]]
+#   - sin datos        : [{"message": [{"id": "120", "key": "Invalid value", "value": "No data available"}]}]
+#   - código inválido  : XML con "Invalid value" (Content-Type text/xml, como la API real)
+#   - indicador inválido o varios sin 'source': mensaje JSON de error
+# La latencia por petición y el tamaño de cada registro son configurables.
+# Cada respuesta JSON lleva ETag y Last-Modified; con If-None-Match / If-Modified-Since
+# vigentes responde 304 sin cuerpo. publish_until(año) simula la publicación de años nuevos.
+# Inyección de fallas (para las pruebas de resiliencia): una fracción de las peticiones puede
+# tardar de más (slow_rate / slow_latency), responder 503 (error_rate) o cortar la conexión sin
+# responder (drop_rate); outage=True hace que todas respondan 503.
+#
+# Uso: python tests/benchmarks/fake_worldbank.py --port 8765 --latency-ms 40
+#      python tests/benchmarks/fake_worldbank.py --slow-rate 0.05 --slow-ms 2000 --error-rate 0.1
+#      GINI_API_BASE_URL=http://127.0.0.1:8765/v2/en/country ./run.sh
+
+import argparse
+import email.utils
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, List, Dict, Any, Iterable
+
+# --- Configuración por defecto ---
+DEFAULT_INVALID_CODES = ("ZZZ",)   # Responden XML "Invalid value" (no JSON)
+DEFAULT_NO_DATA_CODES = ("NOD",)   # Responden el mensaje "No data available"
+DEFAULT_INVALID_INDICATORS = ("BAD.INDICATOR",)
+GINI_INDICATOR = "SI.POV.GINI"
+DEFAULT_DATE_RANGE = "2011:2020"
+DEFAULT_PER_PAGE = 50
+COUNTRY_SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "src", "country_snapshot.tsv")
+
+_NO_DATA_PAYLOAD = [{"message": [{"id": "120", "key": "Invalid value", "value": "No data available"}]}]
+_INVALID_INDICATOR_PAYLOAD = [{"message": [{"id": "120", "key": "Invalid value", "value": "The provided parameter value is not valid"}]}]
+_SOURCE_REQUIRED_PAYLOAD = [{"message": [{"id": "160", "key": "Invalid format",
+                                          "value": "A source must be specified when requesting multiple indicators"}]}]
+_INVALID_VALUE_XML = (b'<?xml version="1.0" encoding="utf-8"?>\r\n'
+                      b'<wb:error xmlns:wb="http://www.worldbank.org">\r\n'
+                      b'  <wb:message id="120" key="Invalid value">The provided parameter value is not valid</wb:message>\r\n'
+                      b'</wb:error>')
+
+
+def load_country_list(path: str = COUNTRY_SNAPSHOT) -> List[Dict[str, Any]]:
+    """Registros de /v2/country ({'id', 'iso2Code', 'name', 'region'}) a partir de la instantánea del repositorio."""
+    countries = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if line.startswith("#") or not line.strip():
+                continue
+            iso3, iso2, aggregate, name = line.rstrip("\n").split("\t")
+            region = {"id": "NA", "iso2code": "NA", "value": "Aggregates" if aggregate == "1" else "Latin America & Caribbean "}
+            countries.append({"id": iso3, "iso2Code": iso2, "name": name, "region": region})
+    return countries
+
+
+def make_record(code: str, year: int, padding: int = 0, indicator: str = GINI_INDICATOR) -> Dict[str, Any]:
+    """Registro con la forma de la API. Los años pares no tienen valor (como muchos países reales)."""
+    seed = sum(map(ord, code)) * 31 + year + (0 if indicator == GINI_INDICATOR else sum(map(ord, indicator)))
+    record = {
+        "indicator": {"id": indicator, "value": "Gini index" if indicator == GINI_INDICATOR else indicator},
+        "country": {"id": code[:2], "value": f"Country {code}"},
+        "countryiso3code": code,
+        "date": str(year),
+        "value": round(30.0 + seed % 300 / 10.0, 1) if year % 2 else None,
+        "unit": "",
+        "obs_status": "x" * padding, # Relleno para simular respuestas más pesadas
+        "decimal": 1,
+    }
+    return record
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "FakeWorldBankServer"
+    protocol_version = "HTTP/1.1" # Keep-alive, como la API real
+    disable_nagle_algorithm = True # Encabezados y cuerpo van en dos escrituras: sin esto, +40 ms por ACK diferido
+
+    def log_message(self, format, *args): # Silencioso: el benchmark no quiere ruido en stderr
+        pass
+
+    def _send(self, status: int, content_type: str, body: bytes, validators: bool = False) -> None:
+        fake = self.server
+        if validators:
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            since = self.headers.get("If-Modified-Since")
+            not_modified = self.headers.get("If-None-Match") == etag if self.headers.get("If-None-Match") else \
+                since is not None and email.utils.parsedate_to_datetime(since).timestamp() >= int(fake.modified_at)
+            if not_modified:
+                fake.not_modified_count += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if validators:
+            self.send_header("ETag", etag)
+            self.send_header("Last-Modified", email.utils.formatdate(fake.modified_at, usegmt=True))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        fake = self.server
+        fake.request_count += 1
+        fault = fake.pick_fault()
+        if fault == "drop":
+            self.close_connection = True # Sin respuesta: el cliente ve la conexión cerrada
+            return
+        delay = fake.latency + (fake.slow_latency if fault == "slow" else 0.0)
+        if delay:
+            time.sleep(delay)
+        if fault == "error":
+            self._send(503, "text/html", b"<html><body>Service Unavailable</body></html>")
+            return
+
+        url = urllib.parse.urlsplit(self.path) # urlparse separaría el ";IND2" final como parámetros de ruta
+        query = dict(urllib.parse.parse_qsl(url.query))
+        parts = url.path.strip("/").split("/")
+        # v2 / <idioma> / country: lista de economías, paginada como los datos
+        if len(parts) == 3 and parts[0] == "v2" and parts[2] == "country":
+            self._send_page(fake.countries, query)
+            return
+        # v2 / <idioma> / country / {códigos} / indicator / {indicador}
+        if len(parts) != 6 or parts[0] != "v2" or parts[2] != "country" or parts[4] != "indicator":
+            self._send(404, "text/html", b"<html><body>Not found</body></html>")
+            return
+
+        codes = [code.upper() for code in parts[3].split(";") if code]
+        if any(code in fake.invalid_codes for code in codes):
+            self._send(200, "text/xml; charset=utf-8", _INVALID_VALUE_XML)
+            return
+        indicators = [indicator.upper() for indicator in parts[5].split(";") if indicator]
+        if len(indicators) > 1 and not query.get("source"):
+            self._send(200, "application/json;charset=utf-8", json.dumps(_SOURCE_REQUIRED_PAYLOAD).encode())
+            return
+        if any(indicator in fake.invalid_indicators for indicator in indicators):
+            self._send(200, "application/json;charset=utf-8", json.dumps(_INVALID_INDICATOR_PAYLOAD).encode())
+            return
+        codes = [code for code in codes if code not in fake.no_data_codes]
+        records = list(fake.records_for(codes, query.get("date", DEFAULT_DATE_RANGE), indicators))
+        if not records:
+            self._send(200, "application/json;charset=utf-8", json.dumps(_NO_DATA_PAYLOAD).encode(), validators=True)
+            return
+
+        self._send_page(records, query)
+
+    def _send_page(self, records: List[Dict[str, Any]], query: Dict[str, str]) -> None:
+        per_page = max(1, int(query.get("per_page", DEFAULT_PER_PAGE)))
+        page = max(1, int(query.get("page", 1)))
+        pages = (len(records) + per_page - 1) // per_page
+        header = {"page": page, "pages": pages, "per_page": per_page, "total": len(records),
+                  "sourceid": "2", "lastupdated": "2024-01-01"}
+        body = json.dumps([header, records[(page - 1) * per_page:page * per_page]]).encode()
+        self._send(200, "application/json;charset=utf-8", body, validators=True)
+
+
+class FakeWorldBankServer(ThreadingHTTPServer):
+    """
+    Servidor HTTP local en un hilo de fondo. 'base_url' es el valor para GINI_API_BASE_URL
+    (o core_logic.BASE_URL). Los parámetros se pueden cambiar en caliente entre mediciones.
+    """
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, record_padding: int = 0,
+                 invalid_codes: Iterable[str] = DEFAULT_INVALID_CODES,
+                 no_data_codes: Iterable[str] = DEFAULT_NO_DATA_CODES):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.latency = latency
+        self.record_padding = record_padding
+        self.invalid_codes = set(invalid_codes)
+        self.no_data_codes = set(no_data_codes)
+        self.invalid_indicators = set(DEFAULT_INVALID_INDICATORS)
+        self.countries = load_country_list() # Respuesta de /v2/<idioma>/country
+        self.request_count = 0
+        self.not_modified_count = 0
+        self.published_until: Optional[int] = None # Último año publicado (None = todos)
+        self.modified_at = time.time()
+        self._thread: Optional[threading.Thread] = None
+        # Inyección de fallas (ver pick_fault)
+        self.slow_rate = 0.0
+        self.slow_latency = 0.0
+        self.error_rate = 0.0
+        self.drop_rate = 0.0
+        self.outage = False
+        self.fault_counts: Dict[str, int] = {"slow": 0, "error": 0, "drop": 0}
+        self._random = random.Random(0)
+        self._fault_lock = threading.Lock()
+
+    def pick_fault(self) -> Optional[str]:
+        """Sortea la falla de una petición: 'drop', 'error', 'slow' o None."""
+        with self._fault_lock:
+            roll = self._random.random()
+            if self.outage:
+                fault = "error"
+            elif roll < self.drop_rate:
+                fault = "drop"
+            elif roll < self.drop_rate + self.error_rate:
+                fault = "error"
+            elif roll < self.drop_rate + self.error_rate + self.slow_rate:
+                fault = "slow"
+            else:
+                return None
+            self.fault_counts[fault] += 1
+            return fault
+
+    def set_faults(self, slow_rate: float = 0.0, slow_latency: float = 0.0, error_rate: float = 0.0,
+                   drop_rate: float = 0.0, outage: bool = False, seed: int = 0) -> None:
+        """Configura las fallas (todas apagadas por defecto) y reinicia el sorteo y los contadores."""
+        with self._fault_lock:
+            self.slow_rate, self.slow_latency = slow_rate, slow_latency
+            self.error_rate, self.drop_rate, self.outage = error_rate, drop_rate, outage
+            self.fault_counts = {"slow": 0, "error": 0, "drop": 0}
+            self._random = random.Random(seed)
+
+    def handle_error(self, request, client_address):
+        # Clientes que cortan la conexión (timeouts, coberturas descartadas) son esperables aquí
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_port}/v2/en/country"
+
+    def records_for(self, codes: List[str], date_range: str,
+                    indicators: Iterable[str] = (GINI_INDICATOR,)) -> Iterable[Dict[str, Any]]:
+        """Registros de los países pedidos, por indicador y más reciente primero (como la API)."""
+        first_year, last_year = (int(part) for part in date_range.split(":"))
+        if self.published_until is not None:
+            last_year = min(last_year, self.published_until)
+        for indicator in indicators:
+            for code in codes:
+                for year in range(last_year, first_year - 1, -1):
+                    yield make_record(code, year, self.record_padding, indicator)
+
+    def publish_until(self, year: Optional[int]) -> None:
+        """Simula una publicación del indicador: cambian los datos y el Last-Modified."""
+        self.published_until = year
+        self.modified_at = time.time() + 1 # Last-Modified tiene resolución de segundos
+
+    def start(self) -> "FakeWorldBankServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="FakeWorldBank", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Simulador local de la API GINI del Banco Mundial.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latencia agregada a cada petición")
+    parser.add_argument("--record-padding", type=int, default=0, help="Bytes de relleno por registro")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fracción de peticiones lentas")
+    parser.add_argument("--slow-ms", type=float, default=0.0, help="Latencia extra de las peticiones lentas")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de peticiones que responden 503")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fracción de conexiones cortadas sin respuesta")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla del sorteo de fallas")
+    args = parser.parse_args(argv)
+    server = FakeWorldBankServer(args.port, latency=args.latency_ms / 1000.0, record_padding=args.record_padding)
+    server.set_faults(args.slow_rate, args.slow_ms / 1000.0, args.error_rate, args.drop_rate, seed=args.seed)
+    print(f"Simulador escuchando en {server.base_url} (Ctrl+C para salir)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
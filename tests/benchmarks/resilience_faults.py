@@ -0,0 +1,250 @@
+# tests/benchmarks/resilience_faults.py
+# Prueba de la capa de resiliencia (src/gini_resilience.py) contra el simulador local de la API
+# con inyección de fallas (fake_worldbank.py). Cada escenario se corre sin y con la política
+# (sin: un solo intento, sin cobertura) y se reportan éxito, p50, p99, máximo y fracción de
+# consultas lentas (más de SLOW_CALL_MS):
+#   - slow_tail : 5% de las peticiones tardan 1 s de más -> la cobertura debe dejar lentas solo las
+#                 consultas en que el original y la cobertura salieron lentos (~0.25%)
+#   - errors    : 20% de las peticiones responden 503      -> los reintentos deben recuperar casi todas
+#   - drops     : 10% de las conexiones se cortan          -> ídem
+#   - slower    : tras un historial rápido, todas las respuestas pasan a tardar SLOWER_LATENCY
+#                 (más que el timeout aprendido) -> el timeout debe crecer y las consultas volver a
+#                 responder, en lugar de vencer para siempre
+#   - outage    : todas responden 503                      -> el circuito se abre, las consultas fallan
+#                 al instante (o sirven la copia vencida) y se cierra cuando el servicio vuelve
+# Termina con código 1 si alguna expectativa no se cumple.
+#
+# Uso: python tests/benchmarks/resilience_faults.py
+#      python tests/benchmarks/resilience_faults.py --calls 500 --only slow_tail --output faults.json
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import Optional, List, Dict, Any, Callable
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, "..", "..", "src"))
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_worldbank import FakeWorldBankServer
+
+BASE_LATENCY = 0.020     # Latencia normal simulada (s)
+WARMUP_CALLS = 40        # Llenan la ventana de latencias antes de medir
+SLOW_CALL_MS = 200.0     # Una consulta más lenta que esto cuenta como cola
+SLOWER_LATENCY = 1.3     # Latencia estable del escenario 'slower' (supera el MIN_TIMEOUT aprendido)
+SLOWER_CALLS = 14        # Consultas del escenario 'slower' (cada una tarda más de un segundo)
+
+
+def configure(core_logic, resilient: bool, breaker_reset: float = 30.0) -> None:
+    """Política nueva: completa (resilient) o un solo intento sin cobertura ni circuito efectivo."""
+    core_logic.HTTP_RETRIES = 2 if resilient else 0
+    core_logic.HTTP_HEDGE = resilient
+    core_logic.HTTP_BREAKER_FAILURES = 5 if resilient else 10 ** 9
+    core_logic.HTTP_BREAKER_RESET = breaker_reset
+    if core_logic._resilience_instance is not None:
+        core_logic._resilience_instance.shutdown()
+    core_logic._resilience_instance = None
+
+
+def run_calls(core_logic, calls: int, code: str = "ARG") -> Dict[str, Any]:
+    """Hace 'calls' consultas sin caché y resume éxito y latencias (ms)."""
+    latencies: List[float] = []
+    failures = 0
+    for _ in range(calls):
+        start = time.perf_counter()
+        records, error = core_logic.get_gini_data(code, use_cache=False)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if error is not None:
+            failures += 1
+    ordered = sorted(latencies)
+    return {
+        "calls": calls,
+        "success_rate": 1 - failures / calls,
+        "p50_ms": statistics.median(ordered),
+        "p99_ms": ordered[min(len(ordered) - 1, int(0.99 * len(ordered)))],
+        "max_ms": ordered[-1],
+        "slow_fraction": sum(1 for latency in ordered if latency > SLOW_CALL_MS) / calls,
+    }
+
+
+def scenario_pair(core_logic, server: FakeWorldBankServer, calls: int, **faults) -> Dict[str, Dict[str, Any]]:
+    """Mismo escenario sin y con la política (misma semilla de fallas)."""
+    results = {}
+    for label, resilient in (("plain", False), ("resilient", True)):
+        configure(core_logic, resilient)
+        server.set_faults()
+        run_calls(core_logic, WARMUP_CALLS)
+        server.set_faults(**faults)
+        results[label] = run_calls(core_logic, calls)
+        results[label]["faults"] = dict(server.fault_counts)
+        if resilient:
+            results[label]["policy"] = core_logic._resilience_instance.snapshot()
+    return results
+
+
+def scenario_slower(core_logic, server: FakeWorldBankServer) -> Dict[str, Dict[str, Any]]:
+    """Servicio uniformemente más lento que el timeout aprendido: debe volver a responder."""
+    results = {}
+    try:
+        for label, resilient in (("plain", False), ("resilient", True)):
+            configure(core_logic, resilient)
+            server.set_faults()
+            server.latency = BASE_LATENCY
+            run_calls(core_logic, WARMUP_CALLS)
+            learned = core_logic._resilience_instance.attempt_timeout()
+            server.latency = SLOWER_LATENCY
+            results[label] = run_calls(core_logic, SLOWER_CALLS)
+            results[label]["learned_timeout_s"] = learned
+            results[label]["policy"] = core_logic._resilience_instance.snapshot()
+    finally:
+        server.latency = BASE_LATENCY
+    return results
+
+
+def scenario_outage(core_logic, server: FakeWorldBankServer) -> Dict[str, Any]:
+    """Caída total: fallo rápido con el circuito abierto, copia vencida servida y recuperación."""
+    from gini_cache import GiniCache
+
+    reset = 1.0
+    configure(core_logic, True, breaker_reset=reset)
+    server.set_faults()
+    run_calls(core_logic, WARMUP_CALLS)
+    previous_cache = core_logic._gini_cache_instance
+    cache_dir = tempfile.mkdtemp(prefix="gini_faults_")
+    core_logic._gini_cache_instance = GiniCache(os.path.join(cache_dir, "cache.sqlite3"), ttl_seconds=0)
+    try:
+        core_logic.get_gini_data("BRA") # Queda en caché, vencida al instante (TTL 0)
+        server.set_faults(outage=True)
+        until_open = run_calls(core_logic, core_logic.HTTP_BREAKER_FAILURES)
+        requests_before = server.request_count
+        while_open = run_calls(core_logic, 50)
+        upstream_while_open = server.request_count - requests_before
+
+        start = time.perf_counter()
+        stale_records, stale_error = core_logic.get_gini_data("BRA")
+        stale_ms = (time.perf_counter() - start) * 1000
+
+        server.set_faults()
+        time.sleep(reset + 0.1)
+        recovered = run_calls(core_logic, 5)
+        state = core_logic._resilience_instance.breaker.state
+    finally:
+        core_logic._gini_cache_instance.close()
+        core_logic._gini_cache_instance = previous_cache
+    return {
+        "until_open": until_open,
+        "while_open": while_open,
+        "upstream_requests_while_open": upstream_while_open,
+        "stale_served": stale_error is None and bool(stale_records),
+        "stale_ms": stale_ms,
+        "recovered": recovered,
+        "breaker_state_after": state,
+    }
+
+
+def check(results: Dict[str, Any]) -> List[str]:
+    """Expectativas de cada escenario; devuelve la lista de incumplimientos."""
+    failures = []
+
+    def expect(condition: bool, message: str) -> None:
+        if not condition:
+            failures.append(message)
+
+    if "slow_tail" in results:
+        plain, resilient = results["slow_tail"]["plain"], results["slow_tail"]["resilient"]
+        expect(resilient["slow_fraction"] <= plain["slow_fraction"] / 4,
+               f"slow_tail: {resilient['slow_fraction']:.1%} de consultas lentas con cobertura "
+               f"(sin cobertura {plain['slow_fraction']:.1%}; se esperaba menos de la cuarta parte)")
+    for name in ("errors", "drops"):
+        if name in results:
+            plain, resilient = results[name]["plain"], results[name]["resilient"]
+            expect(resilient["success_rate"] >= 0.98,
+                   f"{name}: éxito {resilient['success_rate']:.1%} con reintentos (se esperaba >= 98%)")
+            expect(resilient["success_rate"] > plain["success_rate"],
+                   f"{name}: los reintentos no mejoraron el éxito ({plain['success_rate']:.1%})")
+    if "slower" in results:
+        resilient = results["slower"]["resilient"]
+        expect(resilient["learned_timeout_s"] < SLOWER_LATENCY,
+               f"slower: el timeout aprendido ({resilient['learned_timeout_s']:.2f} s) ya cubría la latencia nueva")
+        expect(resilient["success_rate"] >= 0.9,
+               f"slower: éxito {resilient['success_rate']:.1%} con el servicio más lento (se esperaba >= 90%)")
+        expect(resilient["policy"]["attempt_timeout_s"] > SLOWER_LATENCY,
+               f"slower: el timeout quedó en {resilient['policy']['attempt_timeout_s']:.2f} s "
+               f"(menos que la latencia de {SLOWER_LATENCY} s)")
+    if "outage" in results:
+        outage = results["outage"]
+        expect(outage["while_open"]["p99_ms"] < 5, f"outage: con el circuito abierto el p99 es {outage['while_open']['p99_ms']:.1f} ms")
+        expect(outage["upstream_requests_while_open"] == 0,
+               f"outage: {outage['upstream_requests_while_open']} peticiones llegaron al servidor con el circuito abierto")
+        expect(outage["stale_served"], "outage: no se sirvió la copia vencida")
+        expect(outage["recovered"]["success_rate"] == 1.0 and outage["breaker_state_after"] == "closed",
+               "outage: el circuito no se cerró al volver el servicio")
+    return failures
+
+
+def print_row(name: str, label: str, r: Dict[str, Any]) -> None:
+    print(f"{name:<10} {label:<10} éxito {r['success_rate']:>7.1%}   p50 {r['p50_ms']:>8.1f} ms   "
+          f"p99 {r['p99_ms']:>8.1f} ms   máx {r['max_ms']:>8.1f} ms   lentas {r['slow_fraction']:>6.1%}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prueba de resiliencia contra el simulador con fallas.")
+    parser.add_argument("--calls", type=int, default=500, help="Consultas por escenario")
+    parser.add_argument("--only", default="", help="Solo este escenario (slow_tail, errors, drops, slower, outage)")
+    parser.add_argument("--output", help="Guarda los resultados en este archivo JSON")
+    args = parser.parse_args(argv)
+
+    server = FakeWorldBankServer(latency=BASE_LATENCY).start()
+    # core_logic lee estas variables al importarse: sin caché en disco, sin base offline, sin ruido
+    os.environ["GINI_API_BASE_URL"] = server.base_url
+    os.environ["GINI_CACHE_PATH"] = ""
+    os.environ["GINI_BULK_STORE"] = ""
+    os.environ.setdefault("GINI_LOG_LEVEL", "CRITICAL")
+    import core_logic
+
+    scenarios: Dict[str, Callable[[], Any]] = {
+        "slow_tail": lambda: scenario_pair(core_logic, server, args.calls, slow_rate=0.05, slow_latency=1.0, seed=1),
+        "errors": lambda: scenario_pair(core_logic, server, args.calls, error_rate=0.2, seed=2),
+        "drops": lambda: scenario_pair(core_logic, server, args.calls, drop_rate=0.1, seed=3),
+        "slower": lambda: scenario_slower(core_logic, server),
+        "outage": lambda: scenario_outage(core_logic, server),
+    }
+    results: Dict[str, Any] = {}
+    try:
+        for name, run in scenarios.items():
+            if args.only and name != args.only:
+                continue
+            results[name] = run()
+            if name == "outage":
+                outage = results[name]
+                print_row(name, "abriendo", outage["until_open"])
+                print_row(name, "abierto", outage["while_open"])
+                print(f"{name:<10} {'vencida':<10} servida: {outage['stale_served']}  ({outage['stale_ms']:.1f} ms)")
+                print_row(name, "recupera", outage["recovered"])
+            else:
+                for label in ("plain", "resilient"):
+                    print_row(name, label, results[name][label])
+    finally:
+        configure(core_logic, True)
+        server.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+    failures = check(results)
+    if failures:
+        print(f"\n{len(failures)} expectativa(s) sin cumplir:", file=sys.stderr)
+        for line in failures:
+            print(f"  {line}", file=sys.stderr)
+        return 1
+    print("\nTodas las expectativas de resiliencia se cumplen.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
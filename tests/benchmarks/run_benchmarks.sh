@@ -0,0 +1,53 @@
+#!/bin/bash
+# run_benchmarks.sh: Ejecuta la suite de benchmarks contra el simulador local de la API.
+#                    Si existe la línea base (tests/benchmarks/baseline.json) compara contra ella
+#                    y falla si hay regresiones; si no existe, la crea.
+#
+# Uso: ./tests/benchmarks/run_benchmarks.sh                 (comparar o crear línea base)
+#      ./tests/benchmarks/run_benchmarks.sh --save-baseline (regenerar la línea base)
+#      Cualquier otro argumento se pasa a bench_gini.py (p. ej. --only get_gini_data --scale 0.5)
+
+# --- Funciones de color ---
+red() { echo -e "\033[31m$1\033[0m"; }
+green() { echo -e "\033[32m$1\033[0m"; }
+yellow() { echo -e "\033[33m$1\033[0m"; }
+bold() { echo -e "\033[1m$1\033[0m"; }
+
+# --- Ir a la raíz del proyecto (el script puede llamarse desde cualquier lado) ---
+cd "$(dirname "$0")/../.." || exit 1
+
+BENCH_SCRIPT="tests/benchmarks/bench_gini.py"
+BASELINE="tests/benchmarks/baseline.json"
+RESULTS="tests/benchmarks/last_run.json"
+
+# Usa el entorno virtual del proyecto si existe (creado por setup.sh)
+PYTHON="python3"
+if [ -x "venv/bin/python" ]; then
+    PYTHON="venv/bin/python"
+fi
+
+green "--- Benchmarks GINI (simulador local de la API) ---"
+
+if [[ " $* " == *" --save-baseline "* ]]; then
+    bold "Regenerando la línea base '${BASELINE}'..."
+    ${PYTHON} "${BENCH_SCRIPT}" --baseline "${BASELINE}" --output "${RESULTS}" "$@"
+    EXIT_CODE=$?
+elif [ -f "${BASELINE}" ]; then
+    bold "Comparando contra la línea base '${BASELINE}'..."
+    ${PYTHON} "${BENCH_SCRIPT}" --baseline "${BASELINE}" --output "${RESULTS}" --compare "$@"
+    EXIT_CODE=$?
+else
+    yellow "No existe '${BASELINE}': esta corrida se guarda como línea base."
+    ${PYTHON} "${BENCH_SCRIPT}" --baseline "${BASELINE}" --output "${RESULTS}" --save-baseline "$@"
+    EXIT_CODE=$?
+fi
+echo
+
+if [ $EXIT_CODE -eq 0 ]; then
+    green "--- Benchmarks Finalizados: OK (resultados en ${RESULTS}) ---"
+elif [ $EXIT_CODE -eq 1 ]; then
+    red "--- Benchmarks Finalizados: REGRESIONES DETECTADAS (ver arriba) ---"
+else
+    red "--- Benchmarks Finalizados: ERROR (código ${EXIT_CODE}) ---"
+fi
+exit $EXIT_CODE
@@ -0,0 +1,220 @@
+# tests/benchmarks/startup_budget.py
+# Presupuesto de arranque: importa cada módulo de entrada en un proceso nuevo con
+# 'python -X importtime', arma el árbol de importaciones y compara el tiempo acumulado
+# del módulo contra su presupuesto. También falla si el módulo arrastra dependencias
+# que deben cargarse recién en el primer uso (requests, msl-loadlib, tkinter en el modo
+# por lotes). Con DISPLAY disponible mide además el tiempo hasta la ventana de la GUI
+# (proceso nuevo -> GiniApp construida y primer update()).
+#
+# Las importaciones que hace el propio intérprete al iniciar (site, .pth instalados) no
+# cuentan: solo se mide el subárbol del módulo pedido.
+#
+# Uso: python tests/benchmarks/startup_budget.py                 (todos los módulos)
+#      python tests/benchmarks/startup_budget.py --only gui --runs 9 --output startup.json
+# Salida: 0 si todo está dentro del presupuesto, 1 si algo se pasa.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Optional, List, Dict, Any, NamedTuple, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, "..", "..", "src"))
+
+# Dependencias pesadas que solo se importan en el primer uso
+LAZY_DEPENDENCIES = ("requests", "urllib3", "charset_normalizer", "idna", "msl")
+WINDOW_BUDGET_MS = 200.0  # Proceso nuevo -> ventana construida
+
+
+class StartupTarget(NamedTuple):
+    module: str
+    budget_ms: float           # Tiempo acumulado de importación (mediana)
+    forbidden: Tuple[str, ...] # Paquetes que no deben aparecer en su árbol de importaciones
+
+
+TARGETS = [
+    StartupTarget("core_logic", 60.0, LAZY_DEPENDENCIES + ("tkinter",)),
+    StartupTarget("gini_cli", 70.0, LAZY_DEPENDENCIES + ("tkinter",)),
+    StartupTarget("gui", 150.0, LAZY_DEPENDENCIES),
+]
+
+# Construye la ventana, la dibuja una vez y avisa al proceso padre
+_WINDOW_SNIPPET = (
+    "import os, tkinter as tk, gui\n"
+    "root = tk.Tk()\n"
+    "app = gui.GiniApp(root)\n"
+    "root.update()\n"
+    "print('ready', flush=True)\n"
+    "os._exit(0)\n"
+)
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None) # Se mide con .pyc, como en una instalación normal
+    env["GINI_LOG_LEVEL"] = "CRITICAL"
+    return env
+
+
+def parse_importtime(stderr: str) -> List[Tuple[int, int, int, str]]:
+    """Líneas 'import time: self | cumulative | name' -> (profundidad, self_us, cumulative_us, nombre)."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue # Cabecera "self [us] | cumulative | imported package"
+        raw_name = fields[2].rstrip()
+        name = raw_name.lstrip()
+        depth = (len(raw_name) - len(name) - 1) // 2
+        entries.append((depth, int(fields[0]), int(fields[1]), name))
+    return entries
+
+
+def module_subtree(entries: List[Tuple[int, int, int, str]], module: str) -> Tuple[Optional[int], List[Tuple[int, int, int, str]]]:
+    """
+    Tiempo acumulado (µs) del módulo y las importaciones de su subárbol. importtime escribe
+    los hijos antes que el padre, así que el subárbol son las líneas entre la entrada de
+    nivel 0 anterior y la del módulo.
+    """
+    start = 0
+    for index, (depth, _, cumulative, name) in enumerate(entries):
+        if depth != 0:
+            continue
+        if name == module:
+            return cumulative, entries[start:index]
+        start = index + 1
+    return None, []
+
+
+def measure_import(module: str) -> Tuple[float, float, List[Tuple[int, int, int, str]]]:
+    """Una importación en un proceso nuevo: (acumulado ms, pared del proceso ms, subárbol)."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=SRC_DIR,
+                          env=_child_env(), capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000.0
+    if proc.returncode != 0:
+        raise RuntimeError(f"'import {module}' falló:\n{proc.stderr.strip()[-2000:]}")
+    cumulative_us, subtree = module_subtree(parse_importtime(proc.stderr), module)
+    if cumulative_us is None:
+        raise RuntimeError(f"No se encontró '{module}' en la salida de -X importtime.")
+    return cumulative_us / 1000.0, wall_ms, subtree
+
+
+def measure_interpreter(runs: int) -> float:
+    """Pared (ms) de 'python -c pass': el piso que pone el intérprete."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], cwd=SRC_DIR, env=_child_env(), check=True)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return statistics.median(samples)
+
+
+def measure_time_to_window(runs: int) -> Optional[float]:
+    """Mediana (ms) desde lanzar el proceso hasta la ventana dibujada; None si no hay pantalla."""
+    if not os.environ.get("DISPLAY") and sys.platform not in ("win32", "darwin"):
+        return None
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, "-c", _WINDOW_SNIPPET], cwd=SRC_DIR, env=_child_env(),
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        line = proc.stdout.readline()
+        elapsed = (time.perf_counter() - start) * 1000.0
+        proc.wait()
+        if line.strip() != "ready":
+            return None # Tk no pudo abrir la pantalla
+        samples.append(elapsed)
+    return statistics.median(samples)
+
+
+def check_target(target: StartupTarget, runs: int, top: int) -> Dict[str, Any]:
+    """Mide un módulo 'runs' veces y arma su reporte (mediana, más lentos, importaciones prohibidas)."""
+    measure_import(target.module) # Calentamiento: escribe los .pyc y llena la caché del sistema de archivos
+    cumulative, walls, subtree = [], [], []
+    for _ in range(runs):
+        cumulative_ms, wall_ms, subtree = measure_import(target.module)
+        cumulative.append(cumulative_ms)
+        walls.append(wall_ms)
+
+    modules = {name for _, _, _, name in subtree}
+    forbidden = sorted(name for name in modules if name.split(".")[0] in target.forbidden)
+    slowest = sorted(subtree, key=lambda entry: entry[1], reverse=True)[:top]
+    median_ms = statistics.median(cumulative)
+    return {
+        "module": target.module,
+        "budget_ms": target.budget_ms,
+        "import_ms": round(median_ms, 2),
+        "import_min_ms": round(min(cumulative), 2),
+        "process_wall_ms": round(statistics.median(walls), 2),
+        "modules_imported": len(modules),
+        "slowest_self_ms": [{"module": name, "self_ms": round(self_us / 1000.0, 2)} for _, self_us, _, name in slowest],
+        "forbidden_imports": forbidden,
+        "ok": median_ms <= target.budget_ms and not forbidden,
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    status = "OK" if report["ok"] else "EXCEDIDO"
+    print(f"{report['module']:<12} import {report['import_ms']:>7.1f} ms (mín {report['import_min_ms']:.1f})"
+          f"   presupuesto {report['budget_ms']:>6.1f} ms   proceso {report['process_wall_ms']:>6.1f} ms"
+          f"   {report['modules_imported']} módulos   [{status}]")
+    for entry in report["slowest_self_ms"]:
+        print(f"    {entry['self_ms']:>7.2f} ms  {entry['module']}")
+    if report["forbidden_imports"]:
+        print(f"    Importaciones que deberían ser diferidas: {', '.join(report['forbidden_imports'])}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de arranque (python -X importtime).")
+    parser.add_argument("--runs", type=int, default=5, help="Procesos por módulo (se toma la mediana)")
+    parser.add_argument("--only", default="", help="Solo este módulo (core_logic, gini_cli o gui)")
+    parser.add_argument("--top", type=int, default=5, help="Cuántas importaciones más lentas mostrar")
+    parser.add_argument("--output", help="Guarda el reporte en este archivo JSON")
+    args = parser.parse_args(argv)
+    runs = max(1, args.runs)
+
+    interpreter_ms = measure_interpreter(runs)
+    print(f"{'intérprete':<12} 'python -c pass' {interpreter_ms:.1f} ms (piso, no cuenta en el presupuesto)")
+    reports = []
+    for target in TARGETS:
+        if args.only and target.module != args.only:
+            continue
+        try:
+            report = check_target(target, runs, args.top)
+        except RuntimeError as e:
+            print(f"{target.module:<12} ERROR: {e}", file=sys.stderr)
+            return 2
+        print_report(report)
+        reports.append(report)
+
+    window: Dict[str, Any] = {"budget_ms": WINDOW_BUDGET_MS, "time_to_window_ms": None, "ok": True}
+    if not args.only or args.only == "gui":
+        time_to_window = measure_time_to_window(runs)
+        if time_to_window is None:
+            print(f"{'ventana':<12} omitido: no hay pantalla disponible (DISPLAY)")
+        else:
+            window.update(time_to_window_ms=round(time_to_window, 2), ok=time_to_window <= WINDOW_BUDGET_MS)
+            print(f"{'ventana':<12} {time_to_window:>7.1f} ms hasta la GiniApp dibujada   presupuesto {WINDOW_BUDGET_MS:.1f} ms"
+                  f"   [{'OK' if window['ok'] else 'EXCEDIDO'}]")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump({"python": sys.version.split()[0], "runs": runs, "interpreter_ms": round(interpreter_ms, 2),
+                       "modules": reports, "window": window}, handle, indent=2)
+
+    failed = [report["module"] for report in reports if not report["ok"]] + ([] if window["ok"] else ["ventana"])
+    if failed:
+        print(f"\nFuera de presupuesto: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
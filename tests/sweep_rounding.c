@@ -0,0 +1,370 @@
+// sweep_rounding.c
+// Barrido exhaustivo del redondeo C/ASM: pasa los 2^32 patrones de bits de float32 (o un rango)
+// por cada núcleo (asm_round, asm_round_batch y los puentes C process_gini_float /
+// process_gini_batch) y compara cada resultado con una referencia calculada sobre los bits:
+//   - redondeo al par más cercano (round-half-to-even, el modo por defecto de FPU y MXCSR)
+//   - NaN, ±Inf y valores fuera de rango de int32 -> 0x80000000 ("integer indefinite")
+// El espacio se reparte en bloques entre todos los núcleos (pthreads, reparto dinámico) y al
+// final se informan las diferencias por núcleo y los nanosegundos por valor de cada uno.
+// Se compila y ejecuta con tests/sweep_rounding.sh (64-bit por defecto, --m32 para 32-bit).
+//
+// Uso: ./sweep_rounding_exe                          (los 2^32 patrones, todos los núcleos)
+//      ./sweep_rounding_exe -s 0x3f000000 -e 0x4f000000 -j 4 -k asm_round_batch
+
+#define _GNU_SOURCE
+#include <errno.h>
+#include <inttypes.h>
+#include <pthread.h>
+#include <stdatomic.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+#include <unistd.h>
+
+// --- Funciones a verificar (float_rounder*.asm y gini_processor.c) ---
+extern void asm_round(float input_float, int* output_int_ptr);
+extern void asm_round_batch(const float* input_floats, int* output_ints, int count);
+extern int process_gini_float(float gini_value);
+extern int process_gini_batch(const float* gini_values, int* results, int count);
+
+// --- Configuración ---
+#define CHUNK 4096                 // Valores por llamada a cada núcleo
+#define BLOCK (CHUNK * 64)         // Patrones que toma un hilo por vez (reparto dinámico)
+#define MAX_THREADS 256
+#define DEFAULT_MAX_REPORT 10      // Diferencias que se muestran por núcleo
+#define MAX_REPORT 1000            // Tope de -n (cada hilo guarda hasta max_report ejemplos por núcleo)
+#define INDEFINITE INT32_MIN       // Resultado de FISTP / CVTSS2SI / CVTPS2DQ para NaN o fuera de rango
+
+// Todos los núcleos con la misma firma: redondean 'count' valores de 'in' en 'out'
+typedef void (*kernel_fn)(const float* in, int* out, int count);
+
+static void kernel_asm_round(const float* in, int* out, int count) {
+    for (int i = 0; i < count; ++i) {
+        asm_round(in[i], &out[i]);
+    }
+}
+
+static void kernel_process_gini_float(const float* in, int* out, int count) {
+    for (int i = 0; i < count; ++i) {
+        out[i] = process_gini_float(in[i]);
+    }
+}
+
+// Lotes: el bloque SIMD y la cola escalar. Cada CHUNK deja sus últimos 0-3 valores (según el
+// número de CHUNK) para una segunda llamada, así la cola también recibe patrones de todo el rango.
+static void batch_with_tail(void (*batch)(const float*, int*, int), const float* in, int* out, int count) {
+    uint32_t first_bits;
+    memcpy(&first_bits, in, sizeof first_bits);
+    int tail = (int)((first_bits / CHUNK) % 4);
+    if (tail > count) tail = count;
+    batch(in, out, count - tail);
+    batch(in + count - tail, out + count - tail, tail);
+}
+
+static void batch_asm(const float* in, int* out, int count) { asm_round_batch(in, out, count); }
+static void batch_bridge(const float* in, int* out, int count) { process_gini_batch(in, out, count); }
+
+static void kernel_asm_round_batch(const float* in, int* out, int count) { batch_with_tail(batch_asm, in, out, count); }
+static void kernel_process_gini_batch(const float* in, int* out, int count) { batch_with_tail(batch_bridge, in, out, count); }
+
+typedef struct {
+    const char* name;
+    kernel_fn fn;
+} Kernel;
+
+static const Kernel KERNELS[] = {
+    {"asm_round", kernel_asm_round},
+    {"asm_round_batch", kernel_asm_round_batch},
+    {"process_gini_float", kernel_process_gini_float},
+    {"process_gini_batch", kernel_process_gini_batch},
+};
+#define NUM_KERNELS ((int)(sizeof(KERNELS) / sizeof(KERNELS[0])))
+
+// --- Referencia ---
+// Se calcula sobre los bits, sin FPU ni SSE: no depende del modo de redondeo del procesador,
+// que es justamente lo que se está verificando.
+static inline int32_t reference_round(uint32_t bits) {
+    uint32_t sign = bits >> 31;
+    int exponent = (int)((bits >> 23) & 0xFF);
+    uint32_t mantissa = bits & 0x7FFFFF;
+    if (exponent == 0xFF) {
+        return INDEFINITE;                    // ±Inf y NaN
+    }
+    if (exponent >= 158) {
+        return INDEFINITE;                    // |x| >= 2^31: fuera de rango (-2^31 exacto también da 0x80000000)
+    }
+    if (exponent < 126) {
+        return 0;                             // |x| < 0.5 (incluye ±0 y subnormales)
+    }
+    uint64_t significand = mantissa | 0x800000; // x = significand * 2^(exponent - 150)
+    uint64_t magnitude;
+    int shift = 150 - exponent;
+    if (shift <= 0) {
+        magnitude = significand << -shift;    // |x| >= 2^23: ya es entero
+    } else {
+        magnitude = significand >> shift;
+        uint64_t remainder = significand & ((UINT64_C(1) << shift) - 1);
+        uint64_t half = UINT64_C(1) << (shift - 1);
+        if (remainder > half || (remainder == half && (magnitude & 1))) {
+            magnitude++;                      // Más de la mitad, o justo la mitad con parte entera impar
+        }
+    }
+    return sign ? (int32_t)(-(int64_t)magnitude) : (int32_t)magnitude;
+}
+
+// --- Estado del barrido ---
+typedef struct {
+    uint32_t bits;
+    int32_t expected;
+    int32_t actual;
+} Mismatch;
+
+typedef struct {
+    uint64_t mismatches;
+    uint64_t nanoseconds;
+    int reported;
+    Mismatch examples[MAX_REPORT];
+} KernelResult;
+
+typedef struct {
+    pthread_t thread;
+    KernelResult results[NUM_KERNELS];
+} Worker;
+
+static uint64_t sweep_start, sweep_end;       // Rango [inicio, fin) de patrones de bits
+static int enabled[NUM_KERNELS];
+static int max_report = DEFAULT_MAX_REPORT;
+static atomic_uint_fast64_t next_block;       // Próximo bloque a repartir
+static atomic_uint_fast64_t values_done;      // Para el progreso
+
+static inline uint64_t now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (uint64_t)ts.tv_sec * 1000000000u + (uint64_t)ts.tv_nsec;
+}
+
+static void* sweep_worker(void* arg) {
+    Worker* worker = (Worker*)arg;
+    // Un valor de más para desalinear los lotes a propósito en la mitad de los bloques
+    static _Thread_local float input_storage[CHUNK + 1];
+    static _Thread_local int32_t expected[CHUNK];
+    static _Thread_local int output[CHUNK];
+    uint64_t block_count = (sweep_end - sweep_start + BLOCK - 1) / BLOCK;
+
+    for (;;) {
+        uint64_t block = atomic_fetch_add(&next_block, 1);
+        if (block >= block_count) {
+            break;
+        }
+        float* input = input_storage + (block & 1);
+        uint64_t block_start = sweep_start + block * BLOCK;
+        uint64_t block_end = block_start + BLOCK < sweep_end ? block_start + BLOCK : sweep_end;
+        for (uint64_t chunk_start = block_start; chunk_start < block_end; chunk_start += CHUNK) {
+            int count = (int)(block_end - chunk_start < CHUNK ? block_end - chunk_start : CHUNK);
+            for (int i = 0; i < count; ++i) {
+                uint32_t bits = (uint32_t)(chunk_start + i);
+                memcpy(&input[i], &bits, sizeof bits);
+                expected[i] = reference_round(bits);
+            }
+            for (int k = 0; k < NUM_KERNELS; ++k) {
+                if (!enabled[k]) {
+                    continue;
+                }
+                KernelResult* result = &worker->results[k];
+                uint64_t start = now_ns();
+                KERNELS[k].fn(input, output, count);
+                result->nanoseconds += now_ns() - start;
+                for (int i = 0; i < count; ++i) {
+                    if (output[i] == expected[i]) {
+                        continue;
+                    }
+                    result->mismatches++;
+                    if (result->reported < max_report) {
+                        Mismatch* example = &result->examples[result->reported++];
+                        example->bits = (uint32_t)(chunk_start + i);
+                        example->expected = expected[i];
+                        example->actual = output[i];
+                    }
+                }
+            }
+            atomic_fetch_add(&values_done, (uint64_t)count);
+        }
+    }
+    return NULL;
+}
+
+// --- Línea de comandos ---
+static void usage(const char* program) {
+    fprintf(stderr,
+            "Uso: %s [-s INICIO] [-e FIN] [-j HILOS] [-k NUCLEO,...] [-n N] [-q]\n"
+            "  -s, -e  rango [INICIO, FIN) de patrones de bits (por defecto 0 .. 0x100000000)\n"
+            "  -j      hilos (por defecto, todos los procesadores)\n"
+            "  -k      núcleos a verificar, separados por comas (por defecto todos):\n",
+            program);
+    for (int k = 0; k < NUM_KERNELS; ++k) {
+        fprintf(stderr, "            %s\n", KERNELS[k].name);
+    }
+    fprintf(stderr,
+            "  -n      diferencias a mostrar por núcleo (por defecto %d, máximo %d)\n"
+            "  -q      sin progreso en stderr\n", DEFAULT_MAX_REPORT, MAX_REPORT);
+}
+
+static int parse_u64(const char* text, uint64_t* value) {
+    char* end;
+    errno = 0;
+    unsigned long long parsed = strtoull(text, &end, 0);
+    if (errno != 0 || end == text || *end != '\0') {
+        return -1;
+    }
+    *value = parsed;
+    return 0;
+}
+
+static int select_kernels(char* list) {
+    memset(enabled, 0, sizeof enabled);
+    for (char* name = strtok(list, ","); name != NULL; name = strtok(NULL, ",")) {
+        int found = 0;
+        for (int k = 0; k < NUM_KERNELS; ++k) {
+            if (strcmp(name, KERNELS[k].name) == 0) {
+                enabled[k] = found = 1;
+            }
+        }
+        if (!found) {
+            fprintf(stderr, "Núcleo desconocido: '%s'\n", name);
+            return -1;
+        }
+    }
+    return 0;
+}
+
+static void print_value(uint32_t bits) {
+    float value;
+    memcpy(&value, &bits, sizeof value);
+    printf("0x%08" PRIx32 " (%.9g)", bits, (double)value);
+}
+
+int main(int argc, char** argv) {
+    uint64_t start = 0, end = UINT64_C(1) << 32;
+    long threads = sysconf(_SC_NPROCESSORS_ONLN);
+    int quiet = 0;
+    for (int k = 0; k < NUM_KERNELS; ++k) {
+        enabled[k] = 1;
+    }
+
+    int option;
+    while ((option = getopt(argc, argv, "s:e:j:k:n:qh")) != -1) {
+        uint64_t value;
+        switch (option) {
+        case 's':
+        case 'e':
+            if (parse_u64(optarg, &value) != 0 || value > (UINT64_C(1) << 32)) {
+                fprintf(stderr, "Valor inválido para -%c: '%s'\n", option, optarg);
+                return 2;
+            }
+            *(option == 's' ? &start : &end) = value;
+            break;
+        case 'j':
+            if (parse_u64(optarg, &value) != 0 || value == 0 || value > MAX_THREADS) {
+                fprintf(stderr, "Cantidad de hilos inválida: '%s' (1-%d)\n", optarg, MAX_THREADS);
+                return 2;
+            }
+            threads = (long)value;
+            break;
+        case 'k':
+            if (select_kernels(optarg) != 0) {
+                usage(argv[0]);
+                return 2;
+            }
+            break;
+        case 'n':
+            if (parse_u64(optarg, &value) != 0 || value > MAX_REPORT) {
+                fprintf(stderr, "Valor inválido para -n: '%s' (0-%d)\n", optarg, MAX_REPORT);
+                return 2;
+            }
+            max_report = (int)value;
+            break;
+        case 'q':
+            quiet = 1;
+            break;
+        default:
+            usage(argv[0]);
+            return option == 'h' ? 0 : 2;
+        }
+    }
+    if (start >= end) {
+        fprintf(stderr, "Rango vacío: [0x%" PRIx64 ", 0x%" PRIx64 ")\n", start, end);
+        return 2;
+    }
+    if (threads < 1) threads = 1;
+    if (threads > MAX_THREADS) threads = MAX_THREADS;
+    sweep_start = start;
+    sweep_end = end;
+
+    uint64_t total = end - start;
+    printf("Barrido de float32 [0x%08" PRIx64 ", 0x%08" PRIx64 "]: %" PRIu64 " valores, %ld hilos, %zu bits\n",
+           start, end - 1, total, threads, sizeof(void*) * 8);
+
+    Worker* workers = calloc((size_t)threads, sizeof(Worker));
+    if (workers == NULL) {
+        fprintf(stderr, "Sin memoria\n");
+        return 2;
+    }
+    uint64_t wall_start = now_ns();
+    for (long t = 0; t < threads; ++t) {
+        if (pthread_create(&workers[t].thread, NULL, sweep_worker, &workers[t]) != 0) {
+            fprintf(stderr, "No se pudo crear el hilo %ld\n", t);
+            return 2;
+        }
+    }
+
+    // Progreso mientras trabajan los hilos (solo en una terminal)
+    if (!quiet && isatty(STDERR_FILENO)) {
+        while (atomic_load(&values_done) < total) {
+            usleep(200000);
+            uint64_t done = atomic_load(&values_done);
+            double elapsed = (now_ns() - wall_start) / 1e9;
+            double eta = done ? elapsed * (double)(total - done) / (double)done : 0.0;
+            fprintf(stderr, "\r  %5.1f%%  %6.0f s transcurridos, ~%.0f s restantes   ",
+                    100.0 * (double)done / (double)total, elapsed, eta);
+        }
+        fprintf(stderr, "\n");
+    }
+    for (long t = 0; t < threads; ++t) {
+        pthread_join(workers[t].thread, NULL);
+    }
+    double wall = (now_ns() - wall_start) / 1e9;
+
+    // --- Resumen por núcleo ---
+    int failed = 0;
+    printf("\n%-20s %14s %12s\n", "núcleo", "diferencias", "ns/valor");
+    for (int k = 0; k < NUM_KERNELS; ++k) {
+        if (!enabled[k]) {
+            continue;
+        }
+        KernelResult merged = {0};
+        for (long t = 0; t < threads; ++t) {
+            KernelResult* result = &workers[t].results[k];
+            merged.mismatches += result->mismatches;
+            merged.nanoseconds += result->nanoseconds;
+            for (int i = 0; i < result->reported && merged.reported < max_report; ++i) {
+                merged.examples[merged.reported++] = result->examples[i];
+            }
+        }
+        // ns/valor por hilo (tiempo dentro del núcleo); el rendimiento agregado va al final, medido
+        // con el reloj de pared (threads / per_value supondría escalado perfecto entre hilos)
+        double per_value = (double)merged.nanoseconds / (double)total;
+        printf("%-20s %14" PRIu64 " %12.3f\n", KERNELS[k].name, merged.mismatches, per_value);
+        for (int i = 0; i < merged.reported; ++i) {
+            printf("    ");
+            print_value(merged.examples[i].bits);
+            printf(": esperado %" PRId32 ", obtenido %" PRId32 "\n", merged.examples[i].expected, merged.examples[i].actual);
+        }
+        failed |= merged.mismatches != 0;
+    }
+    printf("\nTiempo total: %.2f s (%.3f ns/valor de pared, %.1f Mvalores/s con %ld hilos, referencia incluida)\n",
+           wall, wall * 1e9 / (double)total, wall > 0 ? (double)total / wall / 1e6 : 0.0, threads);
+    printf("%s\n", failed ? "FALLO: hay diferencias con la referencia." : "OK: todos los núcleos coinciden con la referencia.");
+    free(workers);
+    return failed ? 1 : 0;
+}
@@ -0,0 +1,82 @@
+#!/bin/bash
+# sweep_rounding.sh: Compila y ejecuta el barrido exhaustivo de float32 (sweep_rounding.c)
+#                    contra asm_round, asm_round_batch y los puentes C de gini_processor.c.
+#                    Por defecto verifica la versión 64-bit (float_rounder64.asm, backend en
+#                    proceso); con --m32 la 32-bit (float_rounder.asm, la del Server32).
+#
+# Uso: tests/sweep_rounding.sh                       (los 2^32 patrones, todos los núcleos)
+#      tests/sweep_rounding.sh --m32 -s 0x3f000000 -e 0x4f000000 -j 4
+#      (las opciones después de --m32 pasan tal cual al ejecutable; ver -h)
+
+# --- Funciones de color ---
+red() { echo -e "\033[31m$1\033[0m"; }
+green() { echo -e "\033[32m$1\033[0m"; }
+bold() { echo -e "\033[1m$1\033[0m"; }
+
+# --- Salir si cualquier comando falla ---
+set -e
+
+# --- Definición de Archivos ---
+TESTS_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+C_BRIDGE_DIR="${TESTS_DIR}/../src/c_bridge"
+SWEEP_SOURCE="${TESTS_DIR}/sweep_rounding.c"
+C_BRIDGE_SOURCE="${C_BRIDGE_DIR}/gini_processor.c"
+
+ARCH="64"
+if [ "$1" = "--m32" ]; then
+    ARCH="32"
+    shift
+fi
+
+# Compiladores y Flags
+ASM_COMPILER="nasm"
+C_COMPILER="gcc"
+if [ "$ARCH" = "32" ]; then
+    ASM_SOURCE="${C_BRIDGE_DIR}/float_rounder.asm"
+    ASM_FLAGS="-f elf"      # 32-bit ELF
+    ARCH_FLAG="-m32"
+else
+    ASM_SOURCE="${C_BRIDGE_DIR}/float_rounder64.asm"
+    ASM_FLAGS="-f elf64"    # 64-bit ELF
+    ARCH_FLAG="-m64"
+fi
+# -O2: el bucle de referencia y el de comparación no deben dominar la medición
+# -pthread: un hilo de barrido por procesador
+C_FLAGS="${ARCH_FLAG} -O2 -pthread -Wall"
+
+# Objetos y ejecutable en un directorio temporal (se borra al salir)
+BUILD_DIR="$(mktemp -d)"
+trap 'rm -rf "${BUILD_DIR}"' EXIT
+ASM_OBJECT="${BUILD_DIR}/float_rounder.o"
+SWEEP_EXECUTABLE="${BUILD_DIR}/sweep_rounding_exe"
+
+# --- 1. Compilar Ensamblador (ASM -> .o) ---
+bold "Paso 1: Compilando ASM ${ARCH}-bit ($(basename "${ASM_SOURCE}"))..."
+if ! ${ASM_COMPILER} ${ASM_FLAGS} "${ASM_SOURCE}" -o "${ASM_OBJECT}"; then
+    red "Error compilando ASM."
+    exit 1
+fi
+
+# --- 2. Compilar Barrido + Puente C y Enlazar ---
+bold "Paso 2: Compilando y enlazando el barrido..."
+if ! ${C_COMPILER} ${C_FLAGS} -o "${SWEEP_EXECUTABLE}" "${SWEEP_SOURCE}" "${C_BRIDGE_SOURCE}" "${ASM_OBJECT}"; then
+    red "Error compilando/enlazando el barrido."
+    exit 1
+fi
+echo
+
+# --- 3. Ejecutar ---
+bold "Paso 3: Ejecutando el barrido..."
+echo "------------------------------------------"
+set +e
+"${SWEEP_EXECUTABLE}" "$@"
+EXIT_CODE=$?
+set -e
+echo "------------------------------------------"
+
+if [ $EXIT_CODE -eq 0 ]; then
+    green "--- Barrido ${ARCH}-bit: ÉXITO ---"
+else
+    red "--- Barrido ${ARCH}-bit: FALLO (código ${EXIT_CODE}) ---"
+fi
+exit $EXIT_CODE
@@ -10,6 +10,8 @@
 // Declara la función del puente C (definida en gini_processor.c)
 // para que este programa sepa cómo llamarla. El enlazador la encontrará.
 extern int process_gini_float(float gini_value);
+// Versión por lotes (SIMD + cola escalar), también definida en gini_processor.c
+extern int process_gini_batch(const float* gini_values, int* results, int count);
 
 // --- Constantes para el Test ---
 #define ANSI_COLOR_GREEN   "\x1b[32m"
@@ -93,6 +95,32 @@ int main() {
         }
     }
 
+    // --- Prueba por Lotes ---
+    // La versión SIMD debe dar exactamente lo mismo que la escalar para cada valor
+    // (num_tests no es múltiplo de 4, así que también se ejercita la cola escalar).
+    printf("\nLote: %d valores con process_gini_batch\n", num_tests);
+    int batch_output[sizeof(test_values) / sizeof(test_values[0])];
+    int processed = process_gini_batch(test_values, batch_output, num_tests);
+    int batch_failures = 0;
+    if (processed != num_tests) {
+        printf("  process_gini_batch devolvió %d (esperado %d)\n", processed, num_tests);
+        batch_failures++;
+    } else {
+        for (int i = 0; i < num_tests; ++i) {
+            int scalar_output = process_gini_float(test_values[i]);
+            if (batch_output[i] != scalar_output) {
+                printf("  Caso %d: lote=%d, escalar=%d\n", i + 1, batch_output[i], scalar_output);
+                batch_failures++;
+            }
+        }
+    }
+    if (batch_failures == 0) {
+        printf("  Resultado: " ANSI_COLOR_GREEN "PASS" ANSI_COLOR_RESET "\n");
+    } else {
+        printf("  Resultado: " ANSI_COLOR_RED "FAIL" ANSI_COLOR_RESET " (%d diferencias)\n", batch_failures);
+        failures += batch_failures;
+    }
+
     // --- Resumen Final ---
     printf("\n--- Resumen de la Prueba ---\n");
     if (failures == 0) {